@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+"""
+Run a game headless and as fast as possible, without FIFE and without wall-clock pacing.
+
+This uses the same setup as the game tests (FIFE is replaced by a dummy module), so
+only the simulation runs. Ticks are executed back to back via Timer.run_ticks.
+
+Examples:
+	python development/headless_uh.py --start-specific-random-map=5 --ai-players=2 --max-ticks=50000 --hash
+	python development/headless_uh.py --load-game=path/to/game.sqlite --max-ticks=10000 --save=out.sqlite
+"""
+
+import gettext
+import hashlib
+import os
+import sys
+import time
+
+from functools import partial
+from optparse import OptionParser
+
+# make this script work both when started inside development and in the uh root dir
+if not os.path.exists('content'):
+	os.chdir('..')
+assert os.path.exists('content'), 'Content dir not found.'
+sys.path.append('.')
+
+
+def get_checkup_digest(session):
+	"""Returns a printable digest of World.get_checkup_hash."""
+	data = session.world.get_checkup_hash()
+	return hashlib.md5(repr(sorted(data.iteritems()))).hexdigest()
+
+def run(options):
+	import horizons.globals
+	from horizons.util.random_map import generate_map_from_seed
+	from tests import RANDOM_SEED
+	import tests.game
+	from tests.game import new_session, load_session, SPTestSession
+
+	tests.game.setup_package()
+	horizons.globals.db = tests.game.db
+	rng_seed = options.sp_seed if options.sp_seed is not None else RANDOM_SEED
+
+	start = time.time()
+	if options.load_game:
+		session = load_session(options.load_game, rng_seed=rng_seed)
+	else:
+		if options.start_map:
+			mapgen = lambda: options.start_map
+		else:
+			mapgen = partial(generate_map_from_seed, options.start_specific_random_map)
+		session, _ = new_session(mapgen=mapgen, rng_seed=rng_seed,
+		                         human_player=options.human_player, ai_players=options.ai_players)
+	print 'Loaded in %.2fs' % (time.time() - start)
+
+	try:
+		start = time.time()
+		ticks = session.timer.run_ticks(options.max_ticks)
+		duration = max(time.time() - start, 1e-6)
+		print 'Ran %d ticks in %.2fs (%.1f ticks/s, %.1fx game speed)' % (ticks, duration,
+			ticks / duration, ticks / duration / session.timer.ticks_per_second)
+
+		if options.save:
+			start = time.time()
+			assert session.save(savegamename=os.path.abspath(options.save)), 'Saving failed'
+			print 'Saved to %s in %.2fs' % (options.save, time.time() - start)
+		if options.hash:
+			print 'Checkup hash after tick %d: %s' % (session.timer.tick_next_id - 1, get_checkup_digest(session))
+	finally:
+		session.end(remove_savegame=False)
+		SPTestSession.cleanup()
+
+if __name__ == '__main__':
+	parser = OptionParser()
+	parser.add_option("--start-specific-random-map", dest="start_specific_random_map", metavar="<seed>",
+	    type="int", default=1, help="Play on the random map generated from <seed>.")
+	parser.add_option("--start-map", dest="start_map", metavar="<file>",
+	    help="Play on the map <file>.")
+	parser.add_option("--load-game", dest="load_game", metavar="<file>",
+	    help="Continue the savegame <file>.")
+	parser.add_option("--ai-players", dest="ai_players", metavar="<ai_players>",
+	    type="int", default=2, help="Number of AI players on new maps.")
+	parser.add_option("--human-player", dest="human_player", action="store_true",
+	    default=False, help="Add an idle human player on new maps.")
+	parser.add_option("--sp-seed", dest="sp_seed", metavar="<seed>", type="int",
+	    help="Use this seed for the session.")
+	parser.add_option("--max-ticks", dest="max_ticks", metavar="<max_ticks>", type="int",
+	    default=10000, help="Run the game for <max_ticks> ticks.")
+	parser.add_option("--save", dest="save", metavar="<file>",
+	    help="Save the game to <file> after running.")
+	parser.add_option("--hash", dest="hash", action="store_true", default=False,
+	    help="Print a digest of the checkup hash after running.")
+	(options, args) = parser.parse_args()
+
+	gettext.install('', unicode=True) # no translations here
+	from run_tests import setup_horizons
+	setup_horizons()
+	run(options)
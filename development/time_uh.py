@@ -59,15 +59,16 @@ def get_length(r):
 dev_null = open(os.devnull, 'w')
 
 class GameTimer(object):
-	def __init__(self, name, args):
+	def __init__(self, name, args, script='run_uh.py'):
 		self.name = name
 		self.args = args
+		self.script = script
 		self.returncode = None
 		self.time = None
 
 	def run(self):
 		start = time.time()
-		args = ' '.join([sys.executable, 'run_uh.py'] + self.args)
+		args = ' '.join([sys.executable, self.script] + self.args)
 		proc = subprocess.Popen(args, executable=sys.executable, stdin=dev_null, stdout=dev_null, stderr=dev_null)
 		proc.wait()
 		self.returncode = proc.returncode
@@ -103,8 +104,11 @@ if __name__ == '__main__':
 	    help="Use the given expression (same as for xrange) to run a number of game instances with --sp-seed=SEED")
 	parser.add_option("--map-seed-range", dest="map_seed_range",
 	    help="Use the given expression (same as for xrange) to run a number of game instances with --start-specific-random-map=SEED")
+	parser.add_option("--headless", dest="headless", action="store_true", default=False,
+	    help="Run the games with development/headless_uh.py: no engine, ticks as fast as possible.")
 	(options, args) = parser.parse_args()
 
+	script = os.path.join('development', 'headless_uh.py') if options.headless else 'run_uh.py'
 	games = []
 	game_seed_len = get_length(get_range(options.game_seed_range))
 	map_seed_len = get_length(get_range(options.map_seed_range))
@@ -118,7 +122,7 @@ if __name__ == '__main__':
 			if map_seed is not None:
 				args_t.append('--start-specific-random-map=' + str(map_seed))
 				name += ('-m%0' + str(map_seed_len) + 'd') % map_seed
-			games.append(GameTimer(name, args_t))
+			games.append(GameTimer(name, args_t, script))
 
 	manager = multiprocessing.Manager()
 	queue = manager.Queue()
@@ -40,6 +40,7 @@ from personalitymanager import PersonalityManager
 from landmanager import LandManager
 from settlementmanager import SettlementManager
 from unitbuilder import UnitBuilder
+from workscheduler import WorkScheduler
 from constants import GOAL_RESULT
 from basicbuilder import BasicBuilder
 from specialdomestictrademanager import SpecialDomesticTradeManager
@@ -92,6 +93,8 @@ class AIPlayer(GenericAI):
 	log = logging.getLogger("ai.aiplayer")
 	tick_interval = 32
 	tick_long_interval = 128
+	work_operations_per_tick = 40 # number of planning operations all AI players can use in a tick, see WorkScheduler
+	work_scheduler = None # the WorkScheduler shared by all AI players, created for each session
 
 	def __init__(self, session, id, name, color, clientid, difficulty_level, **kwargs):
 		super(AIPlayer, self).__init__(session, id, name, color, clientid, difficulty_level, **kwargs)
@@ -128,7 +131,7 @@ class AIPlayer(GenericAI):
 				self.log.info('%s Added %s to the fleet', self, ship)
 				self.ships[ship] = self.shipStates.idle
 				if isinstance(ship, MovingWeaponHolder):
-					ship.stance = NoneStance
+					ship.set_stance(NoneStance)
 				if isinstance(ship, FightingShip):
 					self.combat_manager.add_new_unit(ship)
 		self.need_more_ships = False
@@ -140,6 +143,8 @@ class AIPlayer(GenericAI):
 		self.islands = {}
 		self.settlement_managers = []
 		self._settlement_manager_by_settlement_id = {}
+		self._pending_settlements = {} # {land_manager: job, ...} of settlements whose settlement manager is still being planned
+		self._settlements_job = None # the last handle_settlements work scheduler job
 		self.missions = set()
 		self.fishers = []
 		self.settlement_founder = SettlementFounder(self)
@@ -172,15 +177,28 @@ class AIPlayer(GenericAI):
 		if mission.ship and mission.ship in self.ships:
 			self.ships[mission.ship] = self.shipStates.idle
 		if isinstance(mission, FoundSettlement):
-			settlement_manager = SettlementManager(self, mission.land_manager)
-			self.settlement_managers.append(settlement_manager)
-			self._settlement_manager_by_settlement_id[settlement_manager.settlement.worldid] = settlement_manager
-			self.add_building(settlement_manager.settlement.warehouse)
-			if settlement_manager.feeder_island:
+			if mission.land_manager.feeder_island:
 				self.need_feeder_island = False
+			self._start_settlement_manager(mission.land_manager)
 		elif isinstance(mission, PrepareFoundationShip):
 			self.settlement_founder.tick()
 
+	def _start_settlement_manager(self, land_manager):
+		"""Start planning the new settlement, it is managed as soon as the plan is ready."""
+		job = self._create_settlement_manager(land_manager)
+		self._pending_settlements[land_manager] = job
+		self.work_scheduler.add_job(self, job)
+
+	def _create_settlement_manager(self, land_manager):
+		"""Create the settlement manager of a new settlement. This is a work scheduler job."""
+		settlement_manager = SettlementManager(self, land_manager)
+		for cost in settlement_manager.create_plans():
+			yield cost
+		del self._pending_settlements[land_manager]
+		self.settlement_managers.append(settlement_manager)
+		self._settlement_manager_by_settlement_id[settlement_manager.settlement.worldid] = settlement_manager
+		self.add_building(settlement_manager.settlement.warehouse)
+
 	def report_failure(self, mission, msg):
 		if not self._enabled:
 			return
@@ -291,8 +309,17 @@ class AIPlayer(GenericAI):
 				for (mission_id,) in db_result:
 					self.missions.add(PrepareFoundationShip.load(db, mission_id, self.report_success, self.report_failure))
 			else:
-				mission_id = db("SELECT rowid FROM ai_mission_found_settlement WHERE land_manager = ?", land_manager.worldid)[0][0]
-				self.missions.add(FoundSettlement.load(db, mission_id, self.report_success, self.report_failure))
+				db_result = db("SELECT rowid FROM ai_mission_found_settlement WHERE land_manager = ?", land_manager.worldid)
+				if db_result:
+					self.missions.add(FoundSettlement.load(db, db_result[0][0], self.report_success, self.report_failure))
+				else:
+					# the settlement was founded but its plan wasn't finished, start planning it again
+					for settlement in self.world.settlements:
+						if settlement.owner is self and settlement.island is land_manager.island:
+							land_manager.settlement = settlement
+							break
+					assert land_manager.settlement
+					self._start_settlement_manager(land_manager)
 
 		for settlement_manager in self.settlement_managers:
 			# load the domestic trade missions
@@ -314,7 +341,11 @@ class AIPlayer(GenericAI):
 		Scheduler().add_new_object(Callback(self.tick), self, run_in=self.tick_interval)
 		self.settlement_founder.tick()
 		self.handle_enemy_expansions()
-		self.handle_settlements()
+		if self.work_scheduler.has_job(self._settlements_job):
+			self.log.info('%s skipped handling the settlements because the last time has not finished yet', self)
+		else:
+			self._settlements_job = self.handle_settlements()
+			self.work_scheduler.add_job(self, self._settlements_job)
 		self.special_domestic_trade_manager.tick()
 		self.international_trade_manager.tick()
 		self.unit_manager.tick()
@@ -328,13 +359,17 @@ class AIPlayer(GenericAI):
 		self.strategy_manager.tick()
 
 	def handle_settlements(self):
+		"""Update the goals and execute the most important ones. This is a work scheduler job."""
 		goals = []
 		for goal in self.goals:
 			if goal.can_be_activated:
 				goal.update()
 				goals.append(goal)
-		for settlement_manager in self.settlement_managers:
-			settlement_manager.tick(goals)
+				yield
+		for settlement_manager in list(self.settlement_managers):
+			for _ in settlement_manager.tick(goals):
+				yield
+			yield
 		goals.sort(reverse=True)
 
 		settlements_blocked = set()  # set([settlement_manager_id, ...])
@@ -344,6 +379,7 @@ class AIPlayer(GenericAI):
 			if isinstance(goal, SettlementGoal) and goal.settlement_manager.worldid in settlements_blocked:
 				continue  # can't build anything in this settlement
 			result = goal.execute()
+			yield
 			if result == GOAL_RESULT.SKIP:
 				self.log.info('%s, skipped goal %s', self, goal)
 			elif result == GOAL_RESULT.BLOCK_SETTLEMENT_RESOURCE_USAGE:
@@ -381,7 +417,19 @@ class AIPlayer(GenericAI):
 		if not self._enabled:
 			return
 
-		self._settlement_manager_by_settlement_id[building.settlement.worldid].remove_building(building)
+		if building.settlement.worldid in self._settlement_manager_by_settlement_id:
+			self._settlement_manager_by_settlement_id[building.settlement.worldid].remove_building(building)
+		elif building is building.settlement.warehouse:
+			# the settlement is still being planned and can't be managed without its warehouse
+			self._stop_settlement_manager(building.settlement)
+
+	def _stop_settlement_manager(self, settlement):
+		"""Drop the unfinished plan of the settlement and forget its island."""
+		for land_manager, job in self._pending_settlements.items():
+			if land_manager.settlement is settlement:
+				self.work_scheduler.remove_job(job)
+				del self._pending_settlements[land_manager]
+				del self.islands[land_manager.island.worldid]
 
 	def remove_unit(self, unit):
 		if not self._enabled:
@@ -446,7 +494,10 @@ class AIPlayer(GenericAI):
 					settlement_manager = potential_settlement_manager
 					break
 
-			if settlement_manager is None:
+			if settlement_manager is None and land_manager in self._pending_settlements:
+				# the settlement manager doesn't exist yet, handle the changes once it does
+				self.settlement_expansions.extend((coords, land_manager.settlement) for coords in changed_coords)
+			elif settlement_manager is None:
 				self.handle_enemy_settling_on_our_chosen_island(island_id)
 				# we are on the way to found a settlement on that island
 			else:
@@ -471,6 +522,7 @@ class AIPlayer(GenericAI):
 	def clear_caches(cls):
 		BasicBuilder.clear_cache()
 		AbstractFarm.clear_cache()
+		cls.work_scheduler = WorkScheduler(cls.work_operations_per_tick)
 
 	def __str__(self):
 		return 'AI(%s/%s)' % (self.name if hasattr(self, 'name') else 'unknown', self.worldid if hasattr(self, 'worldid') else 'none')
@@ -479,6 +531,7 @@ class AIPlayer(GenericAI):
 		"""Called to speed up session destruction."""
 		assert self._enabled
 		self._enabled = False
+		self.work_scheduler.remove_jobs(self)
 		SettlementRangeChanged.unsubscribe(self._on_settlement_range_changed)
 		NewDisaster.unsubscribe(self.notify_new_disaster)
 		MineEmpty.unsubscribe(self.notify_mine_empty)
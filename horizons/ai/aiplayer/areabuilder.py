@@ -49,6 +49,7 @@ class AreaBuilder(WorldObject):
 		self.owner = self.land_manager.owner
 		self.settlement = self.land_manager.settlement
 		self.plan = {} # {(x, y): (purpose, subclass specific data), ...}
+		self.__path_nodes_cache = (None, None) # (change ids the path nodes were computed for, {(x, y): penalty, ...})
 
 	@classmethod
 	def load(cls, db, settlement_manager):
@@ -102,7 +103,18 @@ class AreaBuilder(WorldObject):
 					queue.append((coords2, dist + 1))
 
 	def get_path_nodes(self):
-		"""Return a dict {(x, y): penalty, ...} of current and possible future road tiles in the settlement."""
+		"""
+		Return a dict {(x, y): penalty, ...} of current and possible future road tiles in the settlement.
+
+		The result is reused until the island, the areas, the roads, or a plan change so it must not be modified.
+		"""
+		key = (self.island.last_change_id, self.land_manager.last_change_id)
+		if self.__path_nodes_cache[0] != key:
+			self.__path_nodes_cache = (key, self._compute_path_nodes())
+		return self.__path_nodes_cache[1]
+
+	def _compute_path_nodes(self):
+		"""Compute the dict {(x, y): penalty, ...} of current and possible future road tiles in the settlement."""
 		moves = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
 
 		nodes = {} # {(x, y): penalty, ...}
@@ -264,6 +276,7 @@ class AreaBuilder(WorldObject):
 		for coords in coords_list:
 			if coords in self.plan:
 				del self.plan[coords]
+		self.land_manager.register_change()
 
 	def add_building(self, building):
 		"""Called when a new building is added in the area (the building already exists during the call)."""
@@ -287,6 +300,7 @@ class AreaBuilder(WorldObject):
 			self.plan[(x, y)] = (purpose, data)
 			if purpose == BUILDING_PURPOSE.ROAD:
 				self.land_manager.roads.add((x, y))
+			self.land_manager.register_change()
 
 	def register_change_list(self, coords_list, purpose, data):
 		for (x, y) in coords_list:
@@ -250,6 +250,10 @@ class UnitManager(object):
 	def find_ships_near_group(self, ship_group, radius):
 		other_ships_set = set()
 		for ship in ship_group:
+			# weapon holders know whether other players' units are near them
+			zone = getattr(ship, 'proximity_zone', None)
+			if zone is not None and not zone and zone.radius >= radius:
+				continue
 			nearby_ships = ship.find_nearby_ships(radius)
 			# return only other player's ships, since we want that in most cases anyway
 			other_ships_set |= set(self.filter_ships(nearby_ships, [self._not_owned_rule(), self._selectable_rule()]))
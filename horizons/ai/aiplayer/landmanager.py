@@ -68,6 +68,7 @@ class LandManager(WorldObject):
 		self.production = {}
 		self.village = {}
 		self.roads = set() # set((x, y), ...) of coordinates where road can be built independent of the area purpose
+		self.last_change_id = -1 # incremented whenever the areas, the roads, or the plan of an area builder change
 		self.coastline = self._get_coastline() # set((x, y), ...) of coordinates which coastal buildings could use in the production area
 		self.personality = self.owner.personality_manager.get('LandManager')
 		self.refresh_resource_deposits()
@@ -293,6 +294,7 @@ class LandManager(WorldObject):
 		"""Assign a current village tile to the production area."""
 		self.production[coords] = self.village[coords]
 		del self.village[coords]
+		self.register_change()
 
 	def handle_lost_area(self, coords_list):
 		"""Handle losing the potential land in the given coordinates list."""
@@ -304,6 +306,11 @@ class LandManager(WorldObject):
 				del self.production[coords]
 			self.roads.discard(coords)
 			self.coastline.discard(coords)
+		self.register_change()
+
+	def register_change(self):
+		"""Register a change of the areas, the roads, or the plan of one of the area builders."""
+		self.last_change_id += 1
 
 	def display(self):
 		"""Show the plan on the map unless it is disabled in the settings."""
@@ -81,8 +81,17 @@ class SettlementManager(WorldObject):
 		self.resource_manager = ResourceManager(self)
 		self.trade_manager = TradeManager(self)
 		self.__init(land_manager)
-
 		self.village_builder = VillageBuilder(self)
+
+	def create_plans(self):
+		"""
+		Plan the areas of the new settlement and prepare its goals.
+
+		This is a work scheduler job that yields the cost of every step of the village
+		planning. The settlement manager can only be used after it has finished.
+		"""
+		for cost in self.village_builder.create_plan():
+			yield cost
 		self.production_builder = ProductionBuilder(self)
 		self.village_builder.display()
 		self.production_builder.display()
@@ -384,21 +393,26 @@ class SettlementManager(WorldObject):
 		self.resource_manager.finish_tick()
 
 	def _add_goals(self, goals):
-		"""Add the settlement's goals that can be activated to the goals list."""
+		"""Add the settlement's goals that can be activated to the goals list. This is a generator that yields after every goal update."""
 		for goal in self._goals:
 			if goal.can_be_activated:
 				goal.update()
 				goals.append(goal)
+				yield
 
 	def tick(self, goals):
-		"""Refresh the settlement info and add its goals to the player's goal list."""
+		"""Refresh the settlement info and add its goals to the player's goal list. This is a generator that yields after every step."""
 		if self.feeder_island:
 			self._start_feeder_tick()
-			self._add_goals(goals)
+			yield
+			for _ in self._add_goals(goals):
+				yield
 			self._end_feeder_tick()
 		else:
 			self._start_general_tick()
-			self._add_goals(goals)
+			yield
+			for _ in self._add_goals(goals):
+				yield
 			self._end_general_tick()
 
 	def add_building(self, building):
@@ -55,8 +55,6 @@ class VillageBuilder(AreaBuilder):
 	def __init__(self, settlement_manager):
 		super(VillageBuilder, self).__init__(settlement_manager)
 		self.__init(settlement_manager)
-		if not self.land_manager.feeder_island:
-			self._create_plan()
 
 	def __init(self, settlement_manager):
 		self.land_manager = settlement_manager.land_manager
@@ -104,9 +102,9 @@ class VillageBuilder(AreaBuilder):
 					result.add(coords)
 		return result
 
-	def _create_plan(self):
+	def create_plan(self):
 		"""
-		Create the area plan.
+		Create the area plan. This is a work scheduler job that yields the cost of every step.
 
 		The algorithm:
 		* find a way to cut the village area into rectangular section_plans
@@ -115,6 +113,9 @@ class VillageBuilder(AreaBuilder):
 			of the residences
 		"""
 
+		if self.land_manager.feeder_island:
+			return
+
 		xs = set([x for (x, _) in self.land_manager.village])
 		ys = set([y for (_, y) in self.land_manager.village])
 
@@ -152,15 +153,18 @@ class VillageBuilder(AreaBuilder):
 				horizontal_roads.add(start_y - 1)
 
 		for section_coords_set in section_coords_set_list:
-			section_plan = self._create_section_plan(section_coords_set, vertical_roads, horizontal_roads)
+			for section_plan in self._create_section_plan(section_coords_set, vertical_roads, horizontal_roads):
+				yield 6 # evaluating a main square position is relatively expensive
 			section_plans.append(section_plan[1])
 
-		self._stitch_sections_together(section_plans, vertical_roads, horizontal_roads)
+		for cost in self._stitch_sections_together(section_plans, vertical_roads, horizontal_roads):
+			yield cost
 		self._return_unused_space()
 
 	def _stitch_sections_together(self, section_plans, vertical_roads, horizontal_roads):
 		"""
 		Complete creating the plan by stitching the sections together and creating the tent queue.
+		This is a generator that yields the cost of every step.
 
 		@param section_plans: list of section plans in the format [{(x, y): BUILDING_PURPOSE constant, ...}, ...]
 		@param vertical_roads: vertical roads between the sections in the form set([x, ...])
@@ -190,13 +194,15 @@ class VillageBuilder(AreaBuilder):
 				self.plan[coords] = (purpose, (i, tent_lookup[coords]))
 		self.num_sections = len(section_plans)
 		self.current_section = 0
-		self._reserve_special_village_building_spots()
+		for cost in self._reserve_special_village_building_spots():
+			yield cost
 		self._recreate_tent_queue()
 
 		# add potential roads to the island's network
 		for coords, (purpose, _) in self.plan.iteritems():
 			if purpose == BUILDING_PURPOSE.ROAD:
 				self.land_manager.roads.add(coords)
+		self.land_manager.register_change()
 
 	@classmethod
 	def _remove_unreachable_roads(cls, section_plan, main_square):
@@ -262,7 +268,8 @@ class VillageBuilder(AreaBuilder):
 		@param section_plans: list of section plans in the format [{(x, y): BUILDING_PURPOSE constant, ...}, ...]
 		@param vertical_roads: vertical roads between the sections in the form set([x, ...])
 		@param horizontal_roads: horizontal roads between the sections in the form set([y, ...])
-		@return: (number of residences in the plan, the plan in the form {(x, y): BUILDING_PURPOSE constant}
+		@return: generator that yields (number of residences in the plan, the plan in the form {(x, y): BUILDING_PURPOSE constant})
+			of the best plan so far after every main square position and once more at the end
 		"""
 
 		best_plan = {}
@@ -382,7 +389,8 @@ class VillageBuilder(AreaBuilder):
 				best_plan = section_plan
 				best_tents = good_tents
 				best_value = value
-		return (best_tents, best_plan)
+			yield (best_tents, best_plan)
+		yield (best_tents, best_plan)
 
 	def _optimize_section_plan(self, section_plan):
 		"""Try to fit more residences into the grid."""
@@ -479,6 +487,7 @@ class VillageBuilder(AreaBuilder):
 		@param new_purpose: the BUILDING_PURPOSE constant of the new buildings
 		@param max_buildings: maximum number of residences to replace
 		@param capacity: maximum number of residences one of the new buildings can service
+		@return: generator that yields the cost of every evaluated position
 		"""
 
 		distance_rect_rect_sq = distances.distance_rect_rect_sq
@@ -534,6 +543,7 @@ class VillageBuilder(AreaBuilder):
 				if best_score is None or best_score > score:
 					best_score = score
 					best_pos = replaced_pos
+				yield 1
 
 			in_range = 0
 			positions = zip(*get_centroid_distance_pairs(planned_tents, set([best_pos])))[1]
@@ -549,19 +559,26 @@ class VillageBuilder(AreaBuilder):
 			self.register_change_list([coords], new_purpose, (self.plan[coords][1][0], None))
 
 	def _reserve_special_village_building_spots(self):
-		"""Replace residence spots with special village buildings such as pavilions, schools, taverns, and fire stations."""
+		"""
+		Replace residence spots with special village buildings such as pavilions, schools, taverns, and fire stations.
+		This is a generator that yields the cost of every step.
+		"""
 		num_other_buildings = 0 # the maximum number of each village producer that should be placed
 		residences = len(self.tent_queue)
 		while residences > 0:
 			num_other_buildings += 3
 			residences -= 3 + self.personality.normal_coverage_building_capacity
 
-		self._replace_planned_residence(BUILDING_PURPOSE.PAVILION, num_other_buildings, self.personality.max_coverage_building_capacity)
-		self._replace_planned_residence(BUILDING_PURPOSE.VILLAGE_SCHOOL, num_other_buildings, self.personality.max_coverage_building_capacity)
-		self._replace_planned_residence(BUILDING_PURPOSE.TAVERN, num_other_buildings, self.personality.max_coverage_building_capacity)
+		for cost in self._replace_planned_residence(BUILDING_PURPOSE.PAVILION, num_other_buildings, self.personality.max_coverage_building_capacity):
+			yield cost
+		for cost in self._replace_planned_residence(BUILDING_PURPOSE.VILLAGE_SCHOOL, num_other_buildings, self.personality.max_coverage_building_capacity):
+			yield cost
+		for cost in self._replace_planned_residence(BUILDING_PURPOSE.TAVERN, num_other_buildings, self.personality.max_coverage_building_capacity):
+			yield cost
 
 		num_fire_stations = max(0, int(round(0.5 + (len(self.tent_queue) - 3 * num_other_buildings) / self.personality.normal_fire_station_capacity)))
-		self._replace_planned_residence(BUILDING_PURPOSE.FIRE_STATION, num_fire_stations, self.personality.max_fire_station_capacity)
+		for cost in self._replace_planned_residence(BUILDING_PURPOSE.FIRE_STATION, num_fire_stations, self.personality.max_fire_station_capacity):
+			yield cost
 
 		self._create_special_village_building_assignments()
 
@@ -0,0 +1,106 @@
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import logging
+
+from collections import deque
+
+from horizons.scheduler import Scheduler
+from horizons.util.python import decorators
+
+class WorkScheduler(object):
+	"""
+	Runs the expensive work of the AI players in resumable steps.
+
+	A job is a generator that yields after every step. A step may yield its cost as the
+	number of operations it took (an operation being roughly the cost of a simple
+	evaluation), otherwise it counts as one operation. Steps are run until the operations
+	of all the jobs reach operations_per_tick in a game tick; the rest of the work continues
+	in the following ticks. The budget is counted in operations instead of time so that
+	every machine runs the same steps in the same tick which keeps multiplayer games in sync.
+
+	Jobs are run in the order they were added. The jobs can't be saved so they have to be
+	recreated by their owners after loading.
+	"""
+
+	log = logging.getLogger("ai.aiplayer.workscheduler")
+
+	def __init__(self, operations_per_tick):
+		super(WorkScheduler, self).__init__()
+		self.operations_per_tick = operations_per_tick
+		self._jobs = deque() # deque([(owner, job), ...])
+		self._tick = None # the tick when the operations were used
+		self._operations = 0 # number of operations used during self._tick
+		self._running = False
+		self._resume_scheduled = False
+
+	def add_job(self, owner, job):
+		"""Add the job (generator) of owner and start running it if there is budget left in the current tick."""
+		self._jobs.append((owner, job))
+		self._run()
+
+	def has_job(self, job):
+		"""Return a boolean showing whether the job is still unfinished."""
+		return any(queued_job is job for _, queued_job in self._jobs)
+
+	def remove_job(self, job):
+		"""Drop the job if it is still unfinished."""
+		self._jobs = deque((owner, queued_job) for (owner, queued_job) in self._jobs if queued_job is not job)
+
+	def remove_jobs(self, owner):
+		"""Drop the unfinished jobs of the owner."""
+		self._jobs = deque((job_owner, job) for (job_owner, job) in self._jobs if job_owner is not owner)
+
+	def _run(self):
+		if self._running:
+			return # a job added a new job, it will be run by the active loop
+
+		if self._tick != Scheduler().cur_tick:
+			self._tick = Scheduler().cur_tick
+			self._operations = 0
+
+		self._running = True
+		try:
+			while self._jobs and self._operations < self.operations_per_tick:
+				_, job = self._jobs[0]
+				try:
+					cost = next(job)
+				except StopIteration:
+					cost = None
+					if self._jobs and self._jobs[0][1] is job:
+						self._jobs.popleft()
+				self._operations += cost or 1
+		finally:
+			self._running = False
+
+		if self._jobs and not self._resume_scheduled:
+			self.log.debug('%s continuing %d jobs in the next tick', self, len(self._jobs))
+			self._resume_scheduled = True
+			Scheduler().add_new_object(self._resume, self, run_in=1)
+
+	def _resume(self):
+		self._resume_scheduled = False
+		self._run()
+
+	def __str__(self):
+		return 'WorkScheduler(%d/%d)' % (self._operations, self.operations_per_tick)
+
+decorators.bind_all(WorkScheduler)
@@ -18,6 +18,7 @@
 # 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 # ###################################################
 
+import base64
 import itertools
 import json
 import math
@@ -121,6 +122,13 @@ class Minimap(object):
 
 		self._image_size_cache = {} # internal detail
 
+		# the base layer (water, islands and settlements) as one palette index per pixel,
+		# see _recalculate
+		self._palette = [self.COLORS["water"], self.COLORS["island"]]
+		self._palette_indices = dict((color, i) for i, color in enumerate(self._palette))
+		self._pixels = None
+		self._rotated_points = {} # see _get_rotated_points
+
 		self.imagemanager = imagemanager
 
 		self.minimap_image = _MinimapImage(self, targetrenderer)
@@ -147,11 +155,12 @@ class Minimap(object):
 
 		if self in self.__class__._instances:
 			self.__class__._instances.remove(self)
+		self._pixels = None # not updated any more
 
-	def draw(self):
+	def draw(self, recalculate=True):
 		"""Recalculates and draws the whole minimap of self.session.world or world.
 		The world you specified is reused for every operation until the next draw().
-		@param recalculate: do a full recalculation
+		@param recalculate: do a full recalculation, else only the drawing is redone
 		"""
 		if self.world is None and self.session.world is not None:
 			self.world = self.session.world # in case minimap has been constructed before the world
@@ -179,7 +188,10 @@ class Minimap(object):
 			self.icon.image = fife.GuiImage( self.minimap_image.image )
 
 		self.update_cam()
-		self._recalculate()
+		if recalculate or self._pixels is None:
+			self._recalculate()
+		else:
+			self._draw_pixels(xrange(len(self._pixels)))
 		if not self.preview:
 			self._timed_update(force=True)
 			ExtScheduler().rem_all_classinst_calls(self)
@@ -188,7 +200,11 @@ class Minimap(object):
 
 	def dump_data(self):
 		"""Returns a string representing the minimap data"""
-		return self._recalculate(dump_data=True)
+		self._calculate_pixels(0, 0, self.location.width, self.location.height)
+		return json.dumps({
+			'palette': self._palette,
+			'pixels': base64.b64encode(str(self._pixels)),
+		})
 
 	def draw_data(self, data):
 		"""Display data from dump_data"""
@@ -196,14 +212,11 @@ class Minimap(object):
 		self.minimap_image.reset()
 		self.icon.image = fife.GuiImage( self.minimap_image.image )
 
-		self.minimap_image.set_drawing_enabled()
-		rt = self.minimap_image.rendertarget
-		render_name = self._get_render_name("base")
-		draw_point = rt.addPoint
-		point = fife.Point()
-		for x, y, r, g, b in json.loads(data):
-			point.set(x, y)
-			draw_point(render_name, point, r, g, b)
+		data = json.loads(data)
+		self._palette = [tuple(color) for color in data['palette']]
+		self._palette_indices = dict((color, i) for i, color in enumerate(self._palette))
+		self._pixels = bytearray(base64.b64decode(data['pixels']))
+		self._draw_pixels(xrange(len(self._pixels)))
 
 
 	def _get_render_name(self, key):
@@ -254,16 +267,19 @@ class Minimap(object):
 		@param tup: (x, y)"""
 		if self.world is None or not self.world.inited:
 			return # don't draw while loading
-		minimap_point = self._world_to_minimap( tup, self._get_rotation_setting() )
+		# the base layer is calculated without rotation, see _get_rotated_points
+		minimap_point = self._world_to_minimap(tup, False)
 		world_to_minimap = self._world_to_minimap_ratio
 		# TODO: remove this remnant of the old implementation, perhaps by refactoring recalculate()
 		minimap_point = (
 		  minimap_point[0] + self.location.left,
 		  minimap_point[1] + self.location.top,
 		)
-		rect = Rect.init_from_topleft_and_size(minimap_point[0], minimap_point[1],
-								                           int(round(1/world_to_minimap[0])) + 1,
-								                           int(round(1/world_to_minimap[1])) + 1)
+		# the pixels show the coords at their center (see _calculate_pixels), which can be in the
+		# neighbouring pixel of the one the coords are rounded to
+		rect = Rect.init_from_topleft_and_size(minimap_point[0] - 1, minimap_point[1] - 1,
+		                                       int(round(1/world_to_minimap[0])) + 2,
+		                                       int(round(1/world_to_minimap[1])) + 2)
 		self._recalculate(rect)
 
 	def use_overlay_icon(self, icon):
@@ -456,90 +472,116 @@ class Minimap(object):
 
 		return True
 
-	def _recalculate(self, where=None, dump_data=False):
+	def _recalculate(self, where=None):
 		"""Calculate which pixel of the minimap should display what and draw it
-		@param where: Rect of minimap coords. Defaults to self.location
-		@param dump_data: Don't draw but return calculated data"""
-		self.minimap_image.set_drawing_enabled()
-
-		rt = self.minimap_image.rendertarget
-		render_name = self._get_render_name("base")
-
+		@param where: Rect of minimap coords. Defaults to self.location"""
+		width = self.location.width
 		if where is None:
-			where = self.location
-			rt.removeAll(render_name)
+			self.minimap_image.set_drawing_enabled()
+			self.minimap_image.rendertarget.removeAll(self._get_render_name("base"))
+			self._calculate_pixels(0, 0, width, self.location.height)
+			self._draw_pixels(xrange(len(self._pixels)))
+			return
+
+		left = max(where.left - self.location.left, 0)
+		top = max(where.top - self.location.top, 0)
+		right = min(where.left + where.width - self.location.left, width)
+		bottom = min(where.top + where.height - self.location.top, self.location.height)
+		old_pixels = self._pixels[:]
+		self._calculate_pixels(left, top, right, bottom)
+		# only draw pixels that changed, the old points of the base layer are drawn over
+		self._draw_pixels([y * width + x for y in xrange(top, bottom) for x in xrange(left, right)
+		                   if self._pixels[y * width + x] != old_pixels[y * width + x]],
+		                  draw_water=True)
+
+	def _calculate_pixels(self, left, top, right, bottom):
+		"""Updates the palette indices of the base layer in the area of minimap coords
+		(relative to the minimap origin) between left, top (inclusive) and right, bottom (exclusive).
+		Every pixel shows the map coord at the center of the area it covers."""
+		width = self.location.width
+		if self._pixels is None or len(self._pixels) != width * self.location.height:
+			self._pixels = bytearray(width * self.location.height)
 
 		# calculate which area of the real map is mapped to which pixel on the minimap
 		pixel_per_coord_x, pixel_per_coord_y = self._world_to_minimap_ratio
+		offset_x = self.world.min_x + int(pixel_per_coord_x / 2)
+		offset_y = self.world.min_y + int(pixel_per_coord_y / 2)
+		map_xs = [int(x * pixel_per_coord_x) + offset_x for x in xrange(left, right)]
 
-		# calculate values here so we don't have to do it in the loop
-		pixel_per_coord_x_half_as_int = int(pixel_per_coord_x/2)
-		pixel_per_coord_y_half_as_int = int(pixel_per_coord_y/2)
-
-		world_min_x = self.world.min_x
-		world_min_y = self.world.min_y
-		island_col = self.COLORS["island"]
-		water_col = self.COLORS["water"]
-		location_left = self.location.left
-		location_top = self.location.top
-		if dump_data:
-			data = []
-			draw_point = lambda name, fife_point, r, g, b : data.append( (fife_point.x, fife_point.y, r, g, b) )
-		else:
-			draw_point = rt.addPoint
-		fife_point = fife.Point(0, 0)
-
-		use_rotation = self._get_rotation_setting()
 		full_map = self.world.full_map
-
-		# loop through map coordinates, assuming (0, 0) is the origin of the minimap
-		# this faciliates calculating the real world coords
-		for x in xrange(where.left-self.location.left, where.left+where.width-self.location.left):
-			for y in xrange(where.top-self.location.top, where.top+where.height-self.location.top):
-
-				"""
-				This code should be here, but since python can't do inlining, we have to inline
-				ourselves for performance reasons
-				covered_area = Rect.init_from_topleft_and_size(
-				  int(x * pixel_per_coord_x)+world_min_x, \
-				  int(y * pixel_per_coord_y)+world_min_y), \
-				  int(pixel_per_coord_x), int(pixel_per_coord_y))
-				real_map_point = covered_area.center
-				"""
-				# use center of the rect that the pixel covers
-				real_map_x = int(x * pixel_per_coord_x) + world_min_x + pixel_per_coord_x_half_as_int
-				real_map_y = int(y * pixel_per_coord_y) + world_min_y + pixel_per_coord_y_half_as_int
-				real_map_coords = (real_map_x, real_map_y)
-
-				# check what's at the covered_area
-				if real_map_coords in full_map:
-					# this pixel is an island
-					tile = full_map[real_map_coords]
-					settlement = tile.settlement
-					if settlement is None:
-						# island without settlement
-						if tile.id <= 0:
-							color = water_col
-						else:
-							color = island_col
-					else:
-						# pixel belongs to a player
-						color = settlement.owner.color.to_tuple()
+		pixels = self._pixels
+		water_index, island_index = 0, 1
+		color_indices = {} # settlement -> palette index
+		for y in xrange(top, bottom):
+			map_y = int(y * pixel_per_coord_y) + offset_y
+			index = y * width + left
+			for map_x in map_xs:
+				tile = full_map.get((map_x, map_y))
+				if tile is None:
+					color_index = water_index
+				elif tile.settlement is None:
+					color_index = island_index if tile.id > 0 else water_index
 				else:
-					color = water_col
-
-				if use_rotation:
-					# inlined _get_rotated_coords
-					rot_x, rot_y = self._rotate( (location_left + x, location_top + y), self._rotations)
-					fife_point.set(rot_x - location_left, rot_y - location_top)
-				else:
-					fife_point.set(x, y)
-
-				draw_point(render_name, fife_point, *color)
-
-		if dump_data:
-			return json.dumps( data )
-
+					# pixel belongs to a player
+					settlement = tile.settlement
+					color_index = color_indices.get(settlement)
+					if color_index is None:
+						color_index = self._get_palette_index(settlement.owner.color.to_tuple())
+						color_indices[settlement] = color_index
+				pixels[index] = color_index
+				index += 1
+
+	def _get_palette_index(self, color):
+		index = self._palette_indices.get(color)
+		if index is None:
+			index = len(self._palette)
+			assert index < 256, "too many colors for the minimap"
+			self._palette.append(color)
+			self._palette_indices[color] = index
+		return index
+
+	def _draw_pixels(self, indices, draw_water=False):
+		"""Draws the pixels of the base layer with the given indices.
+		@param draw_water: whether to draw water pixels, usually they are covered by the background"""
+		self.minimap_image.set_drawing_enabled()
+		draw_point = self.minimap_image.rendertarget.addPoint
+		render_name = self._get_render_name("base")
+		points = self._get_rotated_points()
+		pixels = self._pixels
+		palette = self._palette
+		fife_point = fife.Point(0, 0)
+		for index in indices:
+			color_index = pixels[index]
+			if (color_index or draw_water) and points[index] is not None:
+				fife_point.set(*points[index])
+				r, g, b = palette[color_index]
+				draw_point(render_name, fife_point, r, g, b)
+
+	def _get_rotated_points(self):
+		"""Returns the point that every pixel of the base layer is drawn to with the current
+		rotation, as [(x, y) or None]. The result is cached for each rotation."""
+		rotation = self.rotation if self._get_rotation_setting() else None
+		points = self._rotated_points.get(rotation)
+		if points is None:
+			width, height = self.location.width, self.location.height
+			if rotation is None:
+				points = [(x, y) for y in xrange(height) for x in xrange(width)]
+			else:
+				location_left = self.location.left
+				location_top = self.location.top
+				points = [None] * (width * height)
+				used = set()
+				# pixels at the border can be rotated onto the same point, only the one that was
+				# drawn last in column order is kept
+				for x in xrange(width - 1, -1, -1):
+					for y in xrange(height - 1, -1, -1):
+						rot_x, rot_y = self._rotate((location_left + x, location_top + y), self._rotations)
+						point = (rot_x - location_left, rot_y - location_top)
+						if point not in used:
+							used.add(point)
+							points[y * width + x] = point
+			self._rotated_points[rotation] = points
+		return points
 
 	def _timed_update(self, force=False):
 		"""Regular updates for domains we can't or don't want to keep track of."""
@@ -641,14 +683,14 @@ class Minimap(object):
 		self.rotation -= 1
 		self.rotation %= 4
 		if self._get_rotation_setting():
-			self.draw()
+			self.draw(recalculate=False)
 
 	def rotate_left(self):
 		# see above
 		self.rotation += 1
 		self.rotation %= 4
 		if self._get_rotation_setting():
-			self.draw()
+			self.draw(recalculate=False)
 
 	## CALC UTILITY
 	def _world_to_minimap(self, coords, use_rotation):
@@ -671,7 +713,7 @@ class Minimap(object):
 	def _on_setting_changed(self, message):
 		if message.setting_name == "MinimapRotation":
 			self._rotation_setting = message.new_value
-			self.draw()
+			self.draw(recalculate=False)
 
 	_rotations = { 0 : 0,
 				         1 : 3 * math.pi / 2,
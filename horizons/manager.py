@@ -19,9 +19,13 @@
 # 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 # ###################################################
 
+import bisect
 import operator
 import logging
 import itertools
+import time
+
+from collections import defaultdict
 
 from horizons.timer import Timer
 from horizons.scheduler import Scheduler
@@ -88,7 +92,20 @@ class MPManager(LivingObject):
 		self._last_local_commands_send_tick = -1 # last tick, where local commands got sent
 
 	def end(self):
-		pass
+		if self.log.isEnabledFor(logging.DEBUG):
+			self.log_lag_statistics()
+
+	def get_lag_statistics(self):
+		"""Returns the lag statistics of the command packets, which determine whether the game can go on.
+		@see MPPacketmanager.get_lag_statistics"""
+		return self.commandsmanager.get_lag_statistics()
+
+	def log_lag_statistics(self):
+		buckets = ["<%dms" % (bound * 1000) for bound in MPPacketmanager.LAG_HISTOGRAM_BUCKETS]
+		buckets.append(">=%dms" % (MPPacketmanager.LAG_HISTOGRAM_BUCKETS[-1] * 1000))
+		self.log.debug("MPManager: lag of command packets per player: %s", ", ".join(buckets))
+		for player_id, (histogram, stalls) in sorted(self.get_lag_statistics().iteritems()):
+			self.log.debug("player %s: %s, stalled %s ticks", player_id, histogram, stalls)
 
 	def can_tick(self, tick):
 		"""Checks if we can execute this tick via return value"""
@@ -129,8 +146,12 @@ class MPManager(LivingObject):
 			if self.calculate_hash_tick(tick) % self.HASH_EVAL_DISTANCE == 0:
 				hash_value = self.session.world.get_checkup_hash()
 				#self.log.debug("MPManager: Checkup hash for tick %s is %s", tick, hash_value)
+				# in debug mode, send along what the hash consists of to be able to tell what diverged
+				details = None
+				if self.log.isEnabledFor(logging.DEBUG):
+					details = self.session.world.get_checkup_hash_details()
 				checkuphashpacket = CheckupHashPacket(self.calculate_hash_tick(tick),
-			                              self.session.world.player.worldid, hash_value)
+			                              self.session.world.player.worldid, hash_value, details)
 				self.checkuphashmanager.add_packet(checkuphashpacket)
 				self.log.debug("sending checkuphash for tick %d" % (checkuphashpacket.tick))
 				self.networkinterface.send_packet(checkuphashpacket)
@@ -179,19 +200,26 @@ class MPManager(LivingObject):
 				#self.log.debug("MPManager: Hash values are equal")
 				pass
 
-	def hash_value_diff(self, player1, hash1, player2, hash2):
+	def hash_value_diff(self, player1, packet1, player2, packet2):
 		"""Called when a divergence has been detected"""
-		self.log.error("MPManager: Hash diff:\n%s hash1: %s\n%s hash2: %s" % (player1, hash1, player2, hash2))
+		self.log.error("MPManager: Hash diff:\n%s hash1: %s\n%s hash2: %s" % (player1, packet1.checkup_hash, player2, packet2.checkup_hash))
 		self.log.error("------------------")
 		self.log.error("Differences:")
-		if len(hash1) != len(hash2):
-			self.log.error("Different length")
-		items1 = sorted(hash1.iteritems())
-		items2 = sorted(hash2.iteritems())
-		for i in xrange(min(len(hash1), len(hash2))):
-			if (items1[i] != items2[i]):
-				self.log.error(str(i)+": "+str(items1[i]))
-				self.log.error(str(i)+": "+str(items2[i]))
+		hash1, hash2 = packet1.checkup_hash, packet2.checkup_hash
+		for subsystem in sorted(set(hash1) | set(hash2)):
+			if hash1.get(subsystem) == hash2.get(subsystem):
+				continue
+			self.log.error("%s: %s != %s" % (subsystem, hash1.get(subsystem), hash2.get(subsystem)))
+			if packet1.details is None or packet2.details is None:
+				continue
+			# debug mode: find the objects that differ
+			objects1 = packet1.details.get(subsystem, {})
+			objects2 = packet2.details.get(subsystem, {})
+			for worldid in sorted(set(objects1) | set(objects2)):
+				if objects1.get(worldid) != objects2.get(worldid):
+					self.log.error("  worldid %s: %s != %s" % (worldid, objects1.get(worldid), objects2.get(worldid)))
+		if packet1.details is None or packet2.details is None:
+			self.log.error("Enable debug logging of the mpmanager module on all clients to see the diverging objects")
 		self.log.error("------------------")
 
 	def calculate_execution_tick(self, tick):
@@ -235,22 +263,42 @@ class MPManager(LivingObject):
 
 class MPPacketmanager(object):
 	log = logging.getLogger("mpmanager")
+	# upper bounds (in seconds) of the buckets of the lag histogram, the last bucket is unbounded
+	LAG_HISTOGRAM_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
 	def __init__(self, mpmanager):
 		self.mpmanager = mpmanager
-		self.command_packet_list = []
+		self._packets_by_tick = {} # tick: [packets in order of arrival]
+		self._first_arrival = {} # tick: time when the first packet for the tick arrived
+		self._stalled_ticks = set() # ticks that have been waited for
+		self._last_returned_tick = None # packets for this tick and earlier ones have been handed out
+		# player_id: number of packets per bucket of lag after the first packet of the same tick
+		self._lag_histograms = defaultdict(lambda: [0] * (len(self.LAG_HISTOGRAM_BUCKETS) + 1))
+		self._stalls = defaultdict(int) # player_id: number of stalled ticks that waited for the player
 
 	def is_tick_ready(self, tick):
 		"""Check if packets from all players have arrived (necessary for tick to begin)"""
-		ready = len(self.get_packets_for_tick(tick, remove_returned_commands=False)) == self.mpmanager.get_player_count()
+		ready = len(self._packets_by_tick.get(tick, ())) == self.mpmanager.get_player_count()
 		if not ready:
-			self.log.debug("tick not ready, packets: " + str(list(str(x) for x in self.get_packets_for_tick(tick, remove_returned_commands=False))))
+			self._stalled_ticks.add(tick)
+			if self.log.isEnabledFor(logging.DEBUG):
+				self.log.debug("tick not ready, packets: " + str(list(str(x) for x in self._packets_by_tick.get(tick, ()))))
 		return ready
 
 	def get_packets_for_tick(self, tick, remove_returned_commands=True):
 		"""Returns packets that are to be executed at a certain tick"""
-		command_packets = filter(lambda x: x.tick==tick, self.command_packet_list)
-		if remove_returned_commands:
-			self.command_packet_list = filter(lambda x: x.tick!=tick, self.command_packet_list)
+		if not remove_returned_commands:
+			return list(self._packets_by_tick.get(tick, ()))
+
+		command_packets = self._packets_by_tick.pop(tick, [])
+		self._first_arrival.pop(tick, None)
+		if tick in self._stalled_ticks:
+			self._stalled_ticks.remove(tick)
+			if command_packets:
+				# the packet that arrived last is the one the tick had to wait for
+				self._stalls[command_packets[-1].player_id] += 1
+		if self._last_returned_tick is None or tick > self._last_returned_tick:
+			self._last_returned_tick = tick
 		return command_packets
 
 	def get_packets_from_player(self, player_id):
@@ -258,11 +306,33 @@ class MPPacketmanager(object):
 		Returns all command this player has issued, that are not yet executed
 		@param player_id: worldid of player
 		"""
-		return filter(lambda x: x.player_id==player_id, self.command_packet_list)
+		return [packet for tick in sorted(self._packets_by_tick)
+		        for packet in self._packets_by_tick[tick] if packet.player_id == player_id]
 
 	def add_packet(self, command_packet):
 		"""Receive a packet"""
-		self.command_packet_list.append(command_packet)
+		tick = command_packet.tick
+		if self._last_returned_tick is not None and tick <= self._last_returned_tick:
+			# nobody would ever ask for it, don't let it take up memory
+			self.log.warning("dropping late packet for tick %s: %s", tick, command_packet)
+			return
+
+		now = time.time()
+		if tick not in self._packets_by_tick:
+			self._packets_by_tick[tick] = []
+			self._first_arrival[tick] = now
+		self._packets_by_tick[tick].append(command_packet)
+
+		lag = now - self._first_arrival[tick]
+		self._lag_histograms[command_packet.player_id][bisect.bisect_left(self.LAG_HISTOGRAM_BUCKETS, lag)] += 1
+
+	def get_lag_statistics(self):
+		"""Returns how long the packets of each player arrived after the first packet for
+		the same tick, and how often a tick had to wait for the player.
+		@return: {player_id: (histogram, stalls)}, where histogram contains the number of
+		         packets per bucket of LAG_HISTOGRAM_BUCKETS"""
+		return dict((player_id, (list(histogram), self._stalls[player_id]))
+		            for player_id, histogram in self._lag_histograms.iteritems())
 
 class MPCommandsManager(MPPacketmanager):
 	pass
@@ -287,9 +357,9 @@ class MPCheckupHashManager(MPPacketmanager):
 				if cb_diff is not None:
 					localplayerid = self.mpmanager.session.world.player.worldid
 					cb_diff("local" if pkges[0].player_id==localplayerid else "pl#%02d" % (pkges[0].player_id),
-						pkges[0].checkup_hash,
+						pkges[0],
 						"local" if pkg.player_id==localplayerid else "pl#%02d" % (pkg.player_id),
-						pkg.checkup_hash)
+						pkg)
 				return False
 		return True
 
@@ -328,8 +398,11 @@ class CommandPacket(MPPacket):
 MPPacket.allow_network(CommandPacket)
 
 class CheckupHashPacket(MPPacket):
-	def __init__(self, tick, player_id, checkup_hash):
+	"""Contains the checksum of the game state at a tick, see World.get_checkup_hash.
+	In debug mode, details contains the checksums it is made of (see World.get_checkup_hash_details)"""
+	def __init__(self, tick, player_id, checkup_hash, details=None):
 		super(CheckupHashPacket, self).__init__(tick, player_id)
 		self.checkup_hash = checkup_hash
+		self.details = details
 
 MPPacket.allow_network(CheckupHashPacket)
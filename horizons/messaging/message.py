@@ -32,6 +32,10 @@ class Message(object):
 	these will be stored on the instance.
 	"""
 	arguments = tuple()
+	# Set to True for frequent messages where receivers only need to know about the
+	# latest state: such messages from the same sender are delivered once at the end
+	# of the tick, combined by merge().
+	coalesce = False
 
 	def __init__(self, sender, *args):
 		self.sender = sender
@@ -42,6 +46,11 @@ class Message(object):
 		for arg, value in zip(self.arguments, args):
 			setattr(self, arg, value)
 
+	def merge(self, older):
+		"""Combines this message with an older one of the same type and sender, that hasn't
+		been delivered yet. Only used if `coalesce` is set. By default, the newer one wins."""
+		return self
+
 	@classmethod
 	def subscribe(cls, callback, sender=None):
 		"""Register a callback to be called whenever a message of this type is send.
@@ -136,6 +145,10 @@ class SettlerInhabitantsChanged(Message):
 	"""Class to signal that the number of inhabitants in a settler building
 	have changed."""
 	arguments = ('change', )
+	coalesce = True
+
+	def merge(self, older):
+		return SettlerInhabitantsChanged(self.sender, older.change + self.change)
 
 class ResourceBarResize(Message):
 	"""Signals a change in resource bar size (not slot changes, but number of slot changes)"""
@@ -200,11 +213,11 @@ class ResourceProduced(Message):
 
 class SettlementInventoryUpdated(Message):
 	"""Message sent whenever a settlement's inventory is updated"""
-	pass
+	coalesce = True
 
 class PlayerInventoryUpdated(Message):
 	"""Message sent whenever a player's inventory is updated"""
-	pass
+	coalesce = True
 
 class LanguageChanged(Message):
 	"""Sent when the language has changed."""
@@ -221,3 +234,7 @@ class SettingChanged(Message):
 class MineEmpty(Message):
 	"""Sent when there are no more resources left in a mine."""
 	arguments = ('mine', )
+
+class AutosaveFinished(Message):
+	"""Sent when an autosave that was written in the background is done."""
+	arguments = ('savegame', 'success', )
@@ -20,60 +20,110 @@
 # ###################################################
 
 import logging
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 
 from horizons.util.python.singleton import Singleton
 
 
 class MessageBus(object):
 	"""The MessageBus class is used to send Message instances from a sender to
-	one or multiple recipients."""
+	one or multiple recipients.
+
+	Receivers are stored per message type, a broadcast iterates over a tuple of the
+	callbacks that is only rebuilt when subscriptions change. Senders without local
+	receivers don't take up any memory.
+
+	Message types with `coalesce` set are not delivered right away during a game. Only one
+	message per type and sender is delivered at the end of the tick, see Message.coalesce.
+	"""
 	__metaclass__ = Singleton
-	
+
 	log = logging.getLogger("messaging.messagebus")
 
 	def __init__(self):
 		# Register {MessageType: [list of receiver callbacks]}
-		self.global_receivers = defaultdict(list)
+		self.global_receivers = {}
 		# Register for messages from a specific object
-		# {(MessageType, instance): [list of receiver callbacks]}
-		self.local_receivers = defaultdict(list)
+		# {MessageType: {instance: [list of receiver callbacks]}}
+		self.local_receivers = {}
+		# {MessageType: tuple of global receiver callbacks}, this is what broadcast iterates over
+		self._dispatch = {}
+		# {(MessageType, sender): message} of coalesced messages that haven't been delivered yet
+		self._pending = OrderedDict()
 
 	def subscribe_globally(self, messagetype, callback):
 		"""Register for a certain message type.
 		@param callback: Callback methode, needs to take 1 parameter: the message"""
-		self.global_receivers[messagetype].append(callback)
+		self.global_receivers.setdefault(messagetype, []).append(callback)
+		self._update_dispatch(messagetype)
 
 	def subscribe_locally(self, messagetype, instance, callback):
 		"""Register for a certain message type from a specific instance.
 		@param callback: Callback methode, needs to take 1 parameter: the message"""
-		pair = (messagetype, instance)
-		self.local_receivers[pair].append(callback)
+		self.local_receivers.setdefault(messagetype, {}).setdefault(instance, []).append(callback)
 
 	def unsubscribe_globally(self, messagetype, callback):
-		assert callback in self.global_receivers[messagetype]
+		assert callback in self.global_receivers.get(messagetype, [])
 		self.global_receivers[messagetype].remove(callback)
+		if not self.global_receivers[messagetype]:
+			del self.global_receivers[messagetype]
+		self._update_dispatch(messagetype)
 
 	def unsubscribe_locally(self, messagetype, instance, callback):
-		pair = (messagetype, instance)
-		assert callback in self.local_receivers[pair]
-		self.local_receivers[pair].remove(callback)
+		receivers = self.local_receivers.get(messagetype, {})
+		assert callback in receivers.get(instance, [])
+		receivers[instance].remove(callback)
+		# don't keep anything for senders that aren't listened to
+		if not receivers[instance]:
+			del receivers[instance]
+			if not receivers:
+				del self.local_receivers[messagetype]
 
 	def discard_globally(self, messagetype, callback):
-		if callback in self.global_receivers[messagetype]:
+		if callback in self.global_receivers.get(messagetype, []):
 			self.unsubscribe_globally(messagetype, callback)
 
+	def _update_dispatch(self, messagetype):
+		callbacks = self.global_receivers.get(messagetype)
+		if callbacks:
+			self._dispatch[messagetype] = tuple(callbacks)
+		else:
+			self._dispatch.pop(messagetype, None)
+
 	def broadcast(self, message):
 		"""Send a message to the bus and broadcast it to all recipients"""
+		if message.coalesce:
+			# imported here since the scheduler depends on modules that use messages
+			from horizons.scheduler import Scheduler
+			if Scheduler() is not None:
+				key = (message.__class__, message.sender)
+				if not self._pending:
+					Scheduler().add_new_object(self._deliver_pending, self, run_in=0)
+				older = self._pending.get(key)
+				self._pending[key] = message if older is None else message.merge(older)
+				return
+		self._deliver(message)
+
+	def _deliver(self, message):
 		messagetype = message.__class__
-		for callback in self.global_receivers[messagetype]:
+		for callback in self._dispatch.get(messagetype, ()):
 			# Execute the callback
 			callback(message)
 
-		pair = (messagetype, message.sender)
-		for callback in self.local_receivers[pair]:
-			# Execute the callback
-			callback(message)
+		receivers = self.local_receivers.get(messagetype)
+		if receivers:
+			callbacks = receivers.get(message.sender)
+			if callbacks:
+				for callback in tuple(callbacks):
+					# Execute the callback
+					callback(message)
+
+	def _deliver_pending(self):
+		"""Delivers the coalesced messages in the order they were first sent."""
+		pending = self._pending
+		self._pending = OrderedDict()
+		for message in pending.itervalues():
+			self._deliver(message)
 
 	def reset(self):
 		"""Reset to initial state. Drops all subscriptions"""
@@ -81,9 +131,10 @@ class MessageBus(object):
 		for messagetype, cb_list in self.global_receivers.iteritems():
 			if cb_list:
 				self.log.debug("MessageBus: leftover global receivers {cb} for {messagetype}".format(cb=[str(i) for i in cb_list], messagetype=messagetype))
-		for messagetype, cb_list in self.local_receivers.iteritems():
-			if cb_list:
-				self.log.debug("MessageBus: leftover local receivers {cb} for {messagetype}".format(cb=[str(i) for i in cb_list], messagetype=messagetype))
+		for messagetype, receivers in self.local_receivers.iteritems():
+			for cb_list in receivers.itervalues():
+				if cb_list:
+					self.log.debug("MessageBus: leftover local receivers {cb} for {messagetype}".format(cb=[str(i) for i in cb_list], messagetype=messagetype))
 
 		# suicide, next instance will be created on demand
 		self.__class__.destroy_instance()
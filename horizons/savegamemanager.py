@@ -30,8 +30,10 @@ import re
 import itertools
 
 from horizons.constants import PATHS, VERSION
+from horizons.extscheduler import ExtScheduler
 from horizons.util.dbreader import DbReader
 from horizons.util.yamlcache import YamlCache
+from horizons.util.yamlcachestorage import YamlCacheStorage
 from horizons.i18n import find_available_languages
 
 import horizons.globals
@@ -87,6 +89,11 @@ class SavegameManager(object):
 	savegame_metadata_types = {'timestamp': float, 'savecounter': int,
 	                           'savegamerev': int, 'rng_state': str}
 
+	# persistent index of the data shown in savegame and map listings, see _get_savegame_info
+	savegame_index = None
+	savegame_index_filename = os.path.join(PATHS.USER_DIR, 'savegames.cache')
+	savegame_index_sync_scheduled = False
+
 	@classmethod
 	def init(cls):
 		# create savegame directory if it does not exist
@@ -127,6 +134,7 @@ class SavegameManager(object):
 		               for p in dirs for f in glob.glob(p + '/*.' + filename_extension)
 		               if os.path.isfile(f))
 		files = zip(*files)[1] if files else []
+		cls._prune_savegame_index(dirs, files)
 		if include_displaynames:
 			return (files, cls.__get_displaynames(files))
 		else:
@@ -199,35 +207,89 @@ class SavegameManager(object):
 
 	@classmethod
 	def get_recommended_number_of_players(cls, savegamefile):
-		dbdata = DbReader(savegamefile)\
-		        ("SELECT value FROM properties WHERE name = ?", "players_recommended")
-		if dbdata:
-			return dbdata[0][0]
+		players_recommended = cls._get_savegame_info(savegamefile)['players_recommended']
+		if players_recommended is not None:
+			return players_recommended
 		else:
 			return "undefined"
 
+	@classmethod
+	def get_players_num(cls, savegamefile):
+		"""Returns the number of regular human and ai players"""
+		return cls._get_savegame_info(savegamefile)['players_num']
+
 	@classmethod
 	def get_metadata(cls, savegamefile):
 		"""Returns metainfo of a savegame as dict."""
-		metadata = cls.savegame_metadata.copy()
 		if isinstance(savegamefile, list):
-			return metadata
+			return cls.savegame_metadata.copy()
+		return cls._get_savegame_info(savegamefile)['metadata'].copy()
+
+	@classmethod
+	def _get_savegame_info(cls, savegamefile):
+		"""Returns all data about a savegame or map that is needed for listing it.
+
+		The files in the savegame and map directories are kept in a persistent index, so
+		they don't have to be opened again as long as their size and modification time
+		stay the same. Other files (e.g. temporary copies) are always read.
+		@return: dict, see _read_savegame_info"""
+		path = os.path.abspath(savegamefile)
+		if not any(os.path.dirname(path) == os.path.abspath(d) for d in cls._get_indexed_dirs()):
+			return cls._read_savegame_info(savegamefile)
+		try:
+			stat = os.stat(path)
+		except OSError:
+			return cls._read_savegame_info(savegamefile)
+
+		if cls.savegame_index is None:
+			cls.savegame_index = YamlCacheStorage.open(cls.savegame_index_filename)
+		manifest_entry = (stat.st_size, stat.st_mtime)
+		if cls.savegame_index.get_manifest_entry(path) == manifest_entry:
+			return cls.savegame_index[path]
+
+		info = cls._read_savegame_info(savegamefile)
+		cls.savegame_index.set(path, manifest_entry, info)
+		cls._schedule_savegame_index_sync()
+		return info
+
+	@classmethod
+	def _read_savegame_info(cls, savegamefile):
+		"""Reads the data for _get_savegame_info from the database.
+		@return: dict with the keys
+		         'metadata': like get_metadata,
+		         'players_recommended': value of the map property or None,
+		         'players_num': number of regular players or None"""
 		db = DbReader(savegamefile)
+		try:
+			info = {'metadata': cls._read_metadata(db)}
+			try:
+				dbdata = db("SELECT value FROM properties WHERE name = ?", "players_recommended")
+				info['players_recommended'] = dbdata[0][0] if dbdata else None
+			except sqlite3.OperationalError:
+				info['players_recommended'] = None
+			try:
+				info['players_num'] = db("SELECT count(rowid) FROM player WHERE is_trader = 0 AND is_pirate = 0")[0][0]
+			except sqlite3.OperationalError:
+				info['players_num'] = None
+		finally:
+			db.close()
+		return info
 
+	@classmethod
+	def _read_metadata(cls, db):
+		metadata = cls.savegame_metadata.copy()
 		try:
-			for key in metadata.iterkeys():
-				result = db("SELECT `value` FROM `metadata` WHERE `name` = ?", key)
-				if result:
-					assert len(result) == 1
-					metadata[key] = cls.savegame_metadata_types[key](result[0][0])
+			for key, value in db("SELECT `name`, `value` FROM `metadata`"):
+				if key in metadata:
+					metadata[key] = cls.savegame_metadata_types[key](value)
 		except sqlite3.OperationalError as e:
 			cls.log.warning('Warning: Cannot read savegame {file}: {exception}'
-			                ''.format(file=savegamefile, exception=e))
+			                ''.format(file=db.db_path, exception=e))
 			return metadata
 
 		screenshot_data = None
 		try:
-			screenshot_data = db("SELECT value FROM metadata_blob where name = ?", "screen")[0][0]
+			screenshot_data = str(db("SELECT value FROM metadata_blob where name = ?", "screen")[0][0])
 		except IndexError:
 			pass
 		except sqlite3.OperationalError:
@@ -236,6 +298,43 @@ class SavegameManager(object):
 
 		return metadata
 
+	@classmethod
+	def _get_indexed_dirs(cls):
+		return (cls.savegame_dir, cls.autosave_dir, cls.quicksave_dir, cls.multiplayersave_dir,
+		        cls.maps_dir, cls.scenario_maps_dir, PATHS.USER_MAPS_DIR)
+
+	@classmethod
+	def _prune_savegame_index(cls, dirs, files):
+		"""Removes the entries of files from dirs that don't exist any more from the index.
+		@param files: all files that are currently in dirs"""
+		if cls.savegame_index is None:
+			return
+		dirs = set(os.path.abspath(d) for d in dirs)
+		files = set(os.path.abspath(f) for f in files)
+		removed = False
+		for path in cls.savegame_index.keys():
+			if os.path.dirname(path) in dirs and path not in files:
+				cls.savegame_index.remove(path)
+				removed = True
+		if removed:
+			cls._schedule_savegame_index_sync()
+
+	@classmethod
+	def _schedule_savegame_index_sync(cls):
+		"""Write the index to disk soon, it's too slow to do it for every change."""
+		if cls.savegame_index_sync_scheduled:
+			return
+		if ExtScheduler() is None: # e.g. when used before the engine has been set up
+			cls.savegame_index.sync()
+			return
+		cls.savegame_index_sync_scheduled = True
+		ExtScheduler().add_new_object(cls._sync_savegame_index, cls, run_in=1)
+
+	@classmethod
+	def _sync_savegame_index(cls):
+		cls.savegame_index_sync_scheduled = False
+		cls.savegame_index.sync()
+
 	@classmethod
 	def _write_screenshot(cls, db):
 		# special handling for screenshot (as blob)
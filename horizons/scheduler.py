@@ -32,11 +32,12 @@ class Scheduler(LivingObject):
 	""""Class providing timed callbacks.
 	Master of time.
 
-	TODO:
-	- Refactor to use a data structure that is suitable for iteration (ticking) as well as
-	  searching/deleting by instance, possibly also by callback.
-	  Suggestion: { tick -> { instance -> [callback] }} (basically a k-d tree)
-
+	Calls are stored as { tick -> deque of handles } for ticking and indexed as
+	{ instance -> set of CallbackObjects } for searching/deleting by instance.
+	A handle is a [callback_obj, tick] list that is also referenced by the callback
+	object, so cancelling a call just clears its handle instead of searching the schedule.
+	Cleared handles are dropped when their tick runs or when they make up more than half
+	of their tick's deque, which keeps the execution order of the remaining calls intact.
 
 	@param timer: Timer instance the schedular registers itself with.
 	"""
@@ -47,6 +48,9 @@ class Scheduler(LivingObject):
 	# the tick with this id is actually executed, and no tick with a smaller number can occur
 	FIRST_TICK_ID = 0
 
+	# ticks with less handles than this are never compacted, they are cheap to skip anyway
+	COMPACT_MIN_LENGTH = 16
+
 	def __init__(self, timer):
 		"""
 		@param timer: Timer obj
@@ -55,6 +59,7 @@ class Scheduler(LivingObject):
 		self.schedule = {}
 		self.additional_cur_tick_schedule = [] # jobs to be executed at the same tick they were added
 		self.calls_by_instance = {} # for get_classinst_calls
+		self.cancelled_by_tick = {} # { tick -> number of cleared handles in its deque }
 		self.cur_tick = self.__class__.FIRST_TICK_ID-1 # before ticking
 		self.timer = timer
 		self.timer.add_call(self.tick)
@@ -62,6 +67,7 @@ class Scheduler(LivingObject):
 	def end(self):
 		self.log.debug("Scheduler end; len: %s", len(self.schedule))
 		self.schedule = None
+		self.cancelled_by_tick = None
 		self.timer.remove_call(self.tick)
 		self.timer = None
 		super(Scheduler, self).end()
@@ -80,34 +86,35 @@ class Scheduler(LivingObject):
 		if self.cur_tick in self.schedule:
 			self.log.debug("Scheduler: tick %s, cbs: %s", self.cur_tick, len(self.schedule[self.cur_tick]))
 
-			# use iteration method that works in case the list is altered during iteration
+			# use iteration method that works in case the deque is altered during iteration
 			# this can happen for e.g. rem_all_classinst_calls
 			cur_schedule = self.schedule[self.cur_tick]
 			while cur_schedule:
-				callback = cur_schedule.popleft()
+				handle = cur_schedule.popleft()
 				# TODO: some system-level unit tests fail if this list is not processed in the correct order
 				#       (i.e. if e.g. pop() was used here). This is an indication of invalid assumptions
 				#       in the program and should be fixed.
-
-				if hasattr(callback, "invalid"):
-					self.log.debug("S(t:%s): %s: INVALID", tick_id, callback)
+				callback = handle[0]
+				if callback is None: # cancelled
 					continue
+				callback.handles.remove(handle)
+
 				self.log.debug("S(t:%s): %s", tick_id, callback)
 				callback.callback()
 				assert callback.loops >= -1
+				calls = self.calls_by_instance.get(callback.class_instance)
 				if callback.loops != 0:
-					self.add_object(callback, readd=True)
-				else: # gone for good
-					if callback.class_instance in self.calls_by_instance:
-						# this can already be removed by e.g. rem_all_classinst_calls
-						if callback.finish_callback is not None:
-							callback.finish_callback()
-
-						try:
-							self.calls_by_instance[callback.class_instance].remove(callback)
-						except ValueError:
-							pass # also the callback can be deleted by e.g. rem_call
+					if calls is not None and callback in calls:
+						self.add_object(callback, readd=True)
+					# else: removed while it was executed, don't readd
+				elif calls is not None: # gone for good
+					# this can already be removed by e.g. rem_all_classinst_calls
+					if callback.finish_callback is not None:
+						callback.finish_callback()
+					# the finish callback might have removed it as well
+					self._unregister(callback)
 			del self.schedule[self.cur_tick]
+			self.cancelled_by_tick.pop(self.cur_tick, None)
 
 			self.log.debug("Scheduler: finished tick %s", self.cur_tick)
 
@@ -145,11 +152,13 @@ class Scheduler(LivingObject):
 			if not tick_key in self.schedule:
 				self.schedule[tick_key] = deque()
 			callback_obj.tick = tick_key
-			self.schedule[tick_key].append(callback_obj)
+			handle = [callback_obj, tick_key]
+			callback_obj.handles.append(handle)
+			self.schedule[tick_key].append(handle)
 			if not readd:  # readded calls haven't been removed here
 				if not callback_obj.class_instance in self.calls_by_instance:
-					self.calls_by_instance[callback_obj.class_instance] = []
-				self.calls_by_instance[callback_obj.class_instance].append( callback_obj )
+					self.calls_by_instance[callback_obj.class_instance] = set()
+				self.calls_by_instance[callback_obj.class_instance].add(callback_obj)
 
 	def add_new_object(self, callback, class_instance, run_in=1, loops=1, loop_interval=None, finish_callback=None):
 		"""Creates a new CallbackObject instance and calls the self.add_object() function.
@@ -161,6 +170,37 @@ class Scheduler(LivingObject):
 		callback_obj = _CallbackObject(self, callback, class_instance, run_in, loops, loop_interval, finish_callback=finish_callback)
 		self.add_object(callback_obj)
 
+	def _cancel(self, callback_obj):
+		"""Clears all pending handles of a CallbackObject in O(1) per handle.
+		@return: int, number of cancelled calls
+		"""
+		if self.schedule is None: # already ended
+			return 0
+		cancelled = 0
+		for handle in callback_obj.handles:
+			handle[0] = None
+			tick = handle[1]
+			count = self.cancelled_by_tick.get(tick, 0) + 1
+			calls = self.schedule[tick]
+			if count >= self.COMPACT_MIN_LENGTH and 2 * count > len(calls):
+				# more dead than alive handles, drop them (in place, the deque might be iterated)
+				alive = [h for h in calls if h[0] is not None]
+				calls.clear()
+				calls.extend(alive)
+				count = 0
+			self.cancelled_by_tick[tick] = count
+			cancelled += 1
+		callback_obj.handles = []
+		return cancelled
+
+	def _unregister(self, callback_obj):
+		"""Removes a CallbackObject from the instance index"""
+		calls = self.calls_by_instance.get(callback_obj.class_instance)
+		if calls is not None:
+			calls.discard(callback_obj)
+			if not calls:
+				del self.calls_by_instance[callback_obj.class_instance]
+
 	def rem_object(self, callback_obj):
 		"""Removes a CallbackObject from all callback lists
 		@param callback_obj: CallbackObject to remove
@@ -168,29 +208,17 @@ class Scheduler(LivingObject):
 		"""
 		removed_objs = 0
 		if self.schedule is not None:
-			for key in self.schedule:
-				while callback_obj in self.schedule[key]:
-					self.schedule[key].remove(callback_obj)
-					self.calls_by_instance[callback_obj.class_instance].remove(callback_obj)
-					removed_objs += 1
-
-		if not self.calls_by_instance[callback_obj.class_instance]:
-			del self.calls_by_instance[callback_obj.class_instance]
+			removed_objs = self._cancel(callback_obj)
+			if removed_objs:
+				self._unregister(callback_obj)
 
 		return removed_objs
 
 	def rem_all_classinst_calls(self, class_instance):
 		"""Removes all callbacks from the scheduler that belong to the class instance class_inst."""
-		"""
-		for key in self.schedule:
-			callback_objects = self.schedule[key]
-			for i in xrange(len(callback_objects) - 1, -1, -1):
-				if callback_objects[i].class_instance is class_instance:
-					del callback_objects[i]
-		"""
 		if class_instance in self.calls_by_instance:
 			for callback_obj in self.calls_by_instance[class_instance]:
-				callback_obj.invalid = True # don't remove, finding them all takes too long
+				self._cancel(callback_obj)
 			del self.calls_by_instance[class_instance]
 
 		# filter additional callbacks as well
@@ -206,30 +234,18 @@ class Scheduler(LivingObject):
 		"""
 		assert callable(callback)
 		removed_calls = 0
-		for key in self.schedule:
-			callback_objects = self.schedule[key]
-			for i in xrange(len(callback_objects) - 1, -1, -1):
-				if (callback_objects[i].class_instance is instance
-				    and callback_objects[i].callback == callback
-				    and not hasattr(callback_objects[i], "invalid")):
-					del callback_objects[i]
-					removed_calls += 1
-
-		test = 0
-		if removed_calls > 0: # there also must be calls in the calls_by_instance dict
-			for i in xrange(len(self.calls_by_instance[instance]) - 1, -1, -1):
-				obj = self.calls_by_instance[instance][i]
-				if obj.callback == callback:
-					del self.calls_by_instance[instance][i]
-					test += 1
-			assert test == removed_calls, "%s, %s" % (test, removed_calls)
-			if not self.calls_by_instance[instance]:
-				del self.calls_by_instance[instance]
+		if instance in self.calls_by_instance:
+			# calls that are currently being executed have no handles and are kept
+			matching = [callback_obj for callback_obj in self.calls_by_instance[instance]
+			            if callback_obj.callback == callback and callback_obj.handles]
+			for callback_obj in matching:
+				removed_calls += self._cancel(callback_obj)
+				self._unregister(callback_obj)
 
 		for i in xrange(len(self.additional_cur_tick_schedule) - 1, -1, -1):
 			if self.additional_cur_tick_schedule[i].class_instance is instance and \
 				self.additional_cur_tick_schedule[i].callback == callback:
-					del callback_objects[i]
+					del self.additional_cur_tick_schedule[i]
 					removed_calls += 1
 
 		return removed_calls
@@ -289,6 +305,7 @@ class _CallbackObject(object):
 		self.loops = loops
 		self.loop_interval = loop_interval if loop_interval is not None else run_in
 		self.class_instance = class_instance
+		self.handles = [] # pending [self, tick] entries in the scheduler
 
 	def __str__(self):
 		cb = str(self.callback)
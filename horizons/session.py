@@ -43,8 +43,8 @@ from horizons.world import World
 from horizons.entities import Entities
 from horizons.util.living import LivingObject, livingProperty
 from horizons.util.savegameaccessor import SavegameAccessor
+from horizons.util.savegamewriter import SavegameWriter
 from horizons.util.worldobject import WorldObject
-from horizons.util.uhdbaccessor import read_savegame_template
 from horizons.component.namedcomponent import NamedComponent
 from horizons.component.selectablecomponent import SelectableComponent, SelectableBuildingComponent
 from horizons.savegamemanager import SavegameManager
@@ -396,7 +396,7 @@ class Session(LivingObject):
 				os.unlink(savegame)
 			self.savecounter += 1
 
-			db = DbReader(savegame)
+			savegame_db = DbReader(savegame)
 		except IOError as e: # usually invalid filename
 			headline = _("Failed to create savegame file")
 			descr = _("There has been an error while creating your savegame file.")
@@ -412,30 +412,32 @@ class Session(LivingObject):
 			raise
 
 		try:
-			read_savegame_template(db)
-
-			db("BEGIN")
-			self.world.save(db)
-			#self.manager.save(db)
-			self.view.save(db)
-			self.ingame_gui.save(db)
-			self.scenario_eventhandler.save(db)
-
-			for instance in self.selected_instances:
-				db("INSERT INTO selected(`group`, id) VALUES(NULL, ?)", instance.worldid)
-			for group in xrange(len(self.selection_groups)):
-				for instance in self.selection_groups[group]:
-					db("INSERT INTO selected(`group`, id) VALUES(?, ?)", group, instance.worldid)
-
-			rng_state = json.dumps(self.random.getstate())
-			SavegameManager.write_metadata(db, self.savecounter, rng_state)
-			# make sure everything gets written now
-			db("COMMIT")
-			db.close()
+			self._save_snapshot().write(savegame_db)
+			savegame_db.close()
 			return True
 		except:
 			print "Save Exception"
 			traceback.print_exc()
-			db.close() # close db before delete
+			savegame_db.close() # close db before delete
 			os.unlink(savegame) # remove invalid savegamefile
 			return False
+
+	def _save_snapshot(self):
+		"""Collects everything that is saved. Has to be called between two ticks.
+		@return: SavegameWriter, that can write the savegame to a file at any later time"""
+		db = SavegameWriter()
+		self.world.save(db)
+		#self.manager.save(db)
+		self.view.save(db)
+		self.ingame_gui.save(db)
+		self.scenario_eventhandler.save(db)
+
+		for instance in self.selected_instances:
+			db("INSERT INTO selected(`group`, id) VALUES(NULL, ?)", instance.worldid)
+		for group in xrange(len(self.selection_groups)):
+			for instance in self.selection_groups[group]:
+				db("INSERT INTO selected(`group`, id) VALUES(?, ?)", group, instance.worldid)
+
+		rng_state = json.dumps(self.random.getstate())
+		SavegameManager.write_metadata(db, self.savecounter, rng_state)
+		return db
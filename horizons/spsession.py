@@ -19,17 +19,32 @@
 # 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 # ###################################################
 
+import os
 import random
+import threading
+import traceback
 
 from horizons.session import Session
 from horizons.manager import SPManager
 from horizons.constants import SINGLEPLAYER
+from horizons.extscheduler import ExtScheduler
+from horizons.messaging import AutosaveFinished
 from horizons.savegamemanager import SavegameManager
 from horizons.timer import Timer
+from horizons.util.dbreader import DbReader
 
 class SPSession(Session):
 	"""Session tailored for singleplayer games."""
 
+	# seconds between checks whether a background autosave is finished
+	AUTOSAVE_CHECK_INTERVAL = 0.2
+
+	def __init__(self, *args, **kwargs):
+		super(SPSession, self).__init__(*args, **kwargs)
+		self._autosave_thread = None
+		self._autosave_success = None
+		AutosaveFinished.subscribe(self._on_autosave_finished)
+
 	def create_manager(self):
 		return SPManager(self)
 
@@ -44,12 +59,68 @@ class SPSession(Session):
 		# single player games start right away
 		self.start()
 
+	def end(self):
+		if self._autosave_thread is not None:
+			# let the autosave finish, it doesn't access the game anymore
+			self._autosave_thread.join()
+			self._autosave_thread = None
+		super(SPSession, self).end()
+
 	def autosave(self):
-		"""Called automatically in an interval"""
+		"""Called automatically in an interval.
+		The game state is collected right away, the savegame file is written in the background.
+		AutosaveFinished is sent when it is done."""
 		self.log.debug("Session: autosaving")
-		success = self._do_save(SavegameManager.create_autosave_filename())
-		if success:
+		if self._autosave_thread is not None:
+			self.log.debug("Session: last autosave is still being written, skipping this one")
+			return
+
+		savegame = SavegameManager.create_autosave_filename()
+		self.savecounter += 1
+		try:
+			db = self._save_snapshot()
+		except:
+			print "Save Exception"
+			traceback.print_exc()
+			return
+		self._autosave_success = None
+		self._autosave_thread = threading.Thread(target=self._write_autosave, args=(db, savegame),
+		                                         name="autosave")
+		self._autosave_thread.daemon = True
+		self._autosave_thread.start()
+		ExtScheduler().add_new_object(lambda: self._check_autosave(savegame), self,
+		                              self.AUTOSAVE_CHECK_INTERVAL)
+
+	def _write_autosave(self, db, savegame):
+		"""Runs in the autosave thread, must not access the game."""
+		try:
+			if os.path.exists(savegame):
+				os.unlink(savegame)
+			savegame_db = DbReader(savegame)
+			try:
+				db.write(savegame_db)
+			finally:
+				savegame_db.close()
 			SavegameManager.delete_dispensable_savegames(autosaves=True)
+			self._autosave_success = True
+		except:
+			print "Save Exception"
+			traceback.print_exc()
+			if os.path.exists(savegame):
+				os.unlink(savegame) # remove invalid savegamefile
+			self._autosave_success = False
+
+	def _check_autosave(self, savegame):
+		if self._autosave_thread.is_alive():
+			ExtScheduler().add_new_object(lambda: self._check_autosave(savegame), self,
+			                              self.AUTOSAVE_CHECK_INTERVAL)
+			return
+		self._autosave_thread.join()
+		self._autosave_thread = None
+		AutosaveFinished.broadcast(self, savegame, self._autosave_success)
+
+	def _on_autosave_finished(self, message):
+		if message.success:
 			self.ingame_gui.message_widget.add(point=None, string_id='AUTOSAVE')
 
 	def quicksave(self):
@@ -115,3 +115,24 @@ class Timer(LivingObject):
 				# If a callback changed the speed to zero, we have to exit
 				return
 			self.tick_next_time = (self.tick_next_time or time.time()) + 1.0 / self.ticks_per_second
+
+	def run_ticks(self, count):
+		"""Runs up to count ticks back to back, ignoring the game speed and the wall clock.
+		This doesn't need the engine pump, it's used for headless simulations (tests, soak runs).
+		Stops early if a test callback wants to skip a tick or GAME.MAX_TICKS is reached.
+		@param count: number of ticks to run
+		@return: int, number of ticks that were actually run
+		"""
+		last_tick_id = self.tick_next_id + count
+		if GAME.MAX_TICKS is not None:
+			last_tick_id = min(last_tick_id, GAME.MAX_TICKS + 1)
+		ticks_run = 0
+		while self.tick_next_id < last_tick_id:
+			for f in self.tick_func_test:
+				if f(self.tick_next_id) == self.TEST_SKIP:
+					return ticks_run
+			for f in self.tick_func_call:
+				f(self.tick_next_id)
+			self.tick_next_id += 1
+			ticks_run += 1
+		return ticks_run
@@ -0,0 +1,313 @@
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+import logging
+from collections import deque
+from heapq import heappush, heappop
+
+from horizons.util.pathfinding.pathfinding import FindPath
+from horizons.util.shapes import Point
+
+
+class ClusterGraph(object):
+	"""Hierarchical (HPA*-style) pathfinding on top of a PathGrid, used for long ship routes.
+
+	The grid is divided into square clusters. Wherever water continues across the border of
+	two clusters, portal nodes are placed on both sides of the border and connected. Inside a
+	cluster, the portals are connected by their walking distance, which is computed lazily
+	the first time a search enters the cluster. A long path is then found by searching this
+	small graph of portals and afterwards refining the legs between consecutive portals
+	with the usual FindPath on the grid.
+
+	The graph describes the static water only. Blocking by ships (ship_map) is applied when
+	searching: portals that are occupied by a ship are skipped and the refined legs route
+	around ships. This way, ship movement never invalidates any cluster data. If static
+	walkability changes, invalidate() has to be called for the changed coords.
+
+	Each search is the same for every client, so this is safe to use in multiplayer.
+	"""
+	log = logging.getLogger("world.pathfinding")
+
+	CLUSTER_SIZE = 16
+	# run lengths along a cluster border that get one portal
+	PORTAL_SPACING = 8
+	# below this distance (in tiles), a plain search is cheap enough
+	MIN_DISTANCE = 48
+
+	NEIGHBOR_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+	def __init__(self, grid, bodies):
+		"""
+		@param grid: PathGrid to search on (e.g. World.water_grid)
+		@param bodies: dict { (x, y): body number } of the flood filled nodes, where
+		               tiles with the same number are connected (e.g. World.water_body)
+		"""
+		self.grid = grid
+		self.bodies = bodies
+		# the rect of the grid without the border
+		self.left = grid.left + 1
+		self.top = grid.top + 1
+		self.right = grid.left + grid.width - 2
+		self.bottom = grid.top + grid.height - 2
+
+		self.node_coords = [] # node id -> (x, y)
+		self.node_ids = {} # (x, y) -> node id
+		self.node_indices = {} # grid index -> node id
+		self.cluster_nodes = {} # cluster -> [node id, ...]
+		self.border_edges = {} # node id -> [(node id, cost), ...] to other clusters
+		self.inner_edges = {} # cluster -> { node id: [(node id, cost), ...] }, lazily calculated
+
+		self.expansions = 0 # nodes expanded by the last search, for profiling
+		self._create_portals()
+
+	def get_cluster(self, coords):
+		return ((coords[0] - self.left) // self.CLUSTER_SIZE, (coords[1] - self.top) // self.CLUSTER_SIZE)
+
+	def get_cluster_rect(self, cluster):
+		"""Returns (left, top, right, bottom) of a cluster."""
+		left = self.left + cluster[0] * self.CLUSTER_SIZE
+		top = self.top + cluster[1] * self.CLUSTER_SIZE
+		return (left, top, min(left + self.CLUSTER_SIZE - 1, self.right),
+		        min(top + self.CLUSTER_SIZE - 1, self.bottom))
+
+	def _is_walkable(self, coords):
+		index = self.grid.index(coords)
+		return index is not None and self.grid.walkable[index]
+
+	def _get_node(self, coords):
+		if coords not in self.node_ids:
+			node = len(self.node_coords)
+			self.node_coords.append(coords)
+			self.node_ids[coords] = node
+			self.node_indices[self.grid.index(coords)] = node
+			self.cluster_nodes.setdefault(self.get_cluster(coords), []).append(node)
+			self.border_edges[node] = []
+		return self.node_ids[coords]
+
+	def _create_portals(self):
+		clusters_x = (self.right - self.left) // self.CLUSTER_SIZE + 1
+		clusters_y = (self.bottom - self.top) // self.CLUSTER_SIZE + 1
+		for cx in xrange(clusters_x):
+			for cy in xrange(clusters_y):
+				left, top, right, bottom = self.get_cluster_rect((cx, cy))
+				if cx + 1 < clusters_x: # border to the cluster on the right
+					self._create_border_portals([((right, y), (right + 1, y)) for y in xrange(top, bottom + 1)])
+				if cy + 1 < clusters_y: # border to the cluster below
+					self._create_border_portals([((x, bottom), (x, bottom + 1)) for x in xrange(left, right + 1)])
+
+	def _create_border_portals(self, pairs):
+		"""Creates portals for the runs of walkable pairs of tiles along a border.
+		@param pairs: list of ((x, y), (x, y)) tuples, ordered along the border"""
+		run = []
+		for pair in pairs + [None]:
+			if pair is not None and self._is_walkable(pair[0]) and self._is_walkable(pair[1]):
+				run.append(pair)
+				continue
+			# place a portal in the middle of every piece of the run
+			pieces = (len(run) + self.PORTAL_SPACING - 1) // self.PORTAL_SPACING
+			for piece in xrange(pieces):
+				start = piece * len(run) // pieces
+				end = (piece + 1) * len(run) // pieces
+				inner, outer = run[(start + end) // 2]
+				inner_node = self._get_node(inner)
+				outer_node = self._get_node(outer)
+				self.border_edges[inner_node].append((outer_node, 1))
+				self.border_edges[outer_node].append((inner_node, 1))
+			run = []
+
+	def invalidate(self, coords):
+		"""Drops the distances inside the cluster of coords, use when the walkability of a tile
+		has changed. Portals are not moved, a closed portal makes searches fall back to FindPath."""
+		self.inner_edges.pop(self.get_cluster(coords), None)
+
+	def _get_cells(self, cluster):
+		"""Returns the set of grid indices of the walkable tiles of a cluster."""
+		left, top, right, bottom = self.get_cluster_rect(cluster)
+		index = self.grid.index
+		walkable = self.grid.walkable
+		cells = set()
+		for x in xrange(left, right + 1):
+			first = index((x, top))
+			for i in xrange(first, first + bottom - top + 1):
+				if walkable[i]:
+					cells.add(i)
+		return cells
+
+	def _get_distances(self, cluster, start_coords, cells=None):
+		"""Breadth first search inside a cluster.
+		@param start_coords: list of coord tuples the search starts from (distance 0)
+		@param cells: result of _get_cells(cluster), if it is already known
+		@return: dict { node id: distance } of the portals that have been reached"""
+		if cells is None:
+			cells = self._get_cells(cluster)
+		height = self.grid.height
+		offsets = (-height - 1, -height, -height + 1, -1, 1, height - 1, height, height + 1)
+		node_indices = self.node_indices
+		distances = {}
+		queue = deque(self.grid.index(coords) for coords in start_coords)
+		seen = dict.fromkeys(queue, 0)
+		while queue:
+			i = queue.popleft()
+			dist = seen[i]
+			if i in node_indices:
+				distances[node_indices[i]] = dist
+			for offset in offsets:
+				neighbor = i + offset
+				if neighbor in cells and neighbor not in seen:
+					seen[neighbor] = dist + 1
+					queue.append(neighbor)
+		return distances
+
+	def _get_inner_edges(self, cluster):
+		if cluster not in self.inner_edges:
+			edges = {}
+			cells = self._get_cells(cluster)
+			for node in self.cluster_nodes.get(cluster, []):
+				distances = self._get_distances(cluster, [self.node_coords[node]], cells)
+				edges[node] = sorted((other, dist) for other, dist in distances.iteritems() if other != node)
+			self.inner_edges[cluster] = edges
+		return self.inner_edges[cluster]
+
+	def find_path(self, source, destination, blocked_coords=None, make_target_walkable=False):
+		"""Finds a path for a unit that moves diagonally, same interface as FindPath.
+		Searches between distant points go through the cluster graph, the others (and
+		anything the graph can't handle) are passed on to FindPath.
+		@return: list of coords as tuples or None if no path is found"""
+		blocked_coords = blocked_coords or {}
+		fallback = lambda: FindPath()(source, destination, self.grid, blocked_coords,
+		                              diagonal=True, make_target_walkable=make_target_walkable)
+
+		source_shape = source.position if hasattr(source, 'position') else source
+		destination_shape = destination.position if hasattr(destination, 'position') else destination
+		source_coords = source_shape.get_coordinates()
+		if len(source_coords) != 1 or source_coords[0] not in self.bodies:
+			return fallback()
+		source_coords = source_coords[0]
+
+		target_coords = destination_shape.get_coordinates()
+		if not make_target_walkable:
+			target_coords = [coords for coords in target_coords if coords in self.grid.nodes]
+		if not target_coords or destination_shape.distance(source_coords) < self.MIN_DISTANCE:
+			return fallback()
+
+		# there is no path between different bodies of water
+		body = self.bodies[source_coords]
+		target_coords = [coords for coords in target_coords
+		                 if self.bodies.get(coords) == body and coords not in blocked_coords]
+		if not target_coords:
+			return None
+
+		portals = self._find_portals(source_coords, destination_shape, target_coords, blocked_coords)
+		if portals is None:
+			self.log.debug("ClusterGraph: no abstract path from %s to %s, using FindPath", source_coords, destination_shape)
+			return fallback()
+
+		# refine the legs between the portals
+		path = [source_coords]
+		for coords in portals:
+			if coords in blocked_coords:
+				return fallback()
+			last = path[-1]
+			if max(abs(last[0] - coords[0]), abs(last[1] - coords[1])) == 1:
+				path.append(coords)
+				continue
+			leg = FindPath()(Point(*last), Point(*coords), self.grid, blocked_coords, diagonal=True)
+			if leg is None:
+				return fallback()
+			path.extend(leg[1:])
+		leg = FindPath()(Point(*path[-1]), destination, self.grid, blocked_coords,
+		                 diagonal=True, make_target_walkable=make_target_walkable)
+		if leg is None:
+			return fallback()
+		path.extend(leg[1:])
+		return path
+
+	def _find_portals(self, source_coords, destination_shape, target_coords, blocked_coords):
+		"""A* on the portal graph.
+		@return: list of coords of the portals on the way, or None"""
+		goal = -1
+		source_cluster = self.get_cluster(source_coords)
+
+		# distances from the portals to the target
+		target_clusters = {}
+		for coords in target_coords:
+			target_clusters.setdefault(self.get_cluster(coords), []).append(coords)
+		goal_distances = {}
+		for cluster, coords_list in sorted(target_clusters.iteritems()):
+			for node, dist in self._get_distances(cluster, coords_list).iteritems():
+				goal_distances[node] = min(dist, goal_distances.get(node, dist))
+
+		distance_func = destination_shape.get_distance_function((0, 0))
+		def estimate(node):
+			# same estimation as in FindPath
+			return distance_func(destination_shape, self.node_coords[node])
+
+		heap = []
+		distances = {}
+		previous = {}
+		for node, dist in sorted(self._get_distances(source_cluster, [source_coords]).iteritems()):
+			if self.node_coords[node] not in blocked_coords:
+				distances[node] = dist
+				previous[node] = None
+				heappush(heap, (dist + estimate(node), node))
+
+		checked = set()
+		self.expansions = 0
+		while heap:
+			node = heappop(heap)[1]
+			if node in checked:
+				continue # outdated heap entry
+			if node == goal:
+				break
+			checked.add(node)
+			self.expansions += 1
+			dist = distances[node]
+
+			if node in goal_distances:
+				goal_dist = dist + goal_distances[node]
+				if goal_dist < distances.get(goal, goal_dist + 1):
+					distances[goal] = goal_dist
+					previous[goal] = node
+					heappush(heap, (goal_dist, goal))
+
+			cluster = self.get_cluster(self.node_coords[node])
+			for edges in (self.border_edges[node], self._get_inner_edges(cluster).get(node, [])):
+				for other, cost in edges:
+					if other in checked or self.node_coords[other] in blocked_coords:
+						continue
+					other_dist = dist + cost
+					if other_dist < distances.get(other, other_dist + 1):
+						distances[other] = other_dist
+						previous[other] = node
+						heappush(heap, (other_dist + estimate(other), other))
+		else:
+			return None
+
+		self.log.debug("ClusterGraph: path from %s to %s, %s nodes expanded",
+		               source_coords, destination_shape, self.expansions)
+		portals = []
+		node = previous[goal]
+		while node is not None:
+			portals.append(self.node_coords[node])
+			node = previous[node]
+		portals.reverse()
+		return portals
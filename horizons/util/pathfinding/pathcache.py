@@ -0,0 +1,84 @@
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+from collections import OrderedDict
+
+from horizons.util.shapes import Point, Rect
+
+
+class PathCache(object):
+	"""Bounded cache of pathfinding results, least recently used entries are dropped first.
+
+	Paths are only valid as long as the nodes they were searched on don't change. The owner
+	of the nodes has to call clear() on every change (see IslandPathNodes).
+	Cached paths are copied on the way out, since units modify their paths (e.g. end_move).
+	"""
+
+	def __init__(self, max_size=256):
+		self.max_size = max_size
+		self._paths = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	@classmethod
+	def get_key(cls, source, destination, *args):
+		"""Returns a key for a search from source to destination or None if it can't be cached.
+		@param source, destination: Rect, Point or BasicBuilding, as for FindPath
+		@param args: further hashable values the result depends on"""
+		source_key = cls._get_shape_key(source)
+		destination_key = cls._get_shape_key(destination)
+		if source_key is None or destination_key is None:
+			return None
+		return (source_key, destination_key) + args
+
+	@classmethod
+	def _get_shape_key(cls, obj):
+		# shapes are mutable, so only their current coordinates are used
+		shape = obj.position if hasattr(obj, 'position') else obj
+		if isinstance(shape, Point):
+			return ('point', shape.x, shape.y)
+		elif isinstance(shape, Rect):
+			return ('rect', shape.left, shape.top, shape.right, shape.bottom)
+		return None
+
+	def get(self, key):
+		"""Returns a copy of the cached path (None is a valid cached result) or raises KeyError"""
+		try:
+			path = self._paths.pop(key)
+		except KeyError:
+			self.misses += 1
+			raise
+		self._paths[key] = path # mark as most recently used
+		self.hits += 1
+		return None if path is None else list(path)
+
+	def add(self, key, path):
+		self._paths.pop(key, None)
+		self._paths[key] = None if path is None else tuple(path)
+		if len(self._paths) > self.max_size:
+			self._paths.popitem(last=False)
+
+	def clear(self):
+		self._paths.clear()
+
+	def __len__(self):
+		return len(self._paths)
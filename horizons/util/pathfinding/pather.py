@@ -26,6 +26,7 @@ from horizons.util.python import decorators
 from horizons.util.shapes import Point
 
 from horizons.util.pathfinding import PathBlockedError
+from horizons.util.pathfinding.pathcache import PathCache
 from horizons.util.pathfinding.pathfinding import FindPath
 
 """
@@ -38,6 +39,12 @@ class AbstractPather(object):
 	"""Abstract Interface for pathfinding for use by Unit.
 	Use only subclasses!"""
 	log = logging.getLogger("world.pathfinding")
+
+	# whether units can move along straight lines of steps without a call to get_next_step
+	# for every one of them (see get_straight_steps). Only possible if obstacles can't block
+	# the path, since they wouldn't be checked.
+	moves_in_legs = False
+
 	def __init__(self, unit, move_diagonal, session, make_target_walkable=True):
 		"""
 		@param unit: instance of unit, to which the pather belongs
@@ -71,6 +78,13 @@ class AbstractPather(object):
 		Return value type must be supported by FindPath"""
 		return []
 
+	def _find_path(self, source, destination):
+		"""Returns the best path from source to destination, see FindPath"""
+		# to use a different pathfinding code, just change the following line
+		return FindPath()(source, destination, self._get_path_nodes(),
+		                  self._get_blocked_coords(), self.move_diagonal,
+		                  self.make_target_walkable)
+
 	def _check_for_obstacles(self, point):
 		"""Check if the path is unexpectedly blocked by e.g. a unit
 		@param point: tuple: (x, y)
@@ -104,10 +118,7 @@ class AbstractPather(object):
 			source = self._get_position()
 
 		# call algorithm
-		# to use a different pathfinding code, just change the following line
-		path = FindPath()(source, destination, self._get_path_nodes(),
-		                  self._get_blocked_coords(), self.move_diagonal,
-		                  self.make_target_walkable)
+		path = self._find_path(source, destination)
 
 		if path is None:
 			return False
@@ -169,6 +180,36 @@ class AbstractPather(object):
 
 		return Point(*self.path[self.cur])
 
+	def get_straight_steps(self, source):
+		"""Returns the steps after the current one that continue the line from source to it.
+		Only steps that don't need get_next_step are returned, i.e. none if the path can be
+		blocked and none that change the visibility of the unit.
+		@param source: Point, position of the unit
+		@return: list of tuples"""
+		if not self.moves_in_legs or not self.path or self.cur is None:
+			return []
+		path = self.path
+		x, y = path[self.cur]
+		dx = x - source.x
+		dy = y - source.y
+		end = len(path)
+		if self.destination_in_building:
+			end -= 1 # the last step hides the unit
+		if self.source_in_building:
+			end = min(end, 2) # the unit is shown on the third step
+		steps = []
+		for i in xrange(self.cur + 1, end):
+			x += dx
+			y += dy
+			if path[i] != (x, y):
+				break
+			steps.append(path[i])
+		return steps
+
+	def skip_steps(self, count):
+		"""Moves on count steps without calling get_next_step for them"""
+		self.cur += count
+
 	def get_move_source(self):
 		"""Returns the source Point of the current movment.
 		@return: Point or Non if no path has been calculated"""
@@ -187,9 +228,8 @@ class AbstractPather(object):
 		# just save each step of the path
 		# current position is calculated on loading through unit position
 		if self.path:
-			for step in xrange(len(self.path)):
-				db("INSERT INTO unit_path(`unit`, `index`, `x`, `y`) VALUES(?, ?, ?, ?)",
-				    unitid, step, self.path[step][0], self.path[step][1])
+			db.execute_many("INSERT INTO unit_path(`unit`, `index`, `x`, `y`) VALUES(?, ?, ?, ?)",
+			                [(unitid, step, x, y) for step, (x, y) in enumerate(self.path)])
 
 	def load(self, db, worldid):
 		"""
@@ -215,25 +255,37 @@ class ShipPather(AbstractPather):
 		                                 *args, **kwargs)
 
 	def _get_path_nodes(self):
-		return self.session.world.water
+		return self.session.world.water_grid
 
 	def _get_blocked_coords(self):
 		return self.session.world.ship_map
 
+	def _find_path(self, source, destination):
+		# long routes are found via the cluster graph of the world's water
+		return self.session.world.water_clusters.find_path(source, destination,
+		                                                   self._get_blocked_coords(),
+		                                                   self.make_target_walkable)
+
 
 class FisherShipPather(ShipPather):
 	"""Can also drive through shallow water"""
 	def _get_path_nodes(self):
-		return self.session.world.water_and_coastline
+		return self.session.world.water_and_coastline_grid
 
 	def _get_blocked_coords(self):
 		# don't let fisher be blocked by other ships (#1023)
 		return []
 
+	def _find_path(self, source, destination):
+		# the cluster graph only covers deep water
+		return AbstractPather._find_path(self, source, destination)
+
 
 class BuildingCollectorPather(AbstractPather):
 	"""Pather for collectors, that move freely (without depending on roads)
 	within the radius of their home building such as farm animals."""
+	moves_in_legs = True
+
 	def __init__(self, unit, *args, **kwargs):
 		super(BuildingCollectorPather, self).__init__(unit, move_diagonal=True, *args, **kwargs)
 
@@ -244,12 +296,20 @@ class BuildingCollectorPather(AbstractPather):
 
 class RoadPather(AbstractPather):
 	"""Pather for collectors, that depend on roads (e.g. the one used for the warehouse)"""
+	moves_in_legs = True
+
 	def __init__(self, unit, *args, **kwargs):
 		super(RoadPather, self).__init__(unit, move_diagonal=False, *args, **kwargs)
 		self.island = self.session.world.get_island(unit.position)
 
 	def _get_path_nodes(self):
-		return self.island.path_nodes.road_nodes
+		return self.island.path_nodes.road_nodes_grid
+
+	def _find_path(self, source, destination):
+		if self.make_target_walkable:
+			# same search as the one of StaticPather, which is cached
+			return StaticPather.get_path_on_roads(self.island, source, destination)
+		return super(RoadPather, self)._find_path(source, destination)
 
 
 class SoldierPather(AbstractPather):
@@ -262,7 +322,7 @@ class SoldierPather(AbstractPather):
 	def _get_path_nodes(self):
 		# island might change (e.g. when transported via ship), so reload every time
 		island = self.session.world.get_island(self.unit.position)
-		return island.path_nodes.nodes
+		return island.path_nodes.nodes_grid
 
 	def _get_blocked_coords(self):
 		return self.session.world.ground_unit_map
@@ -291,7 +351,16 @@ class StaticPather(object):
 		@param island: island to search path on
 		@param source, destination: Point or anything supported by FindPath
 		@return: list of tuples or None in case no path is found"""
-		return FindPath()(source, destination, island.path_nodes.road_nodes)
+		path_nodes = island.path_nodes
+		key = PathCache.get_key(source, destination, path_nodes.road_network_version)
+		if key is None:
+			return FindPath()(source, destination, path_nodes.road_nodes_grid)
+		try:
+			return path_nodes.road_path_cache.get(key)
+		except KeyError:
+			path = FindPath()(source, destination, path_nodes.road_nodes_grid)
+			path_nodes.road_path_cache.add(key, path)
+			return path
 
 
 decorators.bind_all(AbstractPather)
@@ -20,8 +20,10 @@
 # ###################################################
 
 import logging
+from heapq import heappush, heappop
 
 from horizons.util.python import decorators
+from horizons.util.pathfinding.pathgrid import PathGrid
 
 """
 This file contains only the pathfinding algorithm. It is implemented in a callable class
@@ -42,7 +44,7 @@ class FindPath(object):
 		"""
 		@param source: Rect, Point or BasicBuilding
 		@param destination: Rect, Point or BasicBuilding
-		@param path_nodes: dict { (x, y) = speed_on_coords }  or list [(x, y), ..]
+		@param path_nodes: dict { (x, y) = speed_on_coords }, list [(x, y), ..] or PathGrid
 		@param blocked_coords: temporarily blocked coords (e.g. by a unit) as list or dict of tuples
 		@param diagonal: whether the unit is able to move diagonally
 		@param make_target_walkable: whether we force the tiles of the target to be walkable,
@@ -56,7 +58,7 @@ class FindPath(object):
 		#assert isinstance(source, (Rect, Point, BasicBuilding))
 		#assert isinstance(destination, (Rect, Point, BasicBuilding))
 		blocked_coords = blocked_coords or []
-		assert isinstance(path_nodes, (dict, list, set))
+		assert isinstance(path_nodes, (dict, list, set, PathGrid))
 		assert isinstance(blocked_coords, (dict, list, set))
 
 		# save args
@@ -117,6 +119,8 @@ class FindPath(object):
 	@decorators.make_constants()
 	def execute(self):
 		"""Executes algorithm"""
+		if isinstance(self.path_nodes, PathGrid):
+			return self.execute_on_grid()
 		# nodes are the keys of the following dicts (x, y)
 		# the val of the keys are: (previous node, distance to here,
 		# distance to here + estimated distance to target)
@@ -152,7 +156,6 @@ class FindPath(object):
 		if not dest_coords_set:
 			return None
 
-		from heapq import heappush, heappop
 		heap = []
 		for coords, data in to_check.iteritems():
 			heappush(heap, (data[2], coords))
@@ -251,3 +254,88 @@ class FindPath(object):
 
 		else:
 			return None
+
+	@decorators.make_constants()
+	def execute_on_grid(self):
+		"""Executes the algorithm on a PathGrid.
+		This visits the nodes in the same order and returns the same path as execute() does
+		on the nodes dict of the grid, but works on indices and the preallocated grid arrays.
+		Nodes keep the distance they have been reached with first, like in execute()."""
+		grid = self.path_nodes
+		destination = self.destination
+		destination_to_tuple_distance_func = destination.get_distance_function((0, 0))
+
+		source_coords = self.source.get_coordinates()
+		dest_coords = destination.get_coordinates()
+		if not self.make_target_walkable:
+			dest_coords = [coords for coords in dest_coords if coords in grid.nodes]
+		if not dest_coords:
+			return None
+
+		index = grid.index
+		source_indices = [index(coords) for coords in source_coords]
+		dest_indices = set(index(coords) for coords in dest_coords)
+		if None in source_indices or None in dest_indices:
+			# something outside of the grid is involved, fall back to the dict version
+			self.path_nodes = grid.nodes
+			return self.execute()
+
+		# source and destination are walkable even if they aren't path nodes
+		extra_indices = dest_indices.union(source_indices)
+		blocked_indices = set(index(coords) for coords in self.blocked_coords)
+
+		# pull dereferencing out of loop
+		speed = grid.speed
+		walkable = grid.walkable
+		distance = grid.distance
+		previous = grid.previous
+		state = grid.state
+		height = grid.height
+		left = grid.left
+		top = grid.top
+
+		reached = grid.new_search()
+		checked = reached + 1
+
+		heap = []
+		for i, coords in zip(source_indices, source_coords):
+			if state[i] == reached:
+				continue # duplicate source coords
+			state[i] = reached
+			distance[i] = 0
+			previous[i] = -1
+			heappush(heap, (destination_to_tuple_distance_func(destination, coords), i))
+
+		if self.diagonal:
+			offsets = (-height - 1, -height, -height + 1, -1, 1, height - 1, height, height + 1)
+		else:
+			offsets = (-height, height, -1, 1)
+
+		while heap:
+			cur = heappop(heap)[1]
+			dist_to_here = distance[cur] + speed[cur]
+
+			for offset in offsets:
+				neighbor = cur + offset
+				if state[neighbor] < reached and \
+				   (walkable[neighbor] or neighbor in extra_indices) and \
+				   neighbor not in blocked_indices:
+					state[neighbor] = reached
+					distance[neighbor] = dist_to_here
+					previous[neighbor] = cur
+					x, y = divmod(neighbor, height)
+					total_dist_estimation = destination_to_tuple_distance_func(destination, (x + left, y + top)) + dist_to_here
+					heappush(heap, (total_dist_estimation, neighbor))
+
+			state[cur] = checked
+
+			if cur in dest_indices:
+				path = []
+				while cur != -1:
+					x, y = divmod(cur, height)
+					path.append((x + left, y + top))
+					cur = previous[cur]
+				path.reverse()
+				return path
+
+		return None
@@ -0,0 +1,101 @@
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+from array import array
+
+
+class PathGrid(object):
+	"""Flat, integer indexed representation of a path nodes dict { (x, y): speed }.
+
+	The grid covers a fixed rectangle plus a border of one tile that is never walkable,
+	so neighbors can be computed by index arithmetic without bounds checks.
+	A coord is stored at index (x - left + 1) * height + (y - top + 1); this preserves the
+	order of coordinate tuples, which is what FindPath uses to break ties.
+
+	The arrays used by the search (distance, previous node, node state) are allocated once
+	and reused by every search on the grid. Instead of clearing them, each search gets a new
+	stamp, entries with an older stamp are considered to be unset.
+
+	Owners of the nodes dict have to keep the grid up to date via add_node/remove_node.
+	"""
+
+	def __init__(self, nodes, rect):
+		"""
+		@param nodes: dict { (x, y): speed }, usually a PathNodes dict or World.water
+		@param rect: Rect that contains all coords that will ever be added to the grid
+		"""
+		self.nodes = nodes
+		self.left = rect.left - 1
+		self.top = rect.top - 1
+		self.width = rect.width + 2
+		self.height = rect.height + 2
+		size = self.width * self.height
+
+		self.speed = array('d', [0.0]) * size
+		self.walkable = bytearray(size)
+
+		# search data, see new_search()
+		self.distance = array('d', [0.0]) * size
+		self.previous = array('l', [-1]) * size
+		self.state = array('l', [0]) * size
+		self.stamp = 0
+
+		for coords, speed in nodes.iteritems():
+			self.add_node(coords, speed)
+
+	def index(self, coords):
+		"""Returns the index of the coord tuple, or None if it is not inside the grid rect."""
+		x = coords[0] - self.left
+		y = coords[1] - self.top
+		if 0 < x < self.width - 1 and 0 < y < self.height - 1:
+			return x * self.height + y
+		return None
+
+	def coords(self, index):
+		"""Returns the coord tuple of an index."""
+		x, y = divmod(index, self.height)
+		return (x + self.left, y + self.top)
+
+	def add_node(self, coords, speed):
+		index = self.index(coords)
+		assert index is not None, "%s is not inside the path grid" % (coords, )
+		self.speed[index] = speed
+		self.walkable[index] = 1
+
+	def remove_node(self, coords):
+		index = self.index(coords)
+		if index is not None:
+			self.speed[index] = 0.0
+			self.walkable[index] = 0
+
+	def __contains__(self, coords):
+		return coords in self.nodes
+
+	def new_search(self):
+		"""Starts a new search on the shared arrays.
+		@return: int stamp: state[i] == stamp means node i has been reached in this search,
+		         state[i] == stamp + 1 means it has been checked completely."""
+		self.stamp += 2
+		if self.stamp >= 2**31 - 2: # keep it small enough for every platform
+			self.state = array('l', [0]) * len(self.state)
+			self.stamp = 2
+		return self.stamp
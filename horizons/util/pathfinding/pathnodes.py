@@ -21,6 +21,9 @@
 
 import logging
 
+from horizons.util.pathfinding.pathcache import PathCache
+from horizons.util.pathfinding.pathgrid import PathGrid
+
 class PathNodes(object):
 	"""
 	Abstract class; used to derive list of path nodes from, which is used for pathfinding.
@@ -55,6 +58,8 @@ class IslandPathNodes(PathNodes):
 	Interface:
 	self.nodes: List of nodes on island, where the terrain allows to be walked on
 	self.road_nodes: dictionary of nodes, where a road is built on
+	self.nodes_grid, self.road_nodes_grid: PathGrids of the above, for faster pathfinding
+	self.road_path_cache: PathCache of paths on road_nodes, valid for road_network_version
 
 	(un)register_road has to be called for each coord, where a road is built on (destroyed)
 	reset_tile_walkablity has to be called when the terrain changes the walkability
@@ -77,13 +82,28 @@ class IslandPathNodes(PathNodes):
 		# nodes where a real road is built on.
 		self.road_nodes = {}
 
+		self.nodes_grid = PathGrid(self.nodes, island.position)
+		self.road_nodes_grid = PathGrid(self.road_nodes, island.position)
+
+		# results of searches on road_nodes, since lots of collectors walk the same routes
+		self.road_path_cache = PathCache()
+		self.road_network_version = 0
+
+	def _road_network_changed(self):
+		self.road_network_version += 1
+		self.road_path_cache.clear()
+
 	def register_road(self, road):
 		for i in road.position:
 			self.road_nodes[ (i.x, i.y) ] = self.NODE_DEFAULT_SPEED
+			self.road_nodes_grid.add_node((i.x, i.y), self.NODE_DEFAULT_SPEED)
+		self._road_network_changed()
 
 	def unregister_road(self, road):
 		for i in road.position:
 			del self.road_nodes[ (i.x, i.y) ]
+			self.road_nodes_grid.remove_node((i.x, i.y))
+		self._road_network_changed()
 
 	def is_road(self, x, y):
 		"""Return if there is a road on (x, y)"""
@@ -122,5 +142,9 @@ class IslandPathNodes(PathNodes):
 		in_list = (coord in self.nodes)
 		if not in_list and actually_walkable:
 			self.nodes[coord] = self.NODE_DEFAULT_SPEED
+			self.nodes_grid.add_node(coord, self.NODE_DEFAULT_SPEED)
 		if in_list and not actually_walkable:
 			del self.nodes[coord]
+			self.nodes_grid.remove_node(coord)
+		if in_list != actually_walkable:
+			self._road_network_changed()
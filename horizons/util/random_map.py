@@ -20,14 +20,19 @@
 # ###################################################
 
 import hashlib
+import logging
+import multiprocessing
 import random
 import re
 import string
 import copy
 
+from horizons.util.randomislandcache import RandomIslandCache
 from horizons.util.shapes import Circle, Point, Rect
 from horizons.constants import GROUND
 
+log = logging.getLogger("util.random_map")
+
 # this is how a random island id looks like (used for creation)
 _random_island_id_template = "random:${creation_method}:${width}:${height}:${seed}:${island_x}:${island_y}"
 
@@ -35,11 +40,54 @@ _random_island_id_template = "random:${creation_method}:${width}:${height}:${see
 _random_island_id_regexp = r"^random:([0-9]+):([0-9]+):([0-9]+):([\-]?[0-9]+):([\-]?[0-9]+):([\-]?[0-9]+)$"
 
 
-def create_random_island(map_db, island_id, id_string):
-	"""Creates a random island as sqlite db.
+def create_random_islands(map_db, id_strings):
+	"""Creates the ground of random islands in a map db.
+	The islands are taken from the RandomIslandCache if possible, the missing ones are
+	generated in parallel.
+	@param id_strings: random island id strings, the island ids are their indices
+	"""
+	tiles = [RandomIslandCache.get(id_string) for id_string in id_strings]
+	missing = [i for i, island_tiles in enumerate(tiles) if island_tiles is None]
+	if missing:
+		generated = _generate_random_islands([id_strings[i] for i in missing])
+		for i, island_tiles in zip(missing, generated):
+			tiles[i] = island_tiles
+			RandomIslandCache.set(id_strings[i], island_tiles)
+		RandomIslandCache.prune()
+
+	map_db("BEGIN TRANSACTION")
+	for island_id, island_tiles in enumerate(tiles):
+		map_db.execute_many("INSERT INTO ground VALUES(?, ?, ?, ?, ?, ?)",
+		                    ((island_id, ) + tile for tile in island_tiles))
+	map_db("COMMIT")
+
+def _generate_random_islands(id_strings):
+	"""Generates the tiles of the islands, using a process per island if possible.
+	@return: list of the results of _generate_random_island"""
+	try:
+		processes = min(len(id_strings), multiprocessing.cpu_count())
+	except NotImplementedError:
+		processes = 1
+	if processes > 1:
+		try:
+			pool = multiprocessing.Pool(processes)
+		except (ImportError, OSError) as e:
+			log.warning("Can't generate the islands in parallel: %s", e)
+		else:
+			try:
+				return pool.map(_generate_random_island, id_strings, chunksize=1)
+			finally:
+				pool.close()
+				pool.join()
+	return [_generate_random_island(id_string) for id_string in id_strings]
+
+def _generate_random_island(id_string):
+	"""Generates the ground tiles of a random island.
 	It is rather primitive; it places shapes on the dict.
-	The coordinates of tiles will be 0 <= x < width and 0 <= y < height
+	Relative to the position of the island, the coordinates of tiles will be
+	0 <= x < width and 0 <= y < height.
 	@param id_string: random island id string
+	@return: list of (x, y, ground_id, action_id, rotation) in map coordinates
 	"""
 	match_obj = re.match(_random_island_id_regexp, id_string)
 	assert match_obj
@@ -88,12 +136,10 @@ def create_random_island(map_db, island_id, id_string):
 				elif shape_coord in map_set:
 					map_set.discard(shape_coord)
 
-	# write values to db
-	map_db("BEGIN TRANSACTION")
-
 	# add grass tiles
+	tiles = []
 	for x, y in map_set:
-		map_db("INSERT INTO ground VALUES(?, ?, ?, ?, ?, ?)", island_id, island_x + x, island_y + y, *GROUND.DEFAULT_LAND)
+		tiles.append((island_x + x, island_y + y) + GROUND.DEFAULT_LAND)
 
 	def fill_tiny_spaces(tile):
 		"""Fills 1 tile gulfs and straits with the specified tile
@@ -181,7 +227,7 @@ def create_random_island(map_db, island_id, id_string):
 			if to_fill:
 				for x, y in to_fill:
 					map_set.add((x, y))
-					map_db("INSERT INTO ground VALUES(?, ?, ?, ?, ?, ?)", island_id, island_x + x, island_y + y, *tile)
+					tiles.append((island_x + x, island_y + y) + tile)
 
 				old_size = len(edge_set)
 				edge_set = edge_set.difference(to_ignore).union(to_fill)
@@ -264,7 +310,7 @@ def create_random_island(map_db, island_id, id_string):
 				tile = GROUND.SAND_SOUTHEAST3
 
 		assert tile
-		map_db("INSERT INTO ground VALUES(?, ?, ?, ?, ?, ?)", island_id, island_x + x, island_y + y, *tile)
+		tiles.append((island_x + x, island_y + y) + tile)
 	map_set = map_set.union(outline)
 
 	# add sand to shallow water tiles
@@ -318,7 +364,7 @@ def create_random_island(map_db, island_id, id_string):
 				tile = GROUND.COAST_SOUTHEAST3
 
 		assert tile
-		map_db("INSERT INTO ground VALUES(?, ?, ?, ?, ?, ?)", island_id, island_x + x, island_y + y, *tile)
+		tiles.append((island_x + x, island_y + y) + tile)
 	map_set = map_set.union(outline)
 
 	# add shallow water to deep water tiles
@@ -372,9 +418,9 @@ def create_random_island(map_db, island_id, id_string):
 				tile = GROUND.DEEP_WATER_SOUTHEAST3
 
 		assert tile
-		map_db("INSERT INTO ground VALUES(?, ?, ?, ?, ?, ?)", island_id, island_x + x, island_y + y, *tile)
+		tiles.append((island_x + x, island_y + y) + tile)
 
-	map_db("COMMIT")
+	return tiles
 
 def _simplify_seed(seed):
 	"""
@@ -0,0 +1,106 @@
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import glob
+import hashlib
+import logging
+import os
+import tempfile
+import zlib
+
+try:
+	import cPickle as pickle
+except:
+	import pickle
+
+from horizons.constants import PATHS
+
+
+class RandomIslandCache(object):
+	"""
+	Persistent cache of the ground tiles of random islands.
+
+	The tiles of a random island only depend on its id string, so every island is stored
+	in its own file that is named after the hash of the id string. When there are more
+	than MAX_ISLANDS files, the ones that haven't been used for the longest time are
+	removed. Errors are only logged, the islands are generated again in that case.
+	"""
+
+	log = logging.getLogger("util.randomislandcache")
+
+	# Increment this when the islands generated from an id string change.
+	VERSION = 1
+
+	MAX_ISLANDS = 500
+
+	directory = os.path.join(PATHS.USER_DIR, 'random_islands')
+
+	@classmethod
+	def _get_filename(cls, id_string):
+		return os.path.join(cls.directory, hashlib.sha1(str(id_string)).hexdigest() + '.cache')
+
+	@classmethod
+	def get(cls, id_string):
+		"""Returns the tiles of the island or None if it isn't in the cache."""
+		filename = cls._get_filename(id_string)
+		if not os.path.exists(filename):
+			return None
+		try:
+			with open(filename, 'rb') as f:
+				version, cached_id_string, tiles = pickle.loads(zlib.decompress(f.read()))
+			os.utime(filename, None) # mark it as recently used
+		except Exception as e:
+			cls.log.warning("Can't read cached island %s: %s", filename, e)
+			return None
+		if version != cls.VERSION or cached_id_string != id_string:
+			return None
+		return tiles
+
+	@classmethod
+	def set(cls, id_string, tiles):
+		"""Stores the tiles of the island, see random_map._generate_random_island"""
+		filename = cls._get_filename(id_string)
+		data = zlib.compress(pickle.dumps((cls.VERSION, id_string, tiles), pickle.HIGHEST_PROTOCOL))
+		try:
+			if not os.path.isdir(cls.directory):
+				os.makedirs(cls.directory)
+			# write to a temporary file first, so no other process sees a partial file
+			handle, temp_filename = tempfile.mkstemp(dir=cls.directory)
+			with os.fdopen(handle, 'wb') as f:
+				f.write(data)
+			if os.path.exists(filename):
+				os.remove(filename) # os.rename doesn't replace files on windows
+			os.rename(temp_filename, filename)
+		except (IOError, OSError) as e:
+			cls.log.warning("Can't write cached island %s: %s", filename, e)
+
+	@classmethod
+	def prune(cls):
+		"""Removes the least recently used islands until at most MAX_ISLANDS are left."""
+		try:
+			files = [(os.path.getmtime(f), f) for f in glob.glob(os.path.join(cls.directory, '*.cache'))]
+			if len(files) <= cls.MAX_ISLANDS:
+				return
+			files.sort()
+			for _, filename in files[:len(files) - cls.MAX_ISLANDS]:
+				os.remove(filename)
+		except OSError as e:
+			cls.log.warning("Can't prune the island cache: %s", e)
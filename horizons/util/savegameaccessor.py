@@ -30,7 +30,7 @@ from horizons.constants import MAP, PATHS
 from horizons.savegamemanager import SavegameManager
 from horizons.util.dbreader import DbReader
 from horizons.util.python import decorators
-from horizons.util.random_map import create_random_island
+from horizons.util.random_map import create_random_islands
 from horizons.util.savegameupgrader import SavegameUpgrader
 
 class SavegameAccessor(DbReader):
@@ -38,9 +38,31 @@ class SavegameAccessor(DbReader):
 	SavegameAccessor is the class used for loading saved games.
 
 	Frequent select queries are preloaded for faster access.
+	In lazy mode (default), every table is only preloaded when it is accessed first and
+	it is read in chunks. Tables whose rows are looked up by rowid aren't preloaded at all.
+	Data that isn't needed anymore can be dropped with release().
 	"""
 
-	def __init__(self, game_identifier, is_map, options=None):
+	# tables that are looked up by rowid: name -> query of rowid and the other columns
+	ROWID_TABLES = {
+		'building': "SELECT rowid, x, y, location, rotation, level FROM building",
+		'settlement': "SELECT rowid, owner, island FROM settlement",
+		'wildanimal': "SELECT rowid, health, can_reproduce FROM wildanimal",
+		'unit': "SELECT rowid, owner FROM unit",
+		'building_collector': "SELECT rowid, home_building, creation_tick FROM building_collector",
+		'fish_data': "SELECT rowid, last_usage_tick FROM fish_data",
+	}
+	# other tables, they are loaded by _load_<name>
+	PRELOADED = ['concrete_object', 'production', 'production_state_history', 'storage',
+	             'building_collector_job_history', 'production_line', 'unit_path',
+	             'storage_global_limit', 'health']
+	# number of rows that are fetched at once when preloading
+	CHUNK_SIZE = 1024
+
+	def __init__(self, game_identifier, is_map, options=None, lazy=True):
+		"""
+		@param lazy: whether to load tables on demand, see class docstring
+		"""
 		is_random_map = False
 		if is_map:
 			self.upgrader = None
@@ -80,8 +102,7 @@ class SavegameAccessor(DbReader):
 			random_map_db = DbReader(self._temp_path2)
 			with open('content/map-template.sql') as map_template:
 				random_map_db.execute_script(map_template.read())
-			for island_id, island_string in enumerate(random_island_sequence):
-				create_random_island(random_map_db, island_id, island_string)
+			create_random_islands(random_map_db, random_island_sequence)
 			random_map_db.close()
 			self._map_path = self._temp_path2
 
@@ -103,22 +124,15 @@ class SavegameAccessor(DbReader):
 		map_padding = self("SELECT value FROM map_properties WHERE name = 'padding'")
 		self.map_padding = int(map_padding[0][0]) if map_padding else MAP.PADDING
 
-		self._load_building()
-		self._load_settlement()
-		self._load_concrete_object()
-		self._load_production()
-		self._load_storage()
-		self._load_wildanimal()
-		self._load_unit()
-		self._load_building_collector()
-		self._load_production_line()
-		self._load_unit_path()
-		self._load_storage_global_limit()
-		self._load_health()
-		self._load_fish_data()
+		self._lazy = lazy
+		self._preloaded = {} # name -> data, see _get_preloaded
+		if not lazy:
+			for name in self.ROWID_TABLES.keys() + self.PRELOADED:
+				self._get_preloaded(name)
 		self._hash = None
 
 	def close(self):
+		self.release()
 		super(SavegameAccessor, self).close()
 		if self.upgrader is not None:
 			self.upgrader.close()
@@ -127,188 +141,221 @@ class SavegameAccessor(DbReader):
 		if hasattr(self, '_temp_path2'):
 			os.unlink(self._temp_path2)
 
-	def _load_building(self):
-		self._building = {}
-		for row in self("SELECT rowid, x, y, location, rotation, level FROM building"):
-			self._building[int(row[0])] = row[1:]
+	def release(self, *names):
+		"""Drops preloaded data that isn't needed anymore, e.g. after all buildings are loaded.
+		The data would be loaded again if it is accessed later.
+		@param names: names of the preloaded data (see _load_*), all of it if not specified"""
+		for name in names or self._preloaded.keys():
+			self._preloaded.pop(name, None)
+
+	def _get_preloaded(self, name):
+		"""Returns the data of a table as loaded by _load_<name>, loads it on first access."""
+		try:
+			return self._preloaded[name]
+		except KeyError:
+			if name in self.ROWID_TABLES:
+				data = self._load_rowid_table(name)
+			else:
+				data = getattr(self, '_load_' + name)()
+			self._preloaded[name] = data
+			return data
+
+	def _select_chunked(self, command, *args):
+		"""Iterates over the result of a SELECT, only CHUNK_SIZE rows are held in memory at once."""
+		cur = self.connection.cursor()
+		try:
+			cur.execute(command, args)
+			rows = cur.fetchmany(self.CHUNK_SIZE)
+			while rows:
+				for row in rows:
+					yield row
+				rows = cur.fetchmany(self.CHUNK_SIZE)
+		finally:
+			cur.close()
+
+	def _load_rowid_table(self, name):
+		return dict((int(row[0]), row[1:]) for row in self._select_chunked(self.ROWID_TABLES[name]))
+
+	def _get_row(self, name, worldid, default=KeyError):
+		"""Returns the columns of ROWID_TABLES[name] (without rowid) for the row worldid.
+		In lazy mode, the row is looked up directly, since rowid lookups are indexed anyway.
+		@param default: returned if the row doesn't exist, KeyError is raised if not specified"""
+		worldid = int(worldid)
+		if self._lazy:
+			rows = self(self.ROWID_TABLES[name] + " WHERE rowid = ?", worldid)
+			row = rows[0][1:] if rows else None
+		else:
+			row = self._get_preloaded(name).get(worldid)
+		if row is None:
+			if default is KeyError:
+				raise KeyError(worldid)
+			return default
+		return row
+
 
 	def get_building_row(self, worldid):
 		"""Returns (x, y, location, rotation, level)"""
-		return self._building[int(worldid)]
+		return self._get_row('building', worldid)
 
 	def get_building_location(self, worldid):
-		return self._building[int(worldid)][2]
+		return self._get_row('building', worldid)[2]
 
 
-	def _load_settlement(self):
-		self._settlement = {}
-		for row in self("SELECT rowid, owner, island FROM settlement"):
-			self._settlement[int(row[0])] = row[1:]
-
 	def get_settlement_owner(self, worldid):
 		"""Returns the id of the owner of the settlement or None otherwise"""
-		return self._settlement.get(int(worldid), [None])[0]
+		return self._get_row('settlement', worldid, [None])[0]
 
 	def get_settlement_island(self, worldid):
-		return self._settlement[int(worldid)][1]
+		return self._get_row('settlement', worldid)[1]
 
 
 	def _load_concrete_object(self):
-		self._concrete_object = {}
-		for row in self("SELECT id, action_runtime, action_set_id FROM concrete_object"):
-			self._concrete_object[int(row[0])] = int(row[1]), row[2]
+		concrete_object = {}
+		for row in self._select_chunked("SELECT id, action_runtime, action_set_id FROM concrete_object"):
+			concrete_object[int(row[0])] = int(row[1]), row[2]
+		return concrete_object
 
 	def get_concrete_object_data(self, worldid):
-		return self._concrete_object[int(worldid)]
+		return self._get_preloaded('concrete_object')[int(worldid)]
 
 
 	def _load_production(self):
-		self._productions_by_worldid = {}
-		self._production_lines_by_owner = {}
-		self._productions_by_id_and_owner = {}
-		db_data = self("SELECT rowid, state, owner, prod_line_id, remaining_ticks, _pause_old_state, creation_tick FROM production")
+		productions_by_worldid = {}
+		production_lines_by_owner = {}
+		productions_by_id_and_owner = {}
+		db_data = self._select_chunked("SELECT rowid, state, owner, prod_line_id, remaining_ticks, _pause_old_state, creation_tick FROM production")
 		for row in db_data:
 			rowid = int(row[0])
 			data = row[1:]
-			self._productions_by_worldid[rowid] = data
+			productions_by_worldid[rowid] = data
 			owner = int(row[2])
 			line = int(row[3])
-			if not line in self._productions_by_id_and_owner:
-				self._productions_by_id_and_owner[line] = {}
+			if not line in productions_by_id_and_owner:
+				productions_by_id_and_owner[line] = {}
 			# in the line dict, the owners are unique
-			self._productions_by_id_and_owner[line][owner] = data
+			productions_by_id_and_owner[line][owner] = data
 
-			if owner not in self._production_lines_by_owner:
-				self._production_lines_by_owner[owner] = [line]
+			if owner not in production_lines_by_owner:
+				production_lines_by_owner[owner] = [line]
 			else:
-				self._production_lines_by_owner[owner].append(line)
-
-			self._production_lines_by_owner[owner].append
+				production_lines_by_owner[owner].append(line)
+		return productions_by_worldid, production_lines_by_owner, productions_by_id_and_owner
 
-		self._production_state_history = defaultdict(lambda: deque())
-		for object_id, production_id, tick, state in self("SELECT object_id, production, tick, state FROM production_state_history ORDER BY object_id, production, tick"):
-			self._production_state_history[int(object_id), int(production_id)].append((tick, state))
+	def _load_production_state_history(self):
+		production_state_history = defaultdict(lambda: deque())
+		for object_id, production_id, tick, state in self._select_chunked("SELECT object_id, production, tick, state FROM production_state_history ORDER BY object_id, production, tick"):
+			production_state_history[int(object_id), int(production_id)].append((tick, state))
+		return production_state_history
 
 	def get_production_by_id_and_owner(self, id, ownerid):
 		# owner means worldid of entity
-		return self._productions_by_id_and_owner[id][ownerid]
+		return self._get_preloaded('production')[2][id][ownerid]
 
 	def get_production_line_id(self, production_worldid):
 		"""Returns the prod_line_id of the given production"""
-		return self._productions_by_worldid[int(production_worldid)][2]
+		return self._get_preloaded('production')[0][int(production_worldid)][2]
 
 	def get_production_lines_by_owner(self, owner):
 		"""Returns the prod_line_id of the given production"""
-		return self._production_lines_by_owner.get(owner, [])
+		return self._get_preloaded('production')[1].get(owner, [])
 
 	def get_production_state_history(self, worldid, prod_id):
-		return self._production_state_history[int(worldid), int(prod_id)]
+		return self._get_preloaded('production_state_history')[int(worldid), int(prod_id)]
 
 
 	def _load_storage(self):
-		self._storage = {}
-		for row in self("SELECT object, resource, amount FROM storage"):
+		storage = {}
+		for row in self._select_chunked("SELECT object, resource, amount FROM storage"):
 			ownerid = int(row[0])
-			if ownerid in self._storage:
-				self._storage[ownerid].append(row[1:])
+			if ownerid in storage:
+				storage[ownerid].append(row[1:])
 			else:
-				self._storage[ownerid] = [row[1:]]
+				storage[ownerid] = [row[1:]]
+		return storage
 
 	def get_storage_rowids_by_ownerid(self, ownerid):
 		"""Returns potentially empty list of worldids referencing storages"""
-		return self._storage.get(int(ownerid), [])
+		return self._get_preloaded('storage').get(int(ownerid), [])
 
 
-	def _load_wildanimal(self):
-		self._wildanimal = {}
-		for row in self("SELECT rowid, health, can_reproduce FROM wildanimal"):
-			self._wildanimal[int(row[0])] = row[1:]
-
 	def get_wildanimal_row(self, worldid):
 		"""Returns (health, can_reproduce)"""
-		return self._wildanimal[int(worldid)]
-
+		return self._get_row('wildanimal', worldid)
 
-	def _load_unit(self):
-		self._unit = {}
-		for row in self("SELECT rowid, owner FROM unit"):
-			self._unit[int(row[0])] = int(row[1])
 
 	def get_unit_owner(self, worldid):
-		return self._unit[int(worldid)]
+		return int(self._get_row('unit', worldid)[0])
 
 
-	def _load_building_collector(self):
-		self._building_collector = {}
-		for row in self("SELECT rowid, home_building, creation_tick FROM building_collector"):
-			self._building_collector[int(row[0])] = (int(row[1]) if row[1] is not None else None, row[2])
-
-		self._building_collector_job_history = defaultdict(lambda: deque())
-		for collector_id, tick, utilization in self("SELECT collector, tick, utilisation FROM building_collector_job_history ORDER BY collector, tick"):
-			self._building_collector_job_history[int(collector_id)].append((tick, utilization))
+	def _load_building_collector_job_history(self):
+		job_history = defaultdict(lambda: deque())
+		for collector_id, tick, utilization in self._select_chunked("SELECT collector, tick, utilisation FROM building_collector_job_history ORDER BY collector, tick"):
+			job_history[int(collector_id)].append((tick, utilization))
+		return job_history
 
 	def get_building_collectors_data(self, worldid):
 		"""Returns (id of the building collector's home or None otherwise, creation_tick)"""
-		return self._building_collector.get(int(worldid))
+		row = self._get_row('building_collector', worldid, None)
+		if row is None:
+			return None
+		return (int(row[0]) if row[0] is not None else None, row[1])
 
 	def get_building_collector_job_history(self, worldid):
-		return self._building_collector_job_history[int(worldid)]
+		return self._get_preloaded('building_collector_job_history')[int(worldid)]
 
 
 	def _load_production_line(self):
-		self._production_line = {}
-		for row in self("SELECT for_worldid, type, res, amount FROM production_line"):
+		production_line = {}
+		for row in self._select_chunked("SELECT for_worldid, type, res, amount FROM production_line"):
 			id = int(row[0])
-			if id not in self._production_line:
-				self._production_line[id] = []
-			self._production_line[id].append(row[1:])
+			if id not in production_line:
+				production_line[id] = []
+			production_line[id].append(row[1:])
+		return production_line
 
 	def get_production_line_row(self, for_worldid):
-		return self._production_line[int(for_worldid)]
+		return self._get_preloaded('production_line')[int(for_worldid)]
 
 
 	def _load_unit_path(self):
-		self._unit_path = {}
-		for row in self("SELECT unit, x, y FROM unit_path ORDER BY 'index'"):
+		unit_path = {}
+		for row in self._select_chunked("SELECT unit, x, y FROM unit_path ORDER BY 'index'"):
 			id = int(row[0])
-			if id not in self._unit_path:
-				self._unit_path[id] = []
-			self._unit_path[id].append(row[1:])
+			if id not in unit_path:
+				unit_path[id] = []
+			unit_path[id].append(row[1:])
+		return unit_path
 
 	def get_unit_path(self, worldid):
-		return self._unit_path.get(int(worldid))
+		return self._get_preloaded('unit_path').get(int(worldid))
 
 
 	def _load_storage_global_limit(self):
-		self._storage_global_limit = {}
-		for row in self("SELECT object, value FROM storage_global_limit"):
-			self._storage_global_limit[(int(row[0]))] = int(row[1])
+		storage_global_limit = {}
+		for row in self._select_chunked("SELECT object, value FROM storage_global_limit"):
+			storage_global_limit[(int(row[0]))] = int(row[1])
+		return storage_global_limit
 
 	def get_storage_global_limit(self, worldid):
-		return self._storage_global_limit[int(worldid)]
+		return self._get_preloaded('storage_global_limit')[int(worldid)]
 
 
 	def _load_health(self):
-		self._health = dict( self("SELECT owner_id, health FROM unit_health") )
+		return dict(self._select_chunked("SELECT owner_id, health FROM unit_health"))
 
 	def get_health(self, owner):
-		return self._health[owner]
-
+		return self._get_preloaded('health')[owner]
 
-	def _load_fish_data(self):
-		self._fish_data = {}
-		for row in self("SELECT rowid, last_usage_tick FROM fish_data"):
-			self._fish_data[int(row[0])] = int(row[1])
 
 	def get_last_fish_usage_tick(self, worldid):
-		return self._fish_data[worldid]
+		return int(self._get_row('fish_data', worldid)[0])
 
 	# Random savegamefile related utility that i didn't know where to put
 
 	@classmethod
 	def get_players_num(cls, savegamefile):
 		"""Return number of regular human and ai players"""
-		return DbReader(savegamefile)("SELECT count(rowid) FROM player WHERE is_trader = 0 AND is_pirate = 0")[0][0]
+		return SavegameManager.get_players_num(savegamefile)
 
 	@classmethod
 	def get_hash(cls, savegamefile):
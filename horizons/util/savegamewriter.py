@@ -0,0 +1,131 @@
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+import re
+
+from horizons.util.dbreader import DbReader
+from horizons.util.uhdbaccessor import read_savegame_template
+
+
+class SavegameWriter(object):
+	"""Collects the contents of a savegame in memory and writes them in bulk.
+
+	The save code calls it just like a DbReader. Nothing is executed right away: INSERT
+	rows are collected per table and all other commands (e.g. UPDATEs) are kept in order.
+	Since only plain values are stored, the collected rows are a snapshot of the game
+	state at the time of saving, which can be written later and in another thread.
+
+	write() executes everything on an in-memory database, the INSERTs of a table with
+	DbReader.execute_many, and then copies it to the savegame file in one transaction.
+	The row order within each table is the same as with single INSERTs.
+	"""
+
+	INSERT_RE = re.compile(r'^\s*INSERT\s+(?:OR\s+\w+\s+)?INTO\s+[`"]?(\w+)', re.IGNORECASE)
+
+	def __init__(self):
+		# list of dicts { table name: list of (command, list of rows) } for INSERTs
+		# and (command, args) tuples for other commands
+		self._operations = []
+		self._tables = None # last dict in self._operations, where INSERTs are added
+		self._command_tables = {} # command -> table name or None, to only parse each command once
+
+	def __call__(self, command, *args):
+		"""Same as DbReader.__call__, but delayed until write(). Can't be used to read data."""
+		table = self._get_table(command)
+		if table is None:
+			self._add_command(command, args)
+		else:
+			self._get_rows(table, command).append(args)
+		return []
+
+	def execute_many(self, command, parameters):
+		"""Same as DbReader.execute_many, but delayed until write()."""
+		table = self._get_table(command)
+		if table is None:
+			for args in parameters:
+				self._add_command(command, args)
+		else:
+			self._get_rows(table, command).extend(parameters)
+
+	def _get_table(self, command):
+		"""Returns the table an INSERT command writes to, None for other commands"""
+		try:
+			return self._command_tables[command]
+		except KeyError:
+			match = self.INSERT_RE.match(command)
+			table = self._command_tables[command] = match.group(1) if match else None
+			return table
+
+	def _add_command(self, command, args):
+		if command.lstrip().upper().startswith('SELECT'):
+			raise ValueError("Reading from the savegame isn't possible while saving: %s" % command)
+		self._operations.append((command, args))
+		self._tables = None
+
+	def _get_rows(self, table, command):
+		"""Returns the list to append rows for command to"""
+		if self._tables is None:
+			self._tables = {}
+			self._operations.append(self._tables)
+		runs = self._tables.get(table)
+		if runs is None:
+			runs = self._tables[table] = []
+		elif runs[-1][0] == command:
+			return runs[-1][1]
+		# consecutive rows of the same command are written together
+		runs.append((command, []))
+		return runs[-1][1]
+
+	def write(self, db):
+		"""Writes everything to a savegame file.
+		The file is only touched at the end, this may be called from any thread.
+		@param db: DbReader of the new, empty savegame file"""
+		read_savegame_template(db)
+		memory_db = DbReader(':memory:')
+		try:
+			read_savegame_template(memory_db)
+			memory_db("BEGIN")
+			for operation in self._operations:
+				if isinstance(operation, dict):
+					for runs in operation.itervalues():
+						for command, rows in runs:
+							memory_db.execute_many(command, rows)
+				else:
+					memory_db(operation[0], *operation[1])
+			memory_db("COMMIT")
+			self._copy(memory_db, db.db_path)
+		finally:
+			memory_db.close()
+
+	@classmethod
+	def _copy(cls, memory_db, path):
+		tables = [row[0] for row in
+		          memory_db("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+		memory_db("ATTACH DATABASE ? AS savegame", path)
+		memory_db("BEGIN")
+		for table in tables:
+			# rowids are used as ids in some tables, they have to be copied explicitly
+			table_info = memory_db.cur.execute("PRAGMA table_info(`%s`)" % table).fetchall()
+			columns = ', '.join(['rowid'] + ['`%s`' % info[1] for info in table_info])
+			memory_db("INSERT INTO savegame.`%s`(%s) SELECT %s FROM main.`%s`" % (table, columns, columns, table))
+		memory_db("COMMIT")
+		memory_db("DETACH DATABASE savegame")
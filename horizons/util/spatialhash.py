@@ -0,0 +1,243 @@
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+
+from operator import itemgetter
+
+
+class SpatialHash(object):
+	"""Buckets objects into square cells of the map to speed up range queries.
+
+	The hash only knows the coordinates it was last told about, callers have to
+	call move() whenever an object changes its position. Query results are returned
+	in the order the objects were added, so they can replace iterating over a list
+	of the same objects without changing the outcome (this is important for
+	multiplayer games, which must behave identically on all machines).
+	"""
+
+	def __init__(self, cell_size=16):
+		self.cell_size = cell_size
+		self._cells = {} # (cell_x, cell_y) -> {object: sequence number}
+		self._objects = {} # object -> ((cell_x, cell_y), sequence number)
+		self._next_sequence_number = 0
+		self._zone_cells = {} # ProximityZone -> (zone key, frozenset of watched cells)
+		self._cell_zones = {} # (cell_x, cell_y) -> [ProximityZone], in the order they were added
+
+	def _get_cell(self, coords):
+		return (int(coords[0] // self.cell_size), int(coords[1] // self.cell_size))
+
+	def add(self, obj, coords):
+		"""Adds obj at coords (tuple (x, y)) to the hash."""
+		assert obj not in self._objects
+		cell = self._get_cell(coords)
+		sequence_number = self._next_sequence_number
+		self._next_sequence_number += 1
+		self._objects[obj] = (cell, sequence_number)
+		self._cells.setdefault(cell, {})[obj] = sequence_number
+		if self._cell_zones:
+			self._notify_zones(obj, None, cell)
+
+	def remove(self, obj):
+		cell, sequence_number = self._objects.pop(obj)
+		objects = self._cells[cell]
+		del objects[obj]
+		if not objects:
+			del self._cells[cell]
+		if self._cell_zones:
+			self._notify_zones(obj, cell, None)
+
+	def move(self, obj, coords):
+		"""Updates the position of obj, which keeps its place in the order of the results."""
+		old_cell, sequence_number = self._objects[obj]
+		cell = self._get_cell(coords)
+		if cell == old_cell:
+			return
+		objects = self._cells[old_cell]
+		del objects[obj]
+		if not objects:
+			del self._cells[old_cell]
+		self._objects[obj] = (cell, sequence_number)
+		self._cells.setdefault(cell, {})[obj] = sequence_number
+		if self._cell_zones:
+			self._notify_zones(obj, old_cell, cell)
+
+	def get_objects_in_rect(self, left, top, right, bottom):
+		"""Returns all objects in cells that intersect the rect, in the order they were added.
+		The result is a superset of the objects in the rect, callers have to filter it."""
+		left, top = self._get_cell((left, top))
+		right, bottom = self._get_cell((right, bottom))
+		found = []
+		if (right - left + 1) * (bottom - top + 1) <= len(self._cells):
+			for x in xrange(left, right + 1):
+				for y in xrange(top, bottom + 1):
+					objects = self._cells.get((x, y))
+					if objects:
+						found.extend(objects.iteritems())
+		else:
+			# large query, it's cheaper to look at the occupied cells only
+			for (x, y), objects in self._cells.iteritems():
+				if left <= x <= right and top <= y <= bottom:
+					found.extend(objects.iteritems())
+		found.sort(key=itemgetter(1))
+		return [obj for obj, sequence_number in found]
+
+	def get_objects_in_circle(self, center, radius, margin=0):
+		"""Returns candidates for objects within radius of center (tuple (x, y)).
+		@param margin: extra distance to search, for objects whose position in the
+		               hash may lag behind their actual position
+		@see get_objects_in_rect"""
+		distance = radius + margin
+		return self.get_objects_in_rect(center[0] - distance, center[1] - distance,
+		                                center[0] + distance, center[1] + distance)
+
+	def add_zone(self, zone):
+		"""Starts tracking the objects near zone, it is notified about the ones already there."""
+		assert zone not in self._zone_cells
+		key, cells = self._get_zone_cells(zone)
+		self._zone_cells[zone] = (key, cells)
+		for cell in cells:
+			self._cell_zones.setdefault(cell, []).append(zone)
+		for obj in self._get_objects_in_cells(cells):
+			zone._enter(obj)
+
+	def remove_zone(self, zone):
+		"""Stops tracking the objects near zone, without notifying it."""
+		key, cells = self._zone_cells.pop(zone)
+		for cell in cells:
+			zones = self._cell_zones[cell]
+			zones.remove(zone)
+			if not zones:
+				del self._cell_zones[cell]
+		for obj in self._get_objects_in_cells(cells):
+			zone._discard(obj)
+
+	def update_zone(self, zone):
+		"""Has to be called after the center or the radius of zone changed."""
+		old_key, old_cells = self._zone_cells[zone]
+		if self._get_zone_key(zone) == old_key:
+			return # still watching the same cells, this is the common case for moving zones
+		key, cells = self._get_zone_cells(zone)
+		self._zone_cells[zone] = (key, cells)
+		for cell in old_cells - cells:
+			zones = self._cell_zones[cell]
+			zones.remove(zone)
+			if not zones:
+				del self._cell_zones[cell]
+		for cell in cells - old_cells:
+			self._cell_zones.setdefault(cell, []).append(zone)
+		for obj in self._get_objects_in_cells(old_cells - cells):
+			zone._leave(obj)
+		for obj in self._get_objects_in_cells(cells - old_cells):
+			zone._enter(obj)
+
+	def _get_zone_key(self, zone):
+		"""The cells of a zone only depend on the cell of its center and its radius"""
+		return (self._get_cell(zone.center), zone.radius)
+
+	def _get_zone_cells(self, zone):
+		"""Returns the key of zone and the cells within zone.radius of the cell that
+		contains zone.center"""
+		key = self._get_zone_key(zone)
+		(cell_x, cell_y), radius = key
+		size = self.cell_size
+		left, top = self._get_cell((cell_x * size - radius, cell_y * size - radius))
+		right, bottom = self._get_cell(((cell_x + 1) * size - 1 + radius,
+		                                (cell_y + 1) * size - 1 + radius))
+		return key, frozenset((x, y) for x in xrange(left, right + 1) for y in xrange(top, bottom + 1))
+
+	def _get_objects_in_cells(self, cells):
+		"""Returns the objects in cells, in the order they were added."""
+		found = []
+		for cell in cells:
+			objects = self._cells.get(cell)
+			if objects:
+				found.extend(objects.iteritems())
+		found.sort(key=itemgetter(1))
+		return [obj for obj, sequence_number in found]
+
+	def _notify_zones(self, obj, old_cell, cell):
+		"""Tells the zones which watch only one of the cells that obj left or entered them."""
+		old_zones = self._cell_zones.get(old_cell, ())
+		zones = self._cell_zones.get(cell, ())
+		for zone in [z for z in old_zones if z not in zones]:
+			zone._leave(obj)
+		for zone in [z for z in zones if z not in old_zones]:
+			zone._enter(obj)
+
+	def __len__(self):
+		return len(self._objects)
+
+	def __contains__(self, obj):
+		return obj in self._objects
+
+
+class ProximityZone(object):
+	"""Keeps track of the objects of one or more SpatialHashes that are near a point.
+
+	The zone watches all cells that are within radius of the cell of its center, so the
+	objects it knows about are a superset of the ones within radius of the center. Only
+	objects that pass the filter are tracked, the filter must not change its mind about an
+	object while it is in the zone. The callbacks get the object that started or stopped
+	being tracked because it or the zone moved.
+
+	The owner of the zone has to call SpatialHash.update_zone after changing center or radius.
+	"""
+
+	def __init__(self, center, radius, filter=None, enter_callback=None, leave_callback=None):
+		"""
+		@param center: tuple (x, y)
+		@param radius: int
+		@param filter: function(obj) -> bool, whether obj is of interest
+		"""
+		self.center = center
+		self.radius = radius
+		self._filter = filter
+		self._enter_callback = enter_callback
+		self._leave_callback = leave_callback
+		self._objects = set()
+
+	def _enter(self, obj):
+		if self._filter is not None and not self._filter(obj):
+			return
+		self._objects.add(obj)
+		if self._enter_callback is not None:
+			self._enter_callback(obj)
+
+	def _leave(self, obj):
+		if obj not in self._objects:
+			return
+		self._objects.remove(obj)
+		if self._leave_callback is not None:
+			self._leave_callback(obj)
+
+	def _discard(self, obj):
+		self._objects.discard(obj)
+
+	def __contains__(self, obj):
+		return obj in self._objects
+
+	def __iter__(self):
+		"""Iterates over the tracked objects in no particular order, so this must only be
+		used for checks that don't depend on the order."""
+		return iter(self._objects)
+
+	def __len__(self):
+		return len(self._objects)
@@ -0,0 +1,108 @@
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import zlib
+
+
+class StateDigest(object):
+	"""Compact checksum over the state of a set of objects, used to detect diverging
+	multiplayer games.
+
+	Objects are grouped into subsystems (e.g. settlements, ships). Every subsystem has a
+	function that returns the relevant state of one of its objects. The digest of a
+	subsystem is the sum of the checksums of its objects, so it doesn't depend on the
+	order of the objects and can be updated one object at a time. Objects only have to
+	be marked dirty when their state changes, they are rechecked on the next request.
+
+	The state must be the same on all machines, so it must only consist of values with
+	a stable repr(), such as ints, strings and tuples of them. Floats are rejected.
+	Objects are identified by their worldid.
+	"""
+
+	MASK = 0xffffffff
+
+	def __init__(self):
+		self._get_state = {} # subsystem: function(obj) -> state
+		self._entries = {} # subsystem: {obj: checksum}
+		self._sums = {} # subsystem: sum of checksums
+		self._dirty = set() # (subsystem, obj)
+
+	def add_subsystem(self, subsystem, get_state):
+		self._get_state[subsystem] = get_state
+		self._entries[subsystem] = {}
+		self._sums[subsystem] = 0
+
+	def add(self, subsystem, obj):
+		"""Starts tracking obj"""
+		self._entries[subsystem][obj] = 0
+		self._dirty.add((subsystem, obj))
+
+	def remove(self, subsystem, obj):
+		self._sums[subsystem] = (self._sums[subsystem] - self._entries[subsystem].pop(obj)) & self.MASK
+		self._dirty.discard((subsystem, obj))
+
+	def mark_dirty(self, subsystem, obj):
+		"""Has to be called when the state of obj has changed. Unknown objects are ignored."""
+		if obj in self._entries[subsystem]:
+			self._dirty.add((subsystem, obj))
+
+	def update(self, subsystem, obj, state):
+		"""Sets the state of obj directly, for values that aren't bound to an object's lifetime"""
+		if obj not in self._entries[subsystem]:
+			self._entries[subsystem][obj] = 0
+		self._dirty.discard((subsystem, obj))
+		self._set_checksum(subsystem, obj, self._get_checksum(obj, state))
+
+	def _get_checksum(self, obj, state):
+		self._check_state(state)
+		return zlib.crc32(repr((obj.worldid, state))) & self.MASK
+
+	@classmethod
+	def _check_state(cls, state):
+		"""Raises a TypeError if the state contains floats, their repr() differs between
+		python versions."""
+		if isinstance(state, float):
+			raise TypeError("float values can't be part of the state: %r" % state)
+		if isinstance(state, (tuple, list)):
+			for value in state:
+				cls._check_state(value)
+
+	def _set_checksum(self, subsystem, obj, checksum):
+		entries = self._entries[subsystem]
+		self._sums[subsystem] = (self._sums[subsystem] - entries[obj] + checksum) & self.MASK
+		entries[obj] = checksum
+
+	def _update_dirty(self):
+		for subsystem, obj in self._dirty:
+			self._set_checksum(subsystem, obj, self._get_checksum(obj, self._get_state[subsystem](obj)))
+		self._dirty.clear()
+
+	def get_subsystem_digests(self):
+		"""Returns a dict {subsystem: digest}, the digests are ints"""
+		self._update_dirty()
+		return self._sums.copy()
+
+	def get_details(self):
+		"""Returns the checksum of every object as {subsystem: {worldid: checksum}}.
+		This is a lot of data, it is meant for finding the object that caused a mismatch."""
+		self._update_dirty()
+		return dict((subsystem, dict((obj.worldid, checksum) for obj, checksum in entries.iteritems()))
+		            for subsystem, entries in self._entries.iteritems())
@@ -21,6 +21,8 @@
 
 import os
 import yaml
+import fnmatch
+import hashlib
 import threading
 import logging
 
@@ -79,6 +81,10 @@ class YamlCache(object):
 	Threadsafe.
 
 	Use get_file for files to cache (default case) or load_yaml_data for special use cases (behaves like yaml.load).
+
+	The cache has a manifest entry (size, modification time, content hash) for every file.
+	Unchanged files are recognized by their size and modification time alone; the content
+	is only read and hashed when those have changed.
 	"""
 
 	cache = None
@@ -102,37 +108,79 @@ class YamlCache(object):
 		@param game_data: Whether this file contains data like BUILDINGS.LUMBERJACk to resolve
 		"""
 
-		# calc the hash
-		f = open(filename, 'r')
-		h = hash(f.read())
-		f.seek(0)
+		if cls.cache is None:
+			cls._open_cache()
+
+		stat = os.stat(filename)
+		manifest_entry = cls.cache.get_manifest_entry(filename)
+		if manifest_entry is not None and manifest_entry[:2] == (stat.st_size, stat.st_mtime):
+			return cls.cache[filename] # returns an object from the YAML
+
+		# the file may have changed, compare the content
+		with open(filename, 'r') as f:
+			content = f.read()
+		content_hash = hashlib.sha1(content).hexdigest()
+		new_manifest_entry = (stat.st_size, stat.st_mtime, content_hash)
+
+		if manifest_entry is not None and manifest_entry[2] == content_hash:
+			with cls.lock:
+				cls.cache.set_manifest_entry(filename, new_manifest_entry)
+				cls._schedule_sync()
+			return cls.cache[filename]
+
+		data = cls.load_yaml_data(content)
+		if game_data: # need to convert some values
+			try:
+				data = convert_game_data(data)
+			except Exception as e:
+				# add info about file
+				to_add = "\nThis error happened in %s ." % filename
+				e.args = ( e.args[0] + to_add, ) + e.args[1:]
+				e.message = ( e.message + to_add )
+				raise
+
+		with cls.lock:
+			cls.cache.set(filename, new_manifest_entry, data)
+			cls._schedule_sync()
 
-		# check for updates or new files
+		return cls.cache[filename] # returns an object from the YAML
+
+	@classmethod
+	def find_files(cls, directory, pattern='*.yaml'):
+		"""Return a list of (directory path, file name) of the files in the directory tree that match the pattern.
+
+		The paths are built like os.walk does. The listing is cached and only checked against
+		the modification times of the directories, which change when files are added or removed.
+		"""
 		if cls.cache is None:
 			cls._open_cache()
 
-		yaml_file_in_cache = (filename in cls.cache and cls.cache[filename][0] == h)
-		if not yaml_file_in_cache:
-			data = cls.load_yaml_data( f )
-			if game_data: # need to convert some values
-				try:
-					data = convert_game_data(data)
-				except Exception as e:
-					# add info about file
-					to_add = "\nThis error happened in %s ." % filename
-					e.args = ( e.args[0] + to_add, ) + e.args[1:]
-					e.message = ( e.message + to_add )
-					raise
-
-			cls.lock.acquire()
-			cls.cache[filename] = (h, data)
-			if not cls.sync_scheduled:
-				cls.sync_scheduled = True
-				from horizons.extscheduler import ExtScheduler
-				ExtScheduler().add_new_object(cls._do_sync, cls, run_in=1)
-			cls.lock.release()
-
-		return cls.cache[filename][1] # returns an object from the YAML
+		key = (directory, pattern)
+		listing = cls.cache.get_listing(key) # [(root, modification time, [file name, ...]), ...]
+		if listing is None or any(cls._get_mtime(root) != mtime for root, mtime, _ in listing):
+			listing = []
+			for root, dirnames, filenames in os.walk(directory):
+				listing.append((root, cls._get_mtime(root), fnmatch.filter(filenames, pattern)))
+			with cls.lock:
+				cls.cache.set_listing(key, listing)
+				cls._schedule_sync()
+
+		return [(root, filename) for root, _, filenames in listing for filename in filenames]
+
+	@classmethod
+	def _get_mtime(cls, path):
+		try:
+			return os.stat(path).st_mtime
+		except OSError:
+			return None
+
+	@classmethod
+	def _schedule_sync(cls):
+		"""Write the cache to disk soon. The lock has to be held."""
+		if not cls.sync_scheduled:
+			cls.sync_scheduled = True
+			from horizons.extscheduler import ExtScheduler
+			ExtScheduler().add_new_object(cls._do_sync, cls, run_in=1)
 
 	@classmethod
 	def _open_cache(cls):
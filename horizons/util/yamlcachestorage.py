@@ -34,26 +34,30 @@ class YamlCacheStorage(object):
 	An instance of this class provides a implements a cache that always has all the data
 	in memory. It tries to also load the data from disk and write it back on disk but
 	if it fails then it just ignores the errors and keeps working.
+
+	Every entry has a manifest entry that describes the file the data was created from,
+	so the cache can be validated without touching the data. The data of each entry is
+	pickled separately and only unpickled when it is used for the first time.
 	"""
 
 	log = logging.getLogger("yamlcachestorage")
 
 	# Increment this when the users of this class change the way they use it.
-	version = 1
+	version = 2
 
 	def __init__(self, filename):
 		super(YamlCacheStorage, self).__init__()
 		self._filename = filename
-		self._data = {}
+		self._clear()
 
 	@classmethod
 	def _validate(cls, data):
-		"""Make sure data is a tuple (version no, _data dict) with the right version."""
+		"""Make sure data is a tuple (version no, manifest dict, pickled data dict, listings dict) with the right version."""
 		if not isinstance(data, tuple):
 			return False
-		if len(data) != 2:
+		if len(data) != 4:
 			return False
-		if not isinstance(data[1], dict):
+		if not all(isinstance(part, dict) for part in data[1:]):
 			return False
 		return data[0] == cls.version
 
@@ -61,12 +65,13 @@ class YamlCacheStorage(object):
 		"""Load the cache from disk if possible. Create an empty cache otherwise."""
 		if os.path.exists(self._filename):
 			self.log.debug('%s._reload(): loading cache from disk', self)
-			file = open(self._filename)
+			file = open(self._filename, 'rb')
 			try:
 				data = pickle.load(file)
 				if not self._validate(data):
 					raise RuntimeError('Bad YamlCacheStorage data format')
-				self._data = data[1]
+				self._clear()
+				self._manifest, self._pickled, self._listings = data[1:]
 			finally:
 				file.close()
 			self.log.debug('%s._reload(): successfully loaded cache from disk', self)
@@ -75,8 +80,11 @@ class YamlCacheStorage(object):
 
 	def _clear(self):
 		"""Clear the cache in memory."""
+		self._manifest = {} # {key: manifest entry, ...}
+		self._data = {} # {key: data, ...} of the entries that have been used or changed
+		self._pickled = {} # {key: pickled data, ...} of the entries loaded from disk
+		self._listings = {} # {key: listing, ...}
 		self.log.debug('%s._clear(): creating a new cache', self)
-		self._data = {}
 
 	@classmethod
 	def open(cls, filename):
@@ -95,9 +103,12 @@ class YamlCacheStorage(object):
 	def sync(self):
 		"""Write the file to disk if possible. Do nothing otherwise."""
 		try:
+			for key, value in self._data.iteritems():
+				if key not in self._pickled:
+					self._pickled[key] = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
 			file = open(self._filename, 'wb')
 			try:
-				pickle.dump((self.version, self._data), file)
+				pickle.dump((self.version, self._manifest, self._pickled, self._listings), file, pickle.HIGHEST_PROTOCOL)
 				self.log.debug('%s.sync(): success', self)
 			finally:
 				file.close()
@@ -110,22 +121,53 @@ class YamlCacheStorage(object):
 		self.log.debug('%s.close()', self)
 		self.sync()
 		self._filename = None
+		self._manifest = None
 		self._data = None
+		self._pickled = None
+		self._listings = None
+
+	def get_manifest_entry(self, key):
+		"""Return the manifest entry of the key or None if it isn't in the cache."""
+		return self._manifest.get(key)
+
+	def set_manifest_entry(self, key, manifest_entry):
+		"""Change the manifest entry of an existing key without changing the data."""
+		assert key in self._manifest
+		self._manifest[key] = manifest_entry
+
+	def set(self, key, manifest_entry, value):
+		"""Add or replace the data of the key and its manifest entry."""
+		self._manifest[key] = manifest_entry
+		self._data[key] = value
+		self._pickled.pop(key, None)
+
+	def remove(self, key):
+		"""Remove the key and its data from the cache."""
+		del self._manifest[key]
+		self._data.pop(key, None)
+		self._pickled.pop(key, None)
+
+	def keys(self):
+		return self._manifest.keys()
+
+	def get_listing(self, key):
+		"""Return the stored listing (e.g. of a directory tree) or None."""
+		return self._listings.get(key)
+
+	def set_listing(self, key, listing):
+		self._listings[key] = listing
 
 	def __getitem__(self, key):
 		"""This function enables the following syntax: cache[key]"""
 		self.log.debug("%s.__getitem__('%s')", self, key)
+		if key not in self._data:
+			self._data[key] = pickle.loads(self._pickled[key])
 		return self._data[key]
 
-	def __setitem__(self, key, value):
-		"""This function enables the following syntax: cache[key] = value"""
-		self.log.debug("%s.__setitem__('%s', data excluded)", self, key)
-		self._data[key] = value
-
 	def __contains__(self, item):
 		"""This function enables the following syntax: item in cache"""
 		self.log.debug("%s.__contains__('%s')", self, item)
-		return item in self._data
+		return item in self._manifest
 
 	def __str__(self):
-		return "YamlCacheStorage('%s', %d items)" % (self._filename, len(self._data))
+		return "YamlCacheStorage('%s', %d items)" % (self._filename, len(self._manifest))
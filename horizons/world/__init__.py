@@ -32,9 +32,14 @@ import horizons.globals
 from horizons.world.island import Island
 from horizons.world.player import HumanPlayer
 from horizons.util.buildingindexer import BuildingIndexer
+from horizons.util.pathfinding.clustergraph import ClusterGraph
+from horizons.util.pathfinding.pathgrid import PathGrid
 from horizons.util.color import Color
 from horizons.util.python import decorators
 from horizons.util.shapes import Circle, Point, Rect
+from horizons.util.python.callback import Callback
+from horizons.util.spatialhash import SpatialHash
+from horizons.util.statedigest import StateDigest
 from horizons.util.worldobject import WorldObject
 from horizons.constants import UNITS, BUILDINGS, RES, GROUND, GAME, MAP, PATHS
 from horizons.ai.trader import Trader
@@ -51,6 +56,43 @@ from horizons.component.storagecomponent import StorageComponent
 from horizons.world.disaster.disastermanager import DisasterManager
 from horizons.world import worldutils
 from horizons.util.savegameaccessor import SavegameAccessor
+from horizons.messaging import NewSettlement
+
+class _SeaTileMap(object):
+	"""Read-only mapping of the map coords to the shared sea tile of their block, like a
+	dict { (x, y): tile }. Only one tile per block is stored, see World.load_raw_map."""
+
+	def __init__(self, map_dimensions, left, top, block_size):
+		"""
+		@param map_dimensions: Rect, only coords within it are in the map
+		@param left, top: origin of the block grid
+		"""
+		self._map_dimensions = map_dimensions
+		self._left = left
+		self._top = top
+		self._block_size = block_size
+		self._tiles = {} # (left, top) of a block: tile
+
+	def set_block_tile(self, left, top, tile):
+		self._tiles[(left, top)] = tile
+
+	def get(self, coords, default=None):
+		x, y = coords
+		dimensions = self._map_dimensions
+		if not (dimensions.left <= x < dimensions.right and dimensions.top <= y < dimensions.bottom):
+			return default
+		block = (x - (x - self._left) % self._block_size, y - (y - self._top) % self._block_size)
+		return self._tiles.get(block, default)
+
+	def __getitem__(self, coords):
+		tile = self.get(coords)
+		if tile is None:
+			raise KeyError(coords)
+		return tile
+
+	def __contains__(self, coords):
+		return self.get(coords) is not None
+
 
 class World(BuildingOwner, WorldObject):
 	"""The World class represents an Unknown Horizons map with all its units, grounds, buildings, etc.
@@ -66,6 +108,7 @@ class World(BuildingOwner, WorldObject):
 	   * ground_map - a dictionary that binds tuples of coordinates with a reference to the tile:
 	                  { (x, y): tileref, ...}
 	                 This is important for pathfinding and quick tile fetching.
+	                 Sea tiles are shared by all coordinates of a 10x10 block unless a building covers them.
 	   * island_map - a dictionary that binds tuples of coordinates with a reference to the island
 	   * ships - a list of all the ships ingame - horizons.world.units.ship.Ship instances
 	   * ship_map - same as ground_map, but for ships
@@ -83,6 +126,7 @@ class World(BuildingOwner, WorldObject):
 		if False:
 			assert isinstance(session, horizons.session.Session)
 		self.session = session
+		self.checkup_digest = None # see get_checkup_hash
 		super(World, self).__init__(worldid=GAME.WORLD_WORLDID)
 
 	def end(self):
@@ -110,10 +154,18 @@ class World(BuildingOwner, WorldObject):
 		self.full_map = None
 		self.island_map = None
 		self.water = None
+		self.water_grid = None
+		self.water_and_coastline_grid = None
+		self.water_clusters = None
 		self.ships = None
+		self.ship_index = None
 		self.ship_map = None
 		self.fish_indexer = None
 		self.ground_units = None
+		self.ground_unit_index = None
+		if self.checkup_digest is not None:
+			NewSettlement.unsubscribe(self._on_new_settlement)
+			self.checkup_digest = None
 
 		if self.pirate is not None:
 			self.pirate.end()
@@ -151,6 +203,13 @@ class World(BuildingOwner, WorldObject):
 		self.pirate = None
 
 		self._load_players(savegame_db, force_player_id)
+		# weapon holders listen to diplomacy changes as soon as they are loaded
+		self._load_diplomacy(savegame_db)
+
+		# spatial indices of the ships and ground units, for range queries. They are needed
+		# before any buildings are loaded, since towers watch them (see add_proximity_zone)
+		self.ship_index = SpatialHash()
+		self.ground_unit_index = SpatialHash()
 
 		# all static data
 		self.load_raw_map(savegame_db)
@@ -159,6 +218,8 @@ class World(BuildingOwner, WorldObject):
 		for (building_worldid, building_typeid) in \
 		    savegame_db("SELECT rowid, type FROM building WHERE location = ?", self.worldid):
 			load_building(self.session, savegame_db, building_typeid, building_worldid)
+		# data only used by buildings
+		savegame_db.release('fish_data', 'production_line')
 
 		# use a dict because it's directly supported by the pathfinding algo
 		self.water = dict((tile, 1.0) for tile in self.ground_map)
@@ -179,6 +240,11 @@ class World(BuildingOwner, WorldObject):
 		self._init_shallow_water_bodies()
 		self.shallow_sea_number = self.shallow_water_body[(self.min_x, self.min_y)]
 
+		# the same as above in a form that ship pathfinding can work on faster
+		self.water_grid = PathGrid(self.water, self.map_dimensions)
+		self.water_and_coastline_grid = PathGrid(self.water_and_coastline, self.map_dimensions)
+		self.water_clusters = ClusterGraph(self.water_grid, self.water_body)
+
 		# create ship position list. entries: ship_map[(x, y)] = ship
 		self.ship_map = {}
 		self.ground_unit_map = {}
@@ -204,6 +270,8 @@ class World(BuildingOwner, WorldObject):
 		# load all units (we do it here cause all buildings are loaded by now)
 		for (worldid, typeid) in savegame_db("SELECT rowid, type FROM unit ORDER BY rowid"):
 			Entities.units[typeid].load(self.session, savegame_db, worldid)
+		# all objects that use the preloaded data are loaded by now
+		savegame_db.release()
 
 		if self.session.is_game_loaded():
 			# let trader and pirate command their ships. we have to do this here
@@ -225,7 +293,6 @@ class World(BuildingOwner, WorldObject):
 					player.finish_loading(savegame_db)
 
 		self._load_combat(savegame_db)
-		self._load_diplomacy(savegame_db)
 		self._load_disasters(savegame_db)
 
 		self.inited = True
@@ -290,6 +357,8 @@ class World(BuildingOwner, WorldObject):
 
 		fake_tile_class = Entities.grounds['-1-special']
 		fake_tile_size = 10
+		self.fake_tile_map = _SeaTileMap(self.map_dimensions, self.min_x-MAP.BORDER,
+		                                 self.min_y-MAP.BORDER, fake_tile_size)
 		for x in xrange(self.min_x-MAP.BORDER, self.max_x+MAP.BORDER, fake_tile_size):
 			for y in xrange(self.min_y-MAP.BORDER, self.max_y+MAP.BORDER, fake_tile_size):
 				fake_tile_x = x - 1
@@ -297,12 +366,14 @@ class World(BuildingOwner, WorldObject):
 				if not preview:
 					# we don't need no references, we don't need no mem control
 					default_grounds(self.session, fake_tile_x, fake_tile_y)
+				# all coordinates of the block share one tile, see add_building
+				fake_tile = fake_tile_class(self.session, fake_tile_x, fake_tile_y)
+				self.fake_tile_map.set_block_tile(x, y, fake_tile)
 				for x_offset in xrange(fake_tile_size):
 					if self.min_x <= x + x_offset < self.max_x:
 						for y_offset in xrange(fake_tile_size):
 							if self.min_y <= y + y_offset < self.max_y:
-								self.ground_map[(x+x_offset, y+y_offset)] = fake_tile_class(self.session, fake_tile_x, fake_tile_y)
-		self.fake_tile_map = copy.copy(self.ground_map)
+								self.ground_map[(x+x_offset, y+y_offset)] = fake_tile
 
 		# remove parts that are occupied by islands, create the island map and the full map
 		self.island_map = {}
@@ -524,6 +595,29 @@ class World(BuildingOwner, WorldObject):
 			self.player = player
 		self.players.append(player)
 
+	def add_building(self, building, player, load=False):
+		# the sea tiles are shared by a whole block, give the covered ones their own copy
+		# before they are marked as blocked
+		for point in building.position:
+			coords = point.to_tuple()
+			tile = self.full_map.get(coords)
+			if tile is not None and tile is self.fake_tile_map.get(coords):
+				tile = tile.__class__(self.session, tile.x, tile.y)
+				self.full_map[coords] = tile
+				if coords in self.ground_map:
+					self.ground_map[coords] = tile
+		return super(World, self).add_building(building, player, load=load)
+
+	def remove_building(self, building):
+		super(World, self).remove_building(building)
+		# switch the freed sea tiles back to the shared ones
+		for point in building.position:
+			coords = point.to_tuple()
+			tile = self.ground_map.get(coords)
+			if tile is not None and tile.__class__ is self.fake_tile_map[coords].__class__ and \
+			   not tile.blocked:
+				self.full_map[coords] = self.ground_map[coords] = self.fake_tile_map[coords]
+
 	def get_tile(self, point):
 		"""Returns the ground at x, y.
 		@param point: coords as Point
@@ -594,31 +688,51 @@ class World(BuildingOwner, WorldObject):
 		@return: List of ships.
 		"""
 		if position is not None and radius is not None:
-			circle = Circle(position, radius)
-			return [ship for ship in self.ships if circle.contains(ship.position)]
+			return self._get_units_in_circle(self.ship_index, position, radius)
 		else:
 			return self.ships
 
+	def add_proximity_zone(self, zone):
+		"""Makes zone track the ships and ground units near it, see ProximityZone."""
+		self.ship_index.add_zone(zone)
+		self.ground_unit_index.add_zone(zone)
+
+	def update_proximity_zone(self, zone):
+		"""Has to be called after the center or the radius of zone changed."""
+		self.ship_index.update_zone(zone)
+		self.ground_unit_index.update_zone(zone)
+
+	def remove_proximity_zone(self, zone):
+		self.ship_index.remove_zone(zone)
+		self.ground_unit_index.remove_zone(zone)
+
 	def get_ground_units(self, position=None, radius=None):
 		"""@see get_ships"""
 		if position is not None and radius is not None:
-			circle = Circle(position, radius)
-			return [unit for unit in self.ground_units if circle.contains(unit.position)]
+			return self._get_units_in_circle(self.ground_unit_index, position, radius)
 		else:
 			return self.ground_units
 
+	def _get_units_in_circle(self, index, position, radius):
+		"""Returns the units of a spatial index that are in range, in the order of the unit list."""
+		circle = Circle(position, radius)
+		# units update their index entry at the end of a move tick, code that runs during
+		# the move tick can see positions that are one step ahead of the index.
+		candidates = index.get_objects_in_circle(position.to_tuple(), radius, margin=1)
+		return [unit for unit in candidates if circle.contains(unit.position)]
+
 	def get_buildings(self, position=None, radius=None):
 		"""@see get_ships"""
-		buildings = []
 		if position is not None and radius is not None:
+			buildings = []
 			circle = Circle(position, radius)
 			for island in self.islands:
-				for building in island.buildings:
+				for building in island.building_index.get_objects_in_circle(position.to_tuple(), radius):
 					if circle.contains(building.position.center):
 						buildings.append(building)
 			return buildings
 		else:
-			return [b for b in island.buildings for island in self.islands]
+			return [b for island in self.islands for b in island.buildings]
 
 	def get_all_buildings(self):
 		"""Yields all buildings independent of owner"""
@@ -632,10 +746,10 @@ class World(BuildingOwner, WorldObject):
 	def get_health_instances(self, position=None, radius=None):
 		"""Returns all instances that have health"""
 		instances = []
-		for instance in self.get_ships(position, radius) + \
-		                self.get_ground_units(position, radius):
-			if instance.has_component(HealthComponent):
-				instances.append(instance)
+		for units in (self.get_ships(position, radius), self.get_ground_units(position, radius)):
+			for instance in units:
+				if instance.has_component(HealthComponent):
+					instances.append(instance)
 		return instances
 
 	def save(self, db):
@@ -668,37 +782,52 @@ class World(BuildingOwner, WorldObject):
 		self.disaster_manager.save(db)
 
 	def get_checkup_hash(self):
-		"""Returns a collection of important game state values. Used to check if two mp games have diverged.
-		Not designed to be reliable."""
+		"""Returns checksums of important game state values as {subsystem: int}.
+		Used to check if two mp games have diverged. Not designed to be reliable."""
+		if self.checkup_digest is None:
+			self._init_checkup_digest()
+		# NOTE: this also advances the random number generator, like it always did.
+		# random() returns multiples of 2**-53, the int is exact and the same everywhere.
+		self.checkup_digest.update('rng', self, int(self.session.random.random() * 2 ** 53))
+		return self.checkup_digest.get_subsystem_digests()
+
+	def get_checkup_hash_details(self):
+		"""Returns the checksums of the single objects the checkup hash is made of
+		as {subsystem: {worldid: int}}. Used to find the cause of a divergence."""
+		return self.checkup_digest.get_details()
+
+	def _init_checkup_digest(self):
+		"""Sets up the incrementally updated digest returned by get_checkup_hash.
+		It is only created when needed, which is in multiplayer games."""
 		# NOTE: don't include float values, they are represented differently in python 2.6 and 2.7
 		# and will differ at some insignificant place. Also make sure to handle them correctly in the game logic.
-		data = {
-			'rngvalue': self.session.random.random(),
-			'settlements': [],
-			'ships': [],
-		}
-		for island in self.islands:
-			# dicts usually aren't hashable, this makes them
+		def get_settlement_state(settlement):
 			# since defaultdicts appear, we discard values that can be autogenerated
 			# (those are assumed to default to something evaluating False)
-			dict_hash = lambda d : sorted(i for i in d.iteritems() if i[1])
-			for settlement in island.settlements:
-				storage_dict = settlement.get_component(StorageComponent).inventory._storage
-				entry = {
-					'owner': str(settlement.owner.worldid),
-					'inhabitants': str(settlement.inhabitants),
-					'cumulative_running_costs': str(settlement.cumulative_running_costs),
-					'cumulative_taxes': str(settlement.cumulative_taxes),
-					'inventory': str(dict_hash(storage_dict))
-				}
-				data['settlements'].append(entry)
+			storage_dict = settlement.get_component(StorageComponent).inventory._storage
+			return (settlement.owner.worldid, settlement.inhabitants, settlement.cumulative_running_costs,
+			        settlement.cumulative_taxes, sorted(i for i in storage_dict.iteritems() if i[1]))
+
+		def get_ship_state(ship):
+			return (ship.owner.worldid, ship.position.to_tuple())
+
+		self.checkup_digest = StateDigest()
+		self.checkup_digest.add_subsystem('rng', None)
+		self.checkup_digest.add_subsystem('settlements', get_settlement_state)
+		self.checkup_digest.add_subsystem('ships', get_ship_state)
+		for settlement in self.settlements:
+			self._add_settlement_to_checkup_digest(settlement)
 		for ship in self.ships:
-			entry = {
-				'owner': str(ship.owner.worldid),
-				'position': ship.position.to_tuple(),
-			}
-			data['ships'].append(entry)
-		return data
+			self.checkup_digest.add('ships', ship)
+		NewSettlement.subscribe(self._on_new_settlement)
+
+	def _add_settlement_to_checkup_digest(self, settlement):
+		self.checkup_digest.add('settlements', settlement)
+		settlement.get_component(StorageComponent).inventory.add_change_listener(
+		  Callback(self.checkup_digest.mark_dirty, 'settlements', settlement))
+
+	def _on_new_settlement(self, message):
+		self._add_settlement_to_checkup_digest(message.settlement)
 
 	def toggle_owner_highlight(self):
 		renderer = self.session.view.renderer['InstanceRenderer']
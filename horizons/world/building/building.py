@@ -203,6 +203,12 @@ class BasicBuilding(ComponentHolder, ConcreteObject):
 		"""Upgrades building to another tier"""
 		self.level = lvl
 		self.update_action_set_level(lvl)
+		self._update_settlement_stats()
+
+	def _update_settlement_stats(self):
+		"""Notifies the settlement that economy relevant data of this building changed"""
+		if self.settlement is not None:
+			self.settlement.update_building_stats(self)
 
 	@classmethod
 	def get_initial_level(cls, player):
@@ -19,6 +19,7 @@
 # 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 # ###################################################
 
+from horizons.component.storagecomponent import StorageComponent
 from horizons.messaging import ResourceProduced
 from horizons.world.resourcehandler import ResourceHandler
 from horizons.world.production.producer import Producer
@@ -37,6 +38,7 @@ class BuildingResourceHandler(ResourceHandler):
 
 	def __init(self):
 		self.island.provider_buildings.append(self)
+		self.get_component(StorageComponent).inventory.add_change_listener(self._on_inventory_changed)
 		if self.has_component(Producer):
 			self.get_component(Producer).add_activity_changed_listener(self._set_running_costs_to_status)
 			self.get_component(Producer).add_production_finished_listener(self.on_production_finished)
@@ -47,12 +49,17 @@ class BuildingResourceHandler(ResourceHandler):
 		self.__init()
 
 	def remove(self):
+		self.get_component(StorageComponent).inventory.discard_change_listener(self._on_inventory_changed)
 		super(BuildingResourceHandler, self).remove()
 		self.island.provider_buildings.remove(self)
 		if self.has_component(Producer):
 			self.get_component(Producer).remove_activity_changed_listener(self._set_running_costs_to_status)
 			self.get_component(Producer).remove_production_finished_listener(self.on_production_finished)
 
+	def _on_inventory_changed(self):
+		# idle collectors in range might be able to pick up something now
+		self.island.provider_buildings.provider_changed(self)
+
 	def on_production_finished(self, caller, resources):
 		if self.is_valid_tradable_resource(resources):
 			ResourceProduced.broadcast(self, caller, resources)
@@ -70,9 +77,11 @@ class BuildingResourceHandler(ResourceHandler):
 		current_setting_is_active = self.running_costs_active()
 		if current_setting_is_active and not is_active:
 			self.toggle_costs()
+			self._update_settlement_stats()
 			self._changed()
 		elif not current_setting_is_active and is_active:
 			self.toggle_costs()
+			self._update_settlement_stats()
 			self._changed()
 
 
@@ -70,6 +70,9 @@ class Settler(BuildableRect, BuildingResourceHandler, BasicBuilding):
 		self.last_tax_payed = last_tax_payed
 		UpgradePermissionsChanged.subscribe(self._on_change_upgrade_permissions, sender=self.settlement)
 		self._upgrade_production = None # referenced here for quick access
+		# happiness is derived from the inventory, keep the settlement statistics in sync
+		self.get_component(StorageComponent).inventory.add_change_listener(self._update_settlement_stats)
+		self._update_settlement_stats()
 
 	def initialize(self):
 		super(Settler, self).initialize()
@@ -244,6 +247,7 @@ class Settler(BuildableRect, BuildingResourceHandler, BasicBuilding):
 		# the happiness), we simulate discontent of taxes by this:
 		happiness_decrease -= 6
 		self.get_component(StorageComponent).inventory.alter(RES.HAPPINESS, happiness_decrease)
+		self._update_settlement_stats()
 		self._changed()
 		self.log.debug("%s: pays %s taxes, -happy: %s new happiness: %s", self, real_taxes,
 									 happiness_decrease, self.happiness)
@@ -265,6 +269,7 @@ class Settler(BuildableRect, BuildingResourceHandler, BasicBuilding):
 			self.get_component(Producer).alter_production_time( 6.0/7.0 * math.log( 1.5 * (self.inhabitants + 1.2) ) )
 			self.inhabitants += change
 			SettlerInhabitantsChanged.broadcast(self, change)
+			self._update_settlement_stats()
 			self._changed()
 
 	def can_level_up(self):
@@ -314,6 +319,7 @@ class Settler(BuildableRect, BuildingResourceHandler, BasicBuilding):
 			# reset happiness value for new level
 			new_happiness = self.__get_data("happiness_init_value") - self.happiness
 			self.get_component(StorageComponent).inventory.alter(RES.HAPPINESS, new_happiness)
+			self._update_settlement_stats()
 			self._changed()
 
 		Scheduler().add_new_object(_do_level_up, self, run_in=0)
@@ -333,6 +339,7 @@ class Settler(BuildableRect, BuildingResourceHandler, BasicBuilding):
 			new_happiness = self.__get_data("happiness_init_value") - self.happiness
 			self.get_component(StorageComponent).inventory.alter(RES.HAPPINESS, new_happiness)
 			self.log.debug("%s: Level down to %s", self, self.level)
+			self._update_settlement_stats()
 			self._changed()
 
 			# Notify the world about the level down
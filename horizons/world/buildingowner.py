@@ -20,8 +20,8 @@
 # ###################################################
 
 from horizons.world.providerhandler import ProviderHandler
-from horizons.util.python import decorators
 from horizons.util.shapes import Point, RadiusRect
+from horizons.util.spatialhash import SpatialHash
 
 """
 Simple building management functionality.
@@ -36,6 +36,7 @@ class BuildingOwner(object):
 		super(BuildingOwner, self).__init__(*args, **kwargs)
 		self.provider_buildings = ProviderHandler()
 		self.buildings = []
+		self.building_index = SpatialHash() # buildings by the center of their position
 
 	def add_building(self, building, player, load=False):
 		"""Adds a building to the island at the position x, y with player as the owner.
@@ -47,6 +48,7 @@ class BuildingOwner(object):
 			tile.blocked = True # Set tile blocked
 			tile.object = building # Set tile's object to the building
 		self.buildings.append(building)
+		self.building_index.add(building, building.position.center.to_tuple())
 		building.init()
 		return building
 
@@ -61,6 +63,7 @@ class BuildingOwner(object):
 
 		# Remove this building from the buildings list
 		self.buildings.remove(building)
+		self.building_index.remove(building)
 		assert building not in self.buildings
 
 	def get_settlements(self, rect, player=None):
@@ -103,37 +106,12 @@ class BuildingOwner(object):
 		assert isinstance(point, Point)
 		raise NotImplementedError
 
-	@decorators.make_constants()
 	def get_providers_in_range(self, radiusrect, res=None, reslist=None, player=None):
 		"""Returns all instances of provider within the specified shape.
 		NOTE: Specifing the res parameter is usually a huge speed gain.
-		@param radiusrect: instance of RadiusShape
-		@param res: optional; only return providers that provide res.  conflicts with reslist
-		@param reslist: optionally; list of res to search providers for. conflicts with res
-		@param player: Player instance, only buildings belonging to this player
-		@return: list of providers"""
-		assert not (bool(res) and bool(reslist))
+		@see ProviderHandler.get_providers_in_range"""
 		assert isinstance(radiusrect, RadiusRect)
-		# find out relevant providers
-		if res is not None:
-			provider_list = self.provider_buildings.provider_by_resources[res]
-		elif reslist:
-			provider_list = set()
-			for _res in reslist:
-				provider_list = provider_list.union(self.provider_buildings.provider_by_resources[_res])
-		else:
-			# worst case: search all provider buildings
-			provider_list = self.provider_buildings
-		# filter out those that aren't in range
-		r2 = radiusrect.center
-		radius_squared = radiusrect.radius ** 2
-		for provider in provider_list:
-			if (player is None or player == provider.owner):
-				# inline of :
-				#provider.position.distance_to_rect(radiusrect.center) <= radiusrect.radius:
-				r1 = provider.position
-				if ((max(r1.left - r2.right, 0, r2.left - r1.right) ** 2) + (max(r1.top - r2.bottom, 0, r2.top - r1.bottom) ** 2)) <= radius_squared:
-					yield provider
+		return self.provider_buildings.get_providers_in_range(radiusrect, res=res, reslist=reslist, player=player)
 
 	def save(self, db):
 		for building in self.buildings:
@@ -149,3 +127,4 @@ class BuildingOwner(object):
 				self.buildings[-1].remove()
 		self.provider_buildings = None
 		self.buildings = None
+		self.building_index = None
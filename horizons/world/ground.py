@@ -85,14 +85,23 @@ class SurfaceTile(object):
 
 class Ground(SurfaceTile):
 	"""Default land surface"""
-	pass
+	__slots__ = ()
 
 class Water(SurfaceTile):
 	"""Default water surface"""
 	is_water = True
 	layer = LAYERS.WATER
+	__slots__ = ()
 
 class WaterDummy(Water):
+	"""Sea tile without an instance of its own.
+
+	The world only renders one tile per block of sea, all coordinates of a block share the
+	same WaterDummy. Tiles that have to carry state (e.g. are covered by a fish deposit)
+	get a copy of their own, see World.add_building.
+	"""
+	__slots__ = ()
+
 	def __init__(self, session, x, y):
 		# no super call, we don't have an instance
 		self.x = x
@@ -128,12 +137,14 @@ class GroundClass(type):
 		@param id: ground id.
 		@param shape: ground shape (straight, curve_in, curve_out).
 		"""
+		# tiles only store their per-coordinate state, everything else lives in the class
+		attrs = {'__slots__': ()}
 		if id == GROUND.WATER[0]:
-			return type.__new__(self, 'Ground[%d-%s]' % (id, shape), (Water,), {})
+			return type.__new__(self, 'Ground[%d-%s]' % (id, shape), (Water,), attrs)
 		elif id == -1:
-			return type.__new__(self, 'Ground[%d-%s]' % (id, shape), (WaterDummy,), {})
+			return type.__new__(self, 'Ground[%d-%s]' % (id, shape), (WaterDummy,), attrs)
 		else:
-			return type.__new__(self, 'Ground[%d-%s]' % (id, shape), (Ground,), {})
+			return type.__new__(self, 'Ground[%d-%s]' % (id, shape), (Ground,), attrs)
 
 	def _loadObject(cls, db):
 		"""Loads the ground object from the db (animations, etc)"""
@@ -24,7 +24,7 @@ import collections
 import horizons.main
 
 from horizons.constants import PLAYER
-from horizons.world.playerstats import PlayerStats
+from horizons.world.playerstats import PlayerStats, PlayerStatsTracker
 from horizons.util.color import Color
 from horizons.util.difficultysettings import DifficultySettings
 from horizons.util.inventorychecker import InventoryChecker
@@ -82,6 +82,7 @@ class Player(ComponentHolder, WorldObject):
 		self.max_tier_notification = max_tier_notification
 		self.settler_level = settlerlevel
 		self._stats = None
+		self.stats_tracker = None # created on demand, see get_stats_tracker
 		assert self.color.is_default_color, "Player color has to be a default color"
 
 		if self.regular_player:
@@ -96,6 +97,13 @@ class Player(ComponentHolder, WorldObject):
 			self._stats = PlayerStats(self)
 		return self._stats
 
+	def get_stats_tracker(self):
+		"""Returns the PlayerStatsTracker of this player.
+		It is only created once it is needed, since keeping it up to date isn't free."""
+		if self.stats_tracker is None:
+			self.stats_tracker = PlayerStatsTracker(self)
+		return self.stats_tracker
+
 	@property
 	def settlements(self):
 		"""Calculate settlements dynamically to save having a redundant list here"""
@@ -141,6 +149,9 @@ class Player(ComponentHolder, WorldObject):
 
 	def end(self):
 		self._stats = None
+		if self.stats_tracker is not None:
+			self.stats_tracker.end()
+			self.stats_tracker = None
 		self.session = None
 
 		if self.regular_player:
@@ -24,6 +24,7 @@ import math
 from collections import defaultdict
 
 from horizons.util.worldobject import WorldObject
+from horizons.util.python.callback import Callback
 from horizons.entities import Entities
 from horizons.constants import TIER, BUILDINGS, PRODUCTION, RES, UNITS
 from horizons.util.python import decorators
@@ -31,85 +32,225 @@ from horizons.component.collectingcomponent import CollectingComponent
 from horizons.component.storagecomponent import StorageComponent
 from horizons.component.selectablecomponent import SelectableComponent
 from horizons.world.production.producer import Producer
+from horizons.messaging import SettlementRangeChanged
 from horizons.scheduler import Scheduler
 
-class PlayerStats(WorldObject):
+class PlayerStatsTracker(object):
+	"""Maintains the data the player statistics are calculated from.
+
+	Buildings are registered by their settlements. Changes to them (inventory
+	changes, production state changes, settler updates) only mark the building
+	as dirty, its contribution is recalculated the next time the data is requested.
+	Settlement and ship inventories, collectors and settlement land are cheap to
+	update, since there are few of them or they only grow.
+	"""
+
+	# the contents of these buildings are available to the player, they are part of the settlement inventory
+	storage_buildings = (BUILDINGS.WAREHOUSE, BUILDINGS.STORAGE, BUILDINGS.MAIN_SQUARE)
+
 	def __init__(self, player):
-		super(PlayerStats, self).__init__()
+		super(PlayerStatsTracker, self).__init__()
 		self.player = player
-		self.db = player.session.db
-		self._collect_info()
-		self.collection_tick = Scheduler().cur_tick
+		self._records = {} # building: (resources, settler data), see _get_record
+		self._dirty = set()
+		self._buildings = defaultdict(int) # building id: number
+		self._collecting_buildings = set()
+		self._resources = defaultdict(int) # resource id: amount held in buildings
+		self._settlers = defaultdict(int) # level: inhabitants
+		self._settler_buildings = defaultdict(int) # level: number
+		# resource id: {(happiness, production time): number of producing productions}
+		self._settler_productions = defaultdict(lambda: defaultdict(int))
+		self._usable_land = {} # settlement: number of constructible tiles
 
-	def _collect_info(self):
-		settlers = defaultdict(lambda: 0)
-		settler_buildings = defaultdict(lambda: 0)
+		SettlementRangeChanged.subscribe(self._on_settlement_range_changed)
+		for settlement in self.player.settlements:
+			for building in settlement.buildings:
+				self.add_building(building)
+
+	def end(self):
+		SettlementRangeChanged.discard(self._on_settlement_range_changed)
+		self.player = None
+		self._records.clear()
+		self._dirty.clear()
+		self._collecting_buildings.clear()
+		self._usable_land.clear()
+
+	def add_building(self, building):
+		"""Called when a building has been added to a settlement of the player"""
+		self._buildings[building.id] += 1
+		if building.has_component(CollectingComponent):
+			self._collecting_buildings.add(building)
+
+		callback = Callback(self._mark_dirty, building)
+		building.add_change_listener(callback, no_duplicates=True)
+		if self._has_tracked_inventory(building):
+			building.get_component(StorageComponent).inventory.add_change_listener(callback, no_duplicates=True)
+		self._records[building] = (None, None)
+		self._dirty.add(building)
+
+	def remove_building(self, building):
+		"""Called when a building has been removed from a settlement of the player"""
+		self._buildings[building.id] -= 1
+		self._collecting_buildings.discard(building)
+
+		callback = Callback(self._mark_dirty, building)
+		building.discard_change_listener(callback)
+		if self._has_tracked_inventory(building):
+			building.get_component(StorageComponent).inventory.discard_change_listener(callback)
+		if building.id == BUILDINGS.RESIDENTIAL:
+			for production in building.get_component(Producer).get_productions():
+				production.discard_change_listener(callback)
+		self._apply_record(self._records.pop(building), -1)
+		self._dirty.discard(building)
+
+	def _mark_dirty(self, building):
+		self._dirty.add(building)
+
+	@classmethod
+	def _has_tracked_inventory(cls, building):
+		return building.has_component(StorageComponent) and building.id not in cls.storage_buildings
+
+	def _get_record(self, building):
+		"""Returns the contribution of a building to the statistics.
+		@return: tuple (resources, settler data), both may be None"""
+		resources = None
+		if self._has_tracked_inventory(building):
+			resources = tuple(building.get_component(StorageComponent).inventory.itercontents())
+
+		settler = None
+		if building.id == BUILDINGS.RESIDENTIAL:
+			callback = Callback(self._mark_dirty, building)
+			productions = []
+			for production in building.get_component(Producer).get_productions():
+				# productions come and go with the settler level, make sure we hear about all of them
+				production.add_change_listener(callback, no_duplicates=True)
+				if production.get_state() is PRODUCTION.STATES.producing:
+					produced_resources = production.get_produced_resources()
+					if RES.HAPPINESS in produced_resources:
+						key = (produced_resources[RES.HAPPINESS], production.get_production_time())
+						for resource_id in production.get_consumed_resources():
+							productions.append((resource_id, key))
+			settler = (building.level, building.inhabitants, tuple(productions))
+		return (resources, settler)
+
+	def _apply_record(self, record, sign):
+		resources, settler = record
+		if resources is not None:
+			for resource_id, amount in resources:
+				self._resources[resource_id] += sign * amount
+		if settler is not None:
+			level, inhabitants, productions = settler
+			self._settlers[level] += sign * inhabitants
+			self._settler_buildings[level] += sign
+			for resource_id, key in productions:
+				self._settler_productions[resource_id][key] += sign
+
+	def _update(self):
+		"""Recalculates the contributions of all buildings that have changed"""
+		for building in self._dirty:
+			record = self._get_record(building)
+			if record != self._records[building]:
+				self._apply_record(self._records[building], -1)
+				self._apply_record(record, 1)
+				self._records[building] = record
+		self._dirty.clear()
+
+	def _on_settlement_range_changed(self, message):
+		settlement = message.sender
+		if settlement in self._usable_land:
+			self._usable_land[settlement] += self._count_usable_land(message.changed_tiles)
+
+	@classmethod
+	def _count_usable_land(cls, tiles):
+		"""Returns the number of tiles that could be built on (the building on it may need to be destroyed first)"""
+		return sum(1 for tile in tiles if 'constructible' in tile.classes)
+
+	def get_buildings(self):
+		"""Returns {building id: number} of the buildings in the settlements of the player"""
+		return dict((building_id, amount) for building_id, amount in self._buildings.iteritems() if amount)
+
+	def get_settler_data(self):
+		"""Returns a tuple (settlers, settler_buildings, settler_resources_provided)
+		where settlers and settler_buildings map level to the number of inhabitants or buildings
+		and settler_resources_provided maps resources to the happiness they currently provide."""
+		self._update()
+		settlers = dict((level, number) for level, number in self._settlers.iteritems() if number)
+		settler_buildings = dict((level, number) for level, number in self._settler_buildings.iteritems() if number)
 		settler_resources_provided = defaultdict(lambda: 0)
-		buildings = defaultdict(lambda: 0)
+		for resource_id, productions in self._settler_productions.iteritems():
+			for (happiness, production_time), number in productions.iteritems():
+				if number:
+					settler_resources_provided[resource_id] += number * (happiness / production_time)
+		return settlers, settler_buildings, settler_resources_provided
+
+	def get_resources(self):
+		"""Returns a tuple (available_resources, total_resources) of {resource id: amount}
+		dicts. Available resources can be used by the player, total resources also include
+		the ones held in production buildings and collectors."""
+		self._update()
 		available_resources = defaultdict(lambda: 0)
 		total_resources = defaultdict(lambda: 0)
-		ships = defaultdict(lambda: 0)
-		running_costs = 0
-		taxes = 0
-		usable_land = 0
-		settlements = 0
+		for resource_id, amount in self._resources.iteritems():
+			if amount:
+				total_resources[resource_id] += amount
+
+		for building in self._collecting_buildings:
+			for collector in building.get_component(CollectingComponent).get_local_collectors():
+				for resource_id, amount in collector.get_component(StorageComponent).inventory.itercontents():
+					total_resources[resource_id] += amount
 
 		for settlement in self.player.settlements:
-			for building in settlement.buildings:
-				buildings[building.id] += 1
-
-				# collect info about settlers
-				if building.id == BUILDINGS.RESIDENTIAL:
-					settlers[building.level] += building.inhabitants
-					settler_buildings[building.level] += 1
-					for production in building.get_component(Producer).get_productions():
-						if production.get_state() is PRODUCTION.STATES.producing:
-							produced_resources = production.get_produced_resources()
-							if RES.HAPPINESS in produced_resources:
-								happiness = produced_resources[RES.HAPPINESS]
-								for resource_id in production.get_consumed_resources():
-									settler_resources_provided[resource_id] += happiness / production.get_production_time()
-
-				# resources held in buildings
-				if building.has_component(StorageComponent) and building.id not in [BUILDINGS.WAREHOUSE, BUILDINGS.STORAGE, BUILDINGS.MAIN_SQUARE]:
-					for resource_id, amount in building.get_component(StorageComponent).inventory.itercontents():
-						total_resources[resource_id] += amount
-
-				# resources held by collectors
-				if building.has_component(CollectingComponent):
-					for collector in building.get_component(CollectingComponent).get_local_collectors():
-						for resource_id, amount in collector.get_component(StorageComponent).inventory.itercontents():
-							total_resources[resource_id] += amount
-
-			# resources in settlement inventories
 			for resource_id, amount in settlement.get_component(StorageComponent).inventory.itercontents():
 				available_resources[resource_id] += amount
 
-			# land that could be built on (the building on it may need to be destroyed first)
-			for tile in settlement.ground_map.itervalues():
-				if 'constructible' in tile.classes:
-					usable_land += 1
+		# resources in player controlled ships
+		for ship in self.player.session.world.ships:
+			if ship.owner is self.player and ship.has_component(SelectableComponent):
+				for resource_id, amount in ship.get_component(StorageComponent).inventory.itercontents():
+					available_resources[resource_id] += amount
 
-			settlements += 1
-			running_costs += settlement.cumulative_running_costs
-			taxes += settlement.cumulative_taxes
+		for resource_id, amount in available_resources.iteritems():
+			total_resources[resource_id] += amount
+		return available_resources, total_resources
 
-		# resources in player controlled ships
+	def get_ships(self):
+		"""Returns {unit id: number} of the ships of the player"""
+		ships = defaultdict(lambda: 0)
 		for ship in self.player.session.world.ships:
 			if ship.owner is self.player:
 				ships[ship.id] += 1
-				if ship.has_component(SelectableComponent):
-					for resource_id, amount in ship.get_component(StorageComponent).inventory.itercontents():
-						available_resources[resource_id] += amount
+		return ships
 
-		for resource_id, amount in available_resources.iteritems():
-			total_resources[resource_id] += amount
+	def get_usable_land(self):
+		"""Returns the number of tiles in the settlements of the player that could be built on"""
+		total = 0
+		for settlement in self.player.settlements:
+			if settlement not in self._usable_land:
+				self._usable_land[settlement] = self._count_usable_land(settlement.ground_map.itervalues())
+			total += self._usable_land[settlement]
+		return total
+
+
+class PlayerStats(WorldObject):
+	def __init__(self, player):
+		super(PlayerStats, self).__init__()
+		self.player = player
+		self.db = player.session.db
+		self._collect_info()
+		self.collection_tick = Scheduler().cur_tick
+
+	def _collect_info(self):
+		tracker = self.player.get_stats_tracker()
+		settlements = self.player.settlements
+		running_costs = sum(settlement.cumulative_running_costs for settlement in settlements)
+		taxes = sum(settlement.cumulative_taxes for settlement in settlements)
+		available_resources, total_resources = tracker.get_resources()
 
-		self._calculate_settler_score(settlers, settler_buildings, settler_resources_provided)
-		self._calculate_building_score(buildings)
+		self._calculate_settler_score(*tracker.get_settler_data())
+		self._calculate_building_score(tracker.get_buildings())
 		self._calculate_resource_score(available_resources, total_resources)
-		self._calculate_unit_score(ships)
-		self._calculate_land_score(usable_land, settlements)
+		self._calculate_unit_score(tracker.get_ships())
+		self._calculate_land_score(tracker.get_usable_land(), len(settlements))
 		self._calculate_money_score(running_costs, taxes, self.player.get_component(StorageComponent).inventory[RES.GOLD])
 		self._calculate_total_score()
 
@@ -209,4 +350,5 @@ class PlayerStats(WorldObject):
 	def _calculate_total_score(self):
 		self.total_score = self.settler_score + self.building_score + self.resource_score + self.unit_score + self.land_score + self.money_score
 
+decorators.bind_all(PlayerStatsTracker)
 decorators.bind_all(PlayerStats)
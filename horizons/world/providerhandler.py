@@ -20,30 +20,154 @@
 # 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 # ###################################################
 
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 
-class ProviderHandler(list):
+from horizons.util.spatialhash import SpatialHash
+
+class ProviderHandler(object):
 	"""Class to keep track of providers of an area, especially an island.
 	It acts as a data structure for quick retrieval of special properties, that only resource
-	providers have.
+	providers have. Iterating over it yields all providers in the order they were added.
+
+	Providers are indexed spatially per resource for get_providers_in_range.
+
+	It also keeps the idle collectors that wait for a job at the providers, they are woken up
+	when a provider in their range changes (see provider_changed).
 
 	Precondition: Provider never change their provided resources."""
 
 	def __init__(self):
 		super(ProviderHandler, self).__init__()
-		self.provider_by_resources = defaultdict(list)
+		self._providers = OrderedDict() # provider -> number, in the order they were added
+		self._next_provider_number = 0
+		# res -> providers of res, iterating yields them in the order they were added
+		self.provider_by_resources = defaultdict(OrderedDict)
+		# spatial indices of the providers by their center: all of them and by res
+		self._provider_index = SpatialHash()
+		self._provider_index_by_res = defaultdict(SpatialHash)
+		# providers are indexed by their center, queries have to look further to find big ones
+		self._max_provider_size = 0
+		self._waiting_collectors = {} # collector -> (number, radiusrect, reslist, player)
+		self._waiting_collectors_by_res = {} # res -> set of collectors
+		self._next_waiting_number = 0
 
 	def append(self, provider):
 		# NOTE: appended elements need to be removed, else there will be a memory leak
+		assert provider not in self._providers
+		self._providers[provider] = self._next_provider_number
+		self._next_provider_number += 1
+		position = provider.position
+		self._max_provider_size = max(self._max_provider_size, position.width, position.height)
+		center = position.center.to_tuple()
+		self._provider_index.add(provider, center)
 		for res in provider.provided_resources:
-			self.provider_by_resources[res].append(provider)
-		super(ProviderHandler, self).append(provider)
+			self.provider_by_resources[res][provider] = None
+			self._provider_index_by_res[res].add(provider, center)
 
 	def remove(self, provider):
+		del self._providers[provider]
+		self._provider_index.remove(provider)
 		for res in provider.provided_resources:
-			self.provider_by_resources[res].remove(provider)
-		super(ProviderHandler, self).remove(provider)
+			del self.provider_by_resources[res][provider]
+			self._provider_index_by_res[res].remove(provider)
+
+	def __iter__(self):
+		return iter(self._providers)
+
+	def __len__(self):
+		return len(self._providers)
+
+	def __contains__(self, provider):
+		return provider in self._providers
 
+	def get_providers_in_range(self, radiusrect, res=None, reslist=None, player=None):
+		"""Returns all providers within the specified shape, in the order they were added.
+		@param radiusrect: instance of RadiusRect
+		@param res: optional; only return providers that provide res. conflicts with reslist
+		@param reslist: optionally; list of res to search providers for. conflicts with res
+		@param player: Player instance, only buildings belonging to this player
+		@return: list of providers"""
+		assert not (bool(res) and bool(reslist))
+		r2 = radiusrect.center
+		radius = radiusrect.radius
+		distance = radius + self._max_provider_size
+		bounds = (r2.left - distance, r2.top - distance, r2.right + distance, r2.bottom + distance)
 
+		# find out relevant providers
+		if res is not None:
+			reslist = (res, )
+		if not reslist:
+			# worst case: search all provider buildings
+			candidates = self._provider_index.get_objects_in_rect(*bounds)
+		else:
+			indices = [self._provider_index_by_res[_res] for _res in reslist if _res in self._provider_index_by_res]
+			if len(indices) == 1:
+				candidates = indices[0].get_objects_in_rect(*bounds)
+			else:
+				candidates = set()
+				for index in indices:
+					candidates.update(index.get_objects_in_rect(*bounds))
+				candidates = sorted(candidates, key=self._providers.__getitem__)
+
+		# filter out those that aren't in range
+		radius_squared = radius ** 2
+		providers = []
+		for provider in candidates:
+			if (player is None or player == provider.owner):
+				# inline of :
+				#provider.position.distance_to_rect(radiusrect.center) <= radiusrect.radius:
+				r1 = provider.position
+				if ((max(r1.left - r2.right, 0, r2.left - r1.right) ** 2) + (max(r1.top - r2.bottom, 0, r2.top - r1.bottom) ** 2)) <= radius_squared:
+					providers.append(provider)
+		return providers
+
+	def add_waiting_collector(self, collector, radiusrect, reslist, player=None):
+		"""Registers an idle collector. It is woken up when a provider of a res in reslist
+		changes within radiusrect.
+		@param collector: BuildingCollector, has to be removed again via remove_waiting_collector
+		@param radiusrect: RadiusRect, where the collector searches for providers
+		@param reslist: list of res the collector wants to pick up
+		@param player: Player instance, only wake up for providers of this player"""
+		assert collector not in self._waiting_collectors
+		self._waiting_collectors[collector] = (self._next_waiting_number, radiusrect, reslist, player)
+		self._next_waiting_number += 1
+		for res in reslist:
+			self._waiting_collectors_by_res.setdefault(res, set()).add(collector)
+
+	def remove_waiting_collector(self, collector):
+		number, radiusrect, reslist, player = self._waiting_collectors.pop(collector)
+		for res in reslist:
+			collectors = self._waiting_collectors_by_res[res]
+			collectors.discard(collector)
+			if not collectors:
+				del self._waiting_collectors_by_res[res]
+
+	def provider_changed(self, provider):
+		"""Wakes up the waiting collectors that have provider in range. Has to be called
+		when the inventory of a provider changes."""
+		if not self._waiting_collectors_by_res:
+			return
+		collectors = set()
+		for res in provider.provided_resources:
+			if res in self._waiting_collectors_by_res:
+				collectors.update(self._waiting_collectors_by_res[res])
+		if not collectors:
+			return
 
+		in_range = []
+		r1 = provider.position
+		for collector in collectors:
+			number, r2, reslist, player = self._waiting_collectors[collector]
+			if player is not None and player != provider.owner:
+				continue
+			# same check as in BuildingOwner.get_providers_in_range
+			c = r2.center
+			if ((max(r1.left - c.right, 0, c.left - r1.right) ** 2) +
+			    (max(r1.top - c.bottom, 0, c.top - r1.bottom) ** 2)) <= r2.radius ** 2:
+				in_range.append((number, collector))
 
+		# the collector that has been waiting the longest gets the first chance. waking up
+		# also schedules calls, which has to happen in the same order on every machine.
+		in_range.sort()
+		for number, collector in in_range:
+			collector.wake_up(provider)
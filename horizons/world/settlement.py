@@ -69,6 +69,12 @@ class Settlement(ComponentHolder, WorldObject, ChangeListener, ResourceHandler):
 		self.warehouse = None # this is set later in the same tick by the warehouse itself or load() here
 		self.upgrade_permissions = upgrade_permissions
 		self.tax_settings = tax_settings
+		# economy aggregates, kept up to date by add_building, remove_building and update_building_stats
+		self._building_stats = {} # building: (inhabitants, running costs, taxes, level, happiness)
+		self._inhabitants = 0
+		self._running_costs = 0
+		self._taxes = 0
+		self._happiness_by_level = defaultdict(lambda : defaultdict(int)) # level: {happiness: count}
 		Scheduler().add_new_object(self.__init_inventory_checker, self)
 
 	def init_buildability_cache(self, terrain_cache):
@@ -102,24 +108,61 @@ class Settlement(ComponentHolder, WorldObject, ChangeListener, ResourceHandler):
 	@property
 	def inhabitants(self):
 		"""Returns number of inhabitants (sum of inhabitants of its buildings)"""
-		return sum([building.inhabitants for building in self.buildings])
+		return self._inhabitants
 
 	@property
 	def cumulative_running_costs(self):
 		"""Return sum of running costs of all buildings"""
-		return sum([building.running_costs for building in self.buildings])
+		return self._running_costs
 
 	@property
 	def cumulative_taxes(self):
 		"""Return sum of all taxes payed in this settlement in 1 tax round"""
-		return sum([building.last_tax_payed for building in self.buildings if
-								hasattr(building, 'last_tax_payed')])
+		return self._taxes
 
 	def get_residentials_of_lvl_for_happiness(self, level, min_happiness=0, max_happiness=101):
-		is_valid_residential = lambda building: (hasattr(building, 'happiness') and
-		                                         min_happiness <= building.happiness < max_happiness) and \
-		                                        (hasattr(building, 'level') and building.level == level)
-		return len(filter(is_valid_residential, self.buildings))
+		if level not in self._happiness_by_level:
+			return 0
+		return sum(count for happiness, count in self._happiness_by_level[level].iteritems()
+		           if min_happiness <= happiness < max_happiness)
+
+	@classmethod
+	def _get_building_stats(cls, building):
+		"""Returns the contribution of a building to the economy aggregates of its settlement"""
+		happiness = building.happiness if hasattr(building, 'happiness') else None
+		return (building.inhabitants, building.running_costs,
+		        getattr(building, 'last_tax_payed', 0), building.level, happiness)
+
+	def _apply_building_stats(self, stats, sign):
+		inhabitants, running_costs, taxes, level, happiness = stats
+		self._inhabitants += sign * inhabitants
+		self._running_costs += sign * running_costs
+		self._taxes += sign * taxes
+		if happiness is not None:
+			by_happiness = self._happiness_by_level[level]
+			by_happiness[happiness] += sign
+			if by_happiness[happiness] == 0:
+				del by_happiness[happiness]
+
+	def update_building_stats(self, building):
+		"""Has to be called when the inhabitants, running costs, taxes, level or happiness
+		of a building of this settlement change. Buildings that don't belong to the
+		settlement (yet) are ignored."""
+		old_stats = self._building_stats.get(building)
+		if old_stats is None:
+			return
+		new_stats = self._get_building_stats(building)
+		if new_stats != old_stats:
+			self._apply_building_stats(old_stats, -1)
+			self._apply_building_stats(new_stats, 1)
+			self._building_stats[building] = new_stats
+			self._mark_checkup_dirty()
+
+	def _mark_checkup_dirty(self):
+		"""Makes the multiplayer checkup hash notice that the aggregates have changed"""
+		checkup_digest = self.session.world.checkup_digest
+		if checkup_digest is not None:
+			checkup_digest.mark_dirty('settlements', self)
 
 	@property
 	def balance(self):
@@ -207,6 +250,10 @@ class Settlement(ComponentHolder, WorldObject, ChangeListener, ResourceHandler):
 		@see Island.add_building
 		"""
 		self.buildings.append(building)
+		stats = self._get_building_stats(building)
+		self._building_stats[building] = stats
+		self._apply_building_stats(stats, 1)
+		self._mark_checkup_dirty()
 		if building.id in self.buildings_by_id:
 			self.buildings_by_id[building.id].append(building)
 		else:
@@ -218,10 +265,15 @@ class Settlement(ComponentHolder, WorldObject, ChangeListener, ResourceHandler):
 		if hasattr(self.owner, 'add_building'):
 			# notify interested players of added building
 			self.owner.add_building(building)
+		stats_tracker = getattr(self.owner, 'stats_tracker', None)
+		if stats_tracker is not None:
+			stats_tracker.add_building(building)
 
 	def remove_building(self, building):
 		"""Properly removes a building from the settlement"""
 		self.buildings.remove(building)
+		self._apply_building_stats(self._building_stats.pop(building), -1)
+		self._mark_checkup_dirty()
 		self.buildings_by_id[building.id].remove(building)
 		if building.has_component(Producer) and not building.has_component(UnitProducer):
 			building.get_component(Producer).remove_production_finished_listener(self.settlement_building_production_finished)
@@ -230,6 +282,9 @@ class Settlement(ComponentHolder, WorldObject, ChangeListener, ResourceHandler):
 		if hasattr(self.owner, 'remove_building'):
 			# notify interested players of removed building
 			self.owner.remove_building(building)
+		stats_tracker = getattr(self.owner, 'stats_tracker', None)
+		if stats_tracker is not None:
+			stats_tracker.remove_building(building)
 
 	def count_buildings(self, id):
 		"""Returns the number of buildings in the settlement that are of the given type."""
@@ -252,6 +307,8 @@ class Settlement(ComponentHolder, WorldObject, ChangeListener, ResourceHandler):
 		self.ground_map = None
 		self.produced_res = None
 		self.buildings_by_id = None
+		self._building_stats = None
+		self._happiness_by_level = None
 		self.warehouse = None
 		if hasattr(self, '__inventory_checker'):
 			self.__inventory_checker.remove()
@@ -287,6 +287,7 @@ class FarmAnimal(CollectorAnimal, BuildingCollector):
 	"""
 	job_ordering = JobList.order_by.random
 	grazingTime = 2
+	wait_for_job_changes = False # we walk around on the field instead
 
 	def __init__(self, home_building, start_hidden=False, **kwargs):
 		super(FarmAnimal, self).__init__(home_building = home_building,
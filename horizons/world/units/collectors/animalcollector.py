@@ -40,6 +40,7 @@ class AnimalCollector(BuildingCollector):
 	 - release animal
 	 """
 	kill_animal = False # whether we kill the animals
+	wait_for_job_changes = False # animals aren't providers
 
 	def __init__(self, *args, **kwargs):
 		super(AnimalCollector, self).__init__(*args, **kwargs)
@@ -46,6 +46,9 @@ class BuildingCollector(Collector):
 	"""
 	job_ordering = JobList.order_by.fewest_available_and_distance
 	pather_class = BuildingCollectorPather
+	# whether idle collectors are woken up by changes at the providers in range instead of
+	# polling for jobs. Only possible if all job targets are providers, see get_job_search_area.
+	wait_for_job_changes = True
 
 	def __init__(self, home_building, **kwargs):
 		kwargs['x'] = home_building.position.origin.x
@@ -62,6 +65,11 @@ class BuildingCollector(Collector):
 		# save whether it's possible for this instance to access a target
 		# @chachedmethod is not applicable since it stores hard refs in the arguments
 		self._target_possible_cache = weakref.WeakKeyDictionary()
+		# (ProviderHandler, home inventory or None) while waiting for changes, see _wait_for_job
+		self._waiting_at = None
+		self._failed_job_searches = 0
+		self._last_job_search_tick = None
+		self._job_targets_unreachable = False
 
 	def save(self, db):
 		super(BuildingCollector, self).save(db)
@@ -120,8 +128,12 @@ class BuildingCollector(Collector):
 			self.add_move_callback(self.reached_home)
 			self.add_blocked_callback(self.handle_path_home_blocked)
 			self.show()
+		elif state == self.states.idle and self.wait_for_job_changes and self.home_building is not None:
+			# the next search has been scheduled by super() already
+			self._resume_waiting_for_job(remaining_ticks)
 
 	def remove(self):
+		self._stop_waiting_for_job()
 		self.register_at_home_building(unregister=True)
 		self.home_building = None
 		super(BuildingCollector, self).remove()
@@ -130,6 +142,7 @@ class BuildingCollector(Collector):
 		"""Makes collector survive deletion of home building."""
 		self.cancel(continue_action=lambda : 42) # don't continue
 		self.stop()
+		self._stop_waiting_for_job()
 		self.register_at_home_building(unregister=True)
 		self.home_building = None
 		self.state = self.states.decommissioned
@@ -156,12 +169,7 @@ class BuildingCollector(Collector):
 		# iterate all building that provide one of the resources
 		for building in self.get_buildings_in_range(reslist=collectable_res):
 			# check if we can pickup here on principle
-			target_possible = self._target_possible_cache.get(building, None)
-			if target_possible is None: # not in cache, we have to check
-				target_possible = self.check_possible_job_target(building)
-				self._target_possible_cache[building] = target_possible
-
-			if target_possible:
+			if self._is_possible_job_target(building):
 				# check for res here
 				reslist = ( self.check_possible_job_target_for(building, res) for res in collectable_res )
 				reslist = [i for i in reslist if i]
@@ -169,26 +177,107 @@ class BuildingCollector(Collector):
 				if reslist: # we can do something here
 					jobs.append( Job(building, reslist) )
 
-		# TODO: find out why order of  self.get_buildings_in_range(..) and therefore order of jobs differs from client to client
-		# TODO: find out why WildAnimal.get_job(..) doesn't have this problem
-		# for MP-Games the jobs must have the same ordering to ensure get_best_possible_job(..) returns the same result
+		# for MP-Games the jobs must have the same ordering to ensure get_best_possible_job(..) returns the same result.
+		# get_buildings_in_range(..) is deterministic, but its order depends on when the providers were added,
+		# which is different after loading a game.
 		jobs.sort(key=lambda job: job.object.worldid)
 
-		return self.get_best_possible_job(jobs)
+		job = self.get_best_possible_job(jobs)
+		# there are jobs, but we can't get there. changes at the providers won't help then.
+		self._job_targets_unreachable = job is None and bool(jobs)
+		return job
+
+	def _is_possible_job_target(self, building):
+		target_possible = self._target_possible_cache.get(building, None)
+		if target_possible is None: # not in cache, we have to check
+			target_possible = self.check_possible_job_target(building)
+			self._target_possible_cache[building] = target_possible
+		return target_possible
 
 	def search_job(self):
+		self._stop_waiting_for_job()
 		self._clean_job_history_log()
+		self._last_job_search_tick = Scheduler().cur_tick
+		self._job_targets_unreachable = False
 		super(BuildingCollector, self).search_job()
 
 
 	def handle_no_possible_job(self):
-		super(BuildingCollector, self).handle_no_possible_job()
+		if self.wait_for_job_changes and self.home_building is not None and \
+		   not self._job_targets_unreachable:
+			self._wait_for_job()
+		else:
+			super(BuildingCollector, self).handle_no_possible_job()
 		# only append a new element if it is different from the last one
 		if not self._job_history or abs(self._job_history[-1][1]) > 1e-9:
 			self._job_history.append((Scheduler().cur_tick, 0))
 
+	def _wait_for_job(self):
+		"""Waits for changes that could make a job possible instead of polling.
+		Changes at providers in range and at the inventory of the home building wake the
+		collector up. In case something else changes (e.g. a new road), there is another
+		search after a timeout, which grows with every unsuccessful search."""
+		wait_ticks = min(COLLECTORS.DEFAULT_WAIT_TICKS * 2 ** self._failed_job_searches,
+		                 COLLECTORS.MAX_WAIT_TICKS)
+		if wait_ticks < COLLECTORS.MAX_WAIT_TICKS:
+			self._failed_job_searches += 1
+		self.log.debug("%s: found no possible job, waiting for changes, at most %s ticks", self, wait_ticks)
+		Scheduler().add_new_object(self.search_job, self, wait_ticks)
+		self._register_waiting_for_job()
+
+	def _resume_waiting_for_job(self, remaining_ticks):
+		"""Waits for changes again after loading, the search after the timeout is already scheduled.
+		Only the remaining ticks are saved, the number of failed searches and the tick of the last
+		search are reconstructed from them like _wait_for_job computed them."""
+		wait_ticks = COLLECTORS.DEFAULT_WAIT_TICKS
+		self._failed_job_searches = 0
+		while wait_ticks < remaining_ticks and wait_ticks < COLLECTORS.MAX_WAIT_TICKS:
+			wait_ticks *= 2
+			self._failed_job_searches += 1
+		if wait_ticks < COLLECTORS.MAX_WAIT_TICKS:
+			self._failed_job_searches += 1
+		self._last_job_search_tick = Scheduler().cur_tick - (wait_ticks - remaining_ticks)
+		self._register_waiting_for_job()
+
+	def _register_waiting_for_job(self):
+		owner, reach, player = self.get_job_search_area()
+		providers = owner.provider_buildings
+		providers.add_waiting_collector(self, reach, self.get_collectable_res(), player)
+		# storage buildings share the settlement inventory, it changes all the time
+		home_inventory = None
+		if self.home_building.get_component(StorageComponent).has_own_inventory:
+			home_inventory = self.get_home_inventory()
+			home_inventory.add_change_listener(self.wake_up)
+		self._waiting_at = (providers, home_inventory)
+
+	def _stop_waiting_for_job(self):
+		if self._waiting_at is None:
+			return
+		providers, home_inventory = self._waiting_at
+		providers.remove_waiting_collector(self)
+		if home_inventory is not None:
+			home_inventory.discard_change_listener(self.wake_up)
+		self._waiting_at = None
+
+	def wake_up(self, provider=None):
+		"""Called when a job might have become possible while waiting for one.
+		@param provider: the provider in range that changed, None if the home inventory changed"""
+		if self._waiting_at is None:
+			return
+		if provider is not None:
+			if not self._is_possible_job_target(provider):
+				return
+			if not any(provider.get_available_pickup_amount(res, self) > 0 for res in self.get_collectable_res()):
+				return
+		self._stop_waiting_for_job()
+		# don't search more often than polling collectors do
+		run_in = max(self._last_job_search_tick + COLLECTORS.DEFAULT_WAIT_TICKS - Scheduler().cur_tick, 1)
+		Scheduler().rem_call(self, self.search_job)
+		Scheduler().add_new_object(self.search_job, self, run_in)
+
 	def begin_current_job(self, job_location=None):
 		super(BuildingCollector, self).begin_current_job(job_location)
+		self._failed_job_searches = 0
 		# Sum up the utilization for all res
 		utilization = 0.0
 		for entry in self.job.reslist:
@@ -225,13 +314,18 @@ class BuildingCollector(Collector):
 		# find needed res (only res that we have free room for) - Building function
 		return self.home_building.get_needed_resources()
 
+	def get_job_search_area(self):
+		"""Returns where to look for job targets.
+		@return: tuple (BuildingOwner with the providers, RadiusRect, Player instance or None)"""
+		reach = RadiusRect(self.home_building.position, self.home_building.radius)
+		return (self.home_building.island, reach, self.owner)
+
 	def get_buildings_in_range(self, reslist=None):
 		"""Returns all buildings in range .
 		Overwrite in subclasses that need ranges around the pickup.
 		@param res: optional, only search for buildings that provide res"""
-		reach = RadiusRect(self.home_building.position, self.home_building.radius)
-		return self.home_building.island.get_providers_in_range(reach, reslist=reslist,
-								                                            player=self.owner)
+		owner, reach, player = self.get_job_search_area()
+		return owner.get_providers_in_range(reach, reslist=reslist, player=player)
 
 	def handle_path_home_blocked(self):
 		"""Called when we get blocked while trying to move to the job location. """
@@ -356,16 +450,17 @@ class FisherShipCollector(BuildingCollector):
 
 		return smallest_fisher
 
-	def get_buildings_in_range(self, reslist=None):
-		"""Returns all buildings in range .
-		Overwrite in subclasses that need ranges around the pickup.
-		@param res: optional, only search for buildings that provide res"""
+	def get_job_search_area(self):
+		# fish belongs to no one and is located at sea
 		reach = RadiusRect(self.home_building.position, self.home_building.radius)
-		return self.session.world.get_providers_in_range(reach, reslist=reslist)
+		return (self.session.world, reach, None)
 
 
 class DisasterRecoveryCollector(StorageCollector):
 	"""Collects disasters such as fire or pestilence."""
+	# there is no job without a disaster, which is not a change at a provider
+	wait_for_job_changes = False
+
 	def finish_working(self, collector_already_home=False):
 		super(DisasterRecoveryCollector, self).finish_working(collector_already_home=collector_already_home)
 		building = self.job.object
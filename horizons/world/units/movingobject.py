@@ -55,6 +55,11 @@ class MovingObject(ComponentHolder, ConcreteObject):
 	- check_move
 	- get_move_target
 	- is_moving
+
+	Units that can't be blocked on their path don't need a move tick for every step. They
+	commit to a leg, i.e. a straight line of steps at the same speed, and are only ticked at
+	its end. Meanwhile, position, last_position and _next_target are derived from the
+	current tick, and the instance is moved along the whole leg at once.
 	"""
 	movable = True
 
@@ -67,6 +72,9 @@ class MovingObject(ComponentHolder, ConcreteObject):
 		self.__init(x, y)
 
 	def __init(self, x, y):
+		# (start tick, ticks per step, move time, points, last position before the leg,
+		#  path index of its first step), see _move_tick
+		self._leg = None
 		self.position = Point(x, y)
 		self.last_position = Point(x, y)
 		self._next_target = Point(x, y)
@@ -84,11 +92,44 @@ class MovingObject(ComponentHolder, ConcreteObject):
 		self._fife_location1 = None
 		self._fife_location2 = None
 
+	def _get_position(self):
+		if self._leg is not None:
+			self._update_leg()
+		return self.__position
+
+	def _set_position(self, position):
+		self.__position = position
+
+	position = property(_get_position, _set_position)
+
+	def _get_last_position(self):
+		if self._leg is not None:
+			self._update_leg()
+		return self.__last_position
+
+	def _set_last_position(self, position):
+		self.__last_position = position
+
+	last_position = property(_get_last_position, _set_last_position)
+
+	def _get_next_target(self):
+		if self._leg is not None:
+			self._update_leg()
+		return self.__next_target
+
+	def _set_next_target(self, position):
+		self.__next_target = position
+
+	_next_target = property(_get_next_target, _set_next_target)
+
 	def check_move(self, destination):
 		"""Tries to find a path to destination
 		@param destination: destination supported by pathfinding
 		@return: object that can be used in boolean expressions (the path in case there is one)
 		"""
+		if self._leg is not None:
+			# the path index is at the end of the leg, start from the actual next step
+			return self.path.calc_path(destination, check_only=True, source=self._next_target)
 		return self.path.calc_path(destination, check_only = True)
 
 	def is_moving(self):
@@ -103,6 +144,7 @@ class MovingObject(ComponentHolder, ConcreteObject):
 		if not self.is_moving():
 			WeakMethodList(callback).execute()
 			return
+		self._break_leg()
 		self.move_callbacks = WeakMethodList(callback)
 		self.path.end_move()
 
@@ -125,6 +167,7 @@ class MovingObject(ComponentHolder, ConcreteObject):
 		@param blocked_callback: a parameter supported by WeakMethodList. Gets called when unit gets blocked.
 		@param path: a precalculated path (return value of FindPath()())
 		"""
+		self._break_leg()
 		if not path:
 			# calculate the path
 			move_possible = self.path.calc_path(destination, destination_in_building)
@@ -170,6 +213,10 @@ class MovingObject(ComponentHolder, ConcreteObject):
 		if resume:
 			self.__is_moving = True
 		else:
+			if self._leg is not None:
+				# arrived at the end of the leg, this sets the position to its second to last point
+				self._update_leg()
+				self._leg = None
 			#self.log.debug("%s move tick from %s to %s", self, self.last_position, self._next_target)
 			self.last_position = self.position
 			self.position = self._next_target
@@ -210,11 +257,37 @@ class MovingObject(ComponentHolder, ConcreteObject):
 
 		#setup movement
 		move_time = self.get_unit_velocity()
+		diagonal = self._next_target.x != self.position.x and self._next_target.y != self.position.y
+		step_ticks = move_time[int(diagonal)]
+
+		target = self._next_target
+		# conditions have to be checked after every step
+		leg = self._get_leg(move_time) if not self._conditional_callbacks else []
+		if leg:
+			self._leg = (Scheduler().cur_tick, step_ticks, move_time,
+			             [self.position, self._next_target] + leg, self.last_position, self.path.cur)
+			self.path.skip_steps(len(leg))
+			target = leg[-1]
+
+		self._move_instance(target, move_time)
+
+		#self.log.debug("%s registering move tick in %s ticks", self, move_time[int(diagonal)])
+		Scheduler().add_new_object(self._move_tick, self, step_ticks * (1 + len(leg)))
+
+		# check if a conditional callback becomes true
+		for cond in self._conditional_callbacks.keys(): # iterate of copy of keys to be able to delete
+			if cond():
+				# start callback when this function is done
+				Scheduler().add_new_object(self._conditional_callbacks[cond], self)
+				del self._conditional_callbacks[cond]
+
+	def _move_instance(self, target, move_time):
+		"""Makes the instance walk from the current position to target in a straight line"""
 		UnitClass.ensure_action_loaded(self._action_set_id, self._move_action) # lazy load move action
 
 		self._exact_model_coords1.set(self.position.x, self.position.y, 0)
 		self._fife_location1.setExactLayerCoordinates(self._exact_model_coords1)
-		self._exact_model_coords2.set(self._next_target.x, self._next_target.y, 0)
+		self._exact_model_coords2.set(target.x, target.y, 0)
 		self._fife_location2.setExactLayerCoordinates(self._exact_model_coords2)
 		self._route = fife.Route(self._fife_location1, self._fife_location2)
 		# TODO/HACK the *5 provides slightly less flickery behavior of the moving
@@ -223,20 +296,50 @@ class MovingObject(ComponentHolder, ConcreteObject):
 		self._route.setPath(fife.LocationList([self._fife_location2]*5))
 		self._route.setRouteStatus(3)  #fife.RouteStatus.ROUTE_SOLVED)
 
-		diagonal = self._next_target.x != self.position.x and self._next_target.y != self.position.y
 		action = self._move_action+"_"+str(self._action_set_id)
 		speed = float(self.session.timer.get_ticks(1)) / move_time[0]
 		self._instance.follow(action, self._route, speed)
 
-		#self.log.debug("%s registering move tick in %s ticks", self, move_time[int(diagonal)])
-		Scheduler().add_new_object(self._move_tick, self, move_time[int(diagonal)])
+	def _get_leg(self, move_time):
+		"""Returns the points after the next target that the unit can move on to without
+		further move ticks, i.e. the ones on a straight line that are passed at the same speed.
+		@param move_time: velocity of the current step, see get_unit_velocity
+		@return: list of Points
+		"""
+		leg = []
+		previous = self._next_target
+		for coords in self.path.get_straight_steps(self.position):
+			if self._get_velocity_at(previous) != move_time:
+				break
+			previous = Point(*coords)
+			leg.append(previous)
+		return leg
+
+	def _update_leg(self):
+		"""Sets position, last_position and _next_target to the step of the current leg that
+		the unit is on in this tick.
+		@return: int, index of the position in the points of the leg"""
+		start_tick, step_ticks, move_time, points, last_position, first_index = self._leg
+		i = min((Scheduler().cur_tick - start_tick) // step_ticks, len(points) - 2)
+		self.__position = points[i]
+		self.__next_target = points[i+1]
+		self.__last_position = points[i-1] if i > 0 else last_position
+		return i
+
+	def _break_leg(self):
+		"""Continues the movement step by step from the current step of the leg on.
+		Has to be called before the path is changed."""
+		if self._leg is None:
+			return
+		i = self._update_leg()
+		start_tick, step_ticks, move_time, points, last_position, first_index = self._leg
+		self._leg = None
+		self.path.cur = first_index + i # index of the next target
 
-		# check if a conditional callback becomes true
-		for cond in self._conditional_callbacks.keys(): # iterate of copy of keys to be able to delete
-			if cond():
-				# start callback when this function is done
-				Scheduler().add_new_object(self._conditional_callbacks[cond], self)
-				del self._conditional_callbacks[cond]
+		Scheduler().rem_call(self, self._move_tick)
+		Scheduler().add_new_object(self._move_tick, self,
+		                           start_tick + (i+1) * step_ticks - Scheduler().cur_tick)
+		self._move_instance(self.__next_target, move_time)
 
 	def teleport(self, destination, callback=None, destination_in_building=False):
 		"""Like move, but nearly instantaneous"""
@@ -261,6 +364,7 @@ class MovingObject(ComponentHolder, ConcreteObject):
 		True. The condition is checked every move_tick. After calling the callback, it is removed."""
 		assert callable(condition)
 		assert callable(callback)
+		self._break_leg()
 		self._conditional_callbacks[condition] = callback
 
 	def get_unit_velocity(self):
@@ -268,7 +372,10 @@ class MovingObject(ComponentHolder, ConcreteObject):
 		or diagonal movement as a tuple in this order.
 		@return: (int, int)
 		"""
-		tile = self.session.world.get_tile(self.position)
+		return self._get_velocity_at(self.position)
+
+	def _get_velocity_at(self, point):
+		tile = self.session.world.get_tile(point)
 		if self.id in tile.velocity:
 			return tile.velocity[self.id]
 		else:
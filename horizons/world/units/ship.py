@@ -68,6 +68,9 @@ class Ship(Unit):
 	def __init(self):
 		# register ship in world
 		self.session.world.ships.append(self)
+		self.session.world.ship_index.add(self, self.position.to_tuple())
+		if self.session.world.checkup_digest is not None:
+			self.session.world.checkup_digest.add('ships', self)
 		if self.in_ship_map:
 			self.session.world.ship_map[self.position.to_tuple()] = weakref.ref(self)
 
@@ -76,6 +79,9 @@ class Ship(Unit):
 
 	def remove(self):
 		self.session.world.ships.remove(self)
+		self.session.world.ship_index.remove(self)
+		if self.session.world.checkup_digest is not None:
+			self.session.world.checkup_digest.remove('ships', self)
 		if self.session.view.has_change_listener(self.draw_health):
 			self.session.view.remove_change_listener(self.draw_health)
 		if self.in_ship_map:
@@ -115,6 +121,9 @@ class Ship(Unit):
 					self.session.world.ship_map[self.position.to_tuple()] = weakref.ref(self)
 				raise
 
+		self.session.world.ship_index.move(self, self.position.to_tuple())
+		if self.session.world.checkup_digest is not None:
+			self.session.world.checkup_digest.mark_dirty('ships', self)
 		if self.in_ship_map:
 			# save current and next position for ship, since it will be between them
 			self.session.world.ship_map[self.position.to_tuple()] = weakref.ref(self)
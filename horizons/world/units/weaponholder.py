@@ -26,6 +26,7 @@ import math
 from horizons.util.changelistener import metaChangeListenerDecorator
 from horizons.util.python.callback import Callback
 from horizons.util.shapes import Annulus, Point
+from horizons.util.spatialhash import ProximityZone
 from horizons.util.worldobject import WorldObject
 from horizons.world.units.movingobject import MoveNotPossible
 from horizons.scheduler import Scheduler
@@ -42,6 +43,10 @@ from horizons.component.storagecomponent import StorageComponent
 class WeaponHolder(object):
 	log = logging.getLogger("world.combat")
 
+	# distance beyond the maximum weapon range in which other units are watched. It covers
+	# the lookout of all stances and the combat range of the AI.
+	PROXIMITY_RANGE = 20
+
 	def __init__(self, **kwargs):
 		super(WeaponHolder, self).__init__(**kwargs)
 		self.__init()
@@ -49,13 +54,26 @@ class WeaponHolder(object):
 	def __init(self):
 		self.create_weapon_storage()
 		self._target = None
-		self.add_storage_modified_listener(self.update_range)
 		self.equipped_weapon_number = 0
-		Scheduler().add_new_object(self._stance_tick, self, run_in=2, loops=-1,
-		                           loop_interval=GAME_SPEED.TICKS_PER_SECOND)
+		# stance ticks are always executed in the same ticks modulo TICKS_PER_SECOND,
+		# also after they were paused. This has to be set up before the proximity zone,
+		# adding it reports the units that are already near.
+		self._stance_tick_phase = Scheduler().cur_tick + 2
+		self._stance_tick_running = True
+		Scheduler().add_new_object(self.__stance_tick_loop, self, run_in=2)
+		# the stance tick only runs while other units are near, see _stance_tick_done
+		self.proximity_zone = ProximityZone(self.position.center.to_tuple(), self.PROXIMITY_RANGE,
+		                                    filter=self._is_foreign_unit,
+		                                    enter_callback=self._on_unit_approached)
+		self.session.world.add_proximity_zone(self.proximity_zone)
+		self.update_range()
+		self.add_storage_modified_listener(self.update_range)
+		self.session.world.diplomacy.add_diplomacy_status_changed_listener(self._on_diplomacy_status_changed)
 
 	def remove(self):
 		self.remove_storage_modified_listener(self.update_range)
+		self.session.world.diplomacy.remove_diplomacy_status_changed_listener(self._on_diplomacy_status_changed)
+		self.session.world.remove_proximity_zone(self.proximity_zone)
 		self.stop_attack()
 		for weapon in self._weapon_storage:
 			weapon.remove_attack_ready_listener(Callback(self._add_to_fireable, weapon))
@@ -76,6 +94,10 @@ class WeaponHolder(object):
 		else:
 			self._min_range = 0
 			self._max_range = 0
+		radius = self._max_range + self.PROXIMITY_RANGE + 2 # positions in the index may lag behind
+		if radius != self.proximity_zone.radius:
+			self.proximity_zone.radius = radius
+			self.session.world.update_proximity_zone(self.proximity_zone)
 
 	def _add_to_fireable(self, weapon):
 		"""
@@ -259,6 +281,37 @@ class WeaponHolder(object):
 		else:
 			self.log.debug("%s target not in range", self)
 
+	def _is_foreign_unit(self, unit):
+		return unit.owner is not self.owner
+
+	def _on_unit_approached(self, unit):
+		if self.session.world.diplomacy.are_enemies(unit.owner, self.owner):
+			self._resume_stance_tick()
+
+	def _on_diplomacy_status_changed(self, caller, old_state, new_state, a, b):
+		if new_state == 'enemy' and self.owner in (a, b):
+			self._resume_stance_tick()
+
+	def __stance_tick_loop(self):
+		self._stance_tick()
+		if self._stance_tick_done():
+			self._stance_tick_running = False
+		else:
+			Scheduler().add_new_object(self.__stance_tick_loop, self, run_in=GAME_SPEED.TICKS_PER_SECOND)
+
+	def _stance_tick_done(self):
+		"""Returns whether the stance tick won't do anything until an enemy approaches."""
+		are_enemies = self.session.world.diplomacy.are_enemies
+		return not any(are_enemies(unit.owner, self.owner) for unit in self.proximity_zone)
+
+	def _resume_stance_tick(self):
+		"""Restarts the stance tick in case it was paused by _stance_tick_done."""
+		if self._stance_tick_running:
+			return
+		self._stance_tick_running = True
+		run_in = (self._stance_tick_phase - Scheduler().cur_tick) % GAME_SPEED.TICKS_PER_SECOND
+		Scheduler().add_new_object(self.__stance_tick_loop, self, run_in=run_in)
+
 	def _stance_tick(self):
 		"""
 		Executes every few seconds, doing movement depending on the stance.
@@ -480,6 +533,17 @@ class MovingWeaponHolder(WeaponHolder):
 		"""
 		self.get_component(self.stance).act()
 
+	def _stance_tick_done(self):
+		# all stances only look for enemies while idle
+		if self.get_component(self.stance).get_state() != 'idle':
+			return False
+		return super(MovingWeaponHolder, self)._stance_tick_done()
+
+	def _move_tick(self, resume=False):
+		super(MovingWeaponHolder, self)._move_tick(resume)
+		self.proximity_zone.center = self.position.to_tuple()
+		self.session.world.update_proximity_zone(self.proximity_zone)
+
 	def stop_for(self, ticks):
 		"""
 		Delays movement for a number of ticks.
@@ -565,10 +629,12 @@ class MovingWeaponHolder(WeaponHolder):
 		state = self.get_component(self.stance).get_state()
 		self.stance = stance
 		self.get_component(stance).set_state(state)
+		self._resume_stance_tick()
 
 	def go(self, x, y):
 		super(MovingWeaponHolder, self).go(x, y)
 		self.on_user_move_issued()
+		self._resume_stance_tick()
 
 	def save(self, db):
 		super(MovingWeaponHolder, self).save(db)
@@ -584,6 +650,7 @@ class MovingWeaponHolder(WeaponHolder):
 
 	def user_attack(self, targetid):
 		super(MovingWeaponHolder, self).user_attack(targetid)
+		self._resume_stance_tick()
 		if self.owner.is_local_player:
 			self.session.ingame_gui.minimap.show_unit_path(self)
 
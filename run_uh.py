@@ -43,6 +43,7 @@ import locale
 import logging
 import logging.config
 import logging.handlers
+import multiprocessing
 import optparse
 import signal
 import traceback
@@ -467,4 +468,5 @@ def log_sys_info():
 	log().debug("Platform: %s", platform.platform())
 
 if __name__ == '__main__':
+	multiprocessing.freeze_support() # random islands are generated in worker processes
 	main()
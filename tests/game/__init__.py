@@ -34,6 +34,7 @@ from horizons.extscheduler import ExtScheduler
 from horizons.scheduler import Scheduler
 from horizons.spsession import SPSession
 from horizons.util.dbreader import DbReader
+from horizons.util.savegamewriter import SavegameWriter
 from horizons.util.difficultysettings import DifficultySettings
 from horizons.util.savegameaccessor import SavegameAccessor
 from horizons.util.startgameoptions import StartGameOptions
@@ -60,7 +61,7 @@ def setup_package():
 @contextlib.contextmanager
 def _dbreader_convert_dummy_objects():
 	"""
-	Wrapper around DbReader.__call__ to convert Dummy objects to valid values.
+	Wrapper around DbReader.__call__ and SavegameWriter.__call__ to convert Dummy objects to valid values.
 
 	This is needed because some classes attempt to store Dummy objects in the
 	database, e.g. ConcreteObject with self._instance.getActionRuntime().
@@ -79,10 +80,11 @@ def _dbreader_convert_dummy_objects():
 			return func(self, command, *args)
 		return wrapper
 
-	original = DbReader.__call__
+	originals = DbReader.__call__, SavegameWriter.__call__
 	DbReader.__call__ = deco(DbReader.__call__)
+	SavegameWriter.__call__ = deco(SavegameWriter.__call__)
 	yield
-	DbReader.__call__ = original
+	DbReader.__call__, SavegameWriter.__call__ = originals
 
 
 class SPTestSession(SPSession):
@@ -105,6 +107,14 @@ class SPTestSession(SPSession):
 			with _dbreader_convert_dummy_objects():
 				return super(SPTestSession, self).save(*args, **kwargs)
 
+	def autosave(self, *args, **kwargs):
+		"""
+		Wrapper around original autosave function, same as save.
+		"""
+		with mock.patch('horizons.session.SavegameManager._write_screenshot'):
+			with _dbreader_convert_dummy_objects():
+				return super(SPTestSession, self).autosave(*args, **kwargs)
+
 	def load(self, savegame, players, is_ai_test, is_map):
 		# keep a reference on the savegame, so we can cleanup in `end`
 		self.savegame = savegame
@@ -149,9 +159,8 @@ class SPTestSession(SPSession):
 		if seconds:
 			ticks = self.timer.get_ticks(seconds)
 
-		while ticks > 0:
-			Scheduler().tick(Scheduler().cur_tick + 1)
-			ticks -= 1
+		# use the timer of the current scheduler, some tests keep using an old session object
+		Scheduler().timer.run_ticks(ticks)
 
 
 # import helper functions here, so tests can import from tests.game directly
@@ -0,0 +1,102 @@
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from functools import partial
+
+from horizons.ai.aiplayer import AIPlayer
+from horizons.util.random_map import generate_map_from_seed
+
+from tests.game import game_test, new_session
+from tests.game.test_load_save import saveload
+
+
+@game_test(mapgen=partial(generate_map_from_seed, 5), human_player=False, ai_players=1, timeout=60)
+def test_path_nodes_cache(session, _):
+	"""The cached road planning penalties have to match freshly computed ones"""
+	checked = 0
+	for _ in xrange(12):
+		session.run(seconds=10)
+		for player in session.world.players:
+			for settlement_manager in player.settlement_managers:
+				for builder in (settlement_manager.production_builder, settlement_manager.village_builder):
+					assert builder.get_path_nodes() == builder._compute_path_nodes()
+					checked += 1
+	assert checked
+
+
+@game_test(manual_session=True, timeout=60)
+def test_save_while_planning_settlement():
+	"""A settlement whose plan isn't finished when saving is planned again after loading"""
+	session, _ = new_session(mapgen=partial(generate_map_from_seed, 5), human_player=False, ai_players=1)
+	player = session.world.players[0]
+	while not player._pending_settlements:
+		session.run(ticks=1)
+	assert not player.settlement_managers
+
+	session = saveload(session)
+	player = session.world.players[0]
+	assert isinstance(player, AIPlayer)
+	assert player._pending_settlements
+	while player._pending_settlements:
+		session.run(ticks=1)
+	assert len(player.settlement_managers) == 1
+	session.run(seconds=10)
+	session.end()
+
+
+@game_test(manual_session=True, timeout=60)
+def test_remove_warehouse_while_planning_settlement():
+	"""Removing the warehouse of a settlement whose plan isn't finished drops the plan"""
+	session, _ = new_session(mapgen=partial(generate_map_from_seed, 5), human_player=False, ai_players=1)
+	player = session.world.players[0]
+	while not player._pending_settlements:
+		session.run(ticks=1)
+	land_manager, job = player._pending_settlements.items()[0]
+	assert player.work_scheduler.has_job(job)
+
+	land_manager.settlement.warehouse.remove()
+	assert not player._pending_settlements
+	assert not player.work_scheduler.has_job(job)
+	assert land_manager.island.worldid not in player.islands
+	session.run(seconds=10)
+	assert all(settlement_manager.land_manager is not land_manager for settlement_manager in player.settlement_managers)
+	session.end()
+
+
+@game_test(mapgen=partial(generate_map_from_seed, 5), human_player=False, ai_players=1, timeout=60)
+def test_goal_updates_are_single_steps(session, _):
+	"""Handling the settlements updates at most one goal per work scheduler step"""
+	player = session.world.players[0]
+	while not player.settlement_managers:
+		session.run(ticks=1)
+
+	updates = []
+	goals = list(player.goals)
+	for settlement_manager in player.settlement_managers:
+		goals.extend(settlement_manager._goals)
+	for goal in goals:
+		goal.update = partial(lambda goal, update: updates.append(goal) or update(), goal, goal.update)
+	updated = 0
+	for _ in player.handle_settlements():
+		assert len(updates) <= 1
+		updated += len(updates)
+		del updates[:]
+	assert updated > 1
@@ -106,6 +106,45 @@ def test_fisherman(s, p):
 	assert fisherman.get_component(StorageComponent).inventory[RES.FOOD]
 
 
+@game_test()
+def test_fish_deposit_tiles(s, p):
+	"""
+	The sea tiles are shared by whole blocks, a fish deposit must only block its own tiles.
+	"""
+	world = s.world
+	school = Build(BUILDINGS.FISH_DEPOSIT, 25, 18, world, ownerless=True)(None)
+	assert school
+
+	for point in school.position:
+		tile = world.get_tile(point)
+		assert tile.blocked and tile.object is school
+		assert world.ground_map[point.to_tuple()] is tile
+		assert 'ground[-1]' in tile.classes
+	for coords in ((27, 18), (25, 20), (24, 17)):
+		tile = world.full_map[coords]
+		assert not tile.blocked and tile.object is None
+
+	school.remove()
+	for point in school.position:
+		tile = world.get_tile(point)
+		assert not tile.blocked and tile.object is None
+		assert tile is world.fake_tile_map[point.to_tuple()]
+
+
+@game_test()
+def test_sea_tile_map(s, p):
+	"""
+	The shared sea tile of every coordinate of the sea is looked up by its block.
+	"""
+	world = s.world
+	for coords, tile in world.ground_map.iteritems():
+		assert world.fake_tile_map[coords] is tile
+	for coords in world.island_map:
+		assert coords in world.fake_tile_map
+	for coords in ((world.min_x - 1, world.min_y), (world.max_x, world.min_y), (world.min_x, world.max_y)):
+		assert coords not in world.fake_tile_map
+
+
 @game_test()
 def test_brick_production_chain(s, p):
 	"""
@@ -35,9 +35,11 @@ from horizons.constants import UNITS, WEAPONS
 from horizons.component.healthcomponent import HealthComponent
 
 from tests.game import game_test, new_session, load_session
+from tests.game.test_load_save import saveload
 
 
-def setup_combat(s, ship):
+def setup_combat(s, ship, position=(3, 3)):
+	"""@param position: position of the second ship, the first one is at (0, 0)"""
 	worldid = 10000000
 
 	p0 = Player(s, worldid, "p1", Color[1])
@@ -48,7 +50,7 @@ def setup_combat(s, ship):
 		s.world.players.append(p)
 
 	s0 = CreateUnit(p0.worldid, ship, 0, 0)(issuer=p0)
-	s1 = CreateUnit(p1.worldid, ship, 3, 3)(issuer=p1)
+	s1 = CreateUnit(p1.worldid, ship, position[0], position[1])(issuer=p1)
 
 	return ((p0, s0), (p1, s1))
 
@@ -164,6 +166,62 @@ def test_diplo0(s, p):
 	# it's not specified which one should lose
 	assert health(s0) == 0 or health(s1) == 0
 
+@game_test()
+def test_stance_tick_at_peace(s, p):
+	"""
+	Units at peace don't look for targets, declaring war wakes them up again.
+	"""
+	(p0, s0), (p1, s1) = setup_combat(s, UNITS.FRIGATE)
+	assert s1 in s0.proximity_zone and s0 in s1.proximity_zone
+
+	s.run(seconds=3)
+	assert not s0._stance_tick_running
+	assert not s1._stance_tick_running
+
+	AddEnemyPair(p0, p1).execute(s)
+	assert s0._stance_tick_running
+	assert s1._stance_tick_running
+
+	s.run(seconds=60)
+	assert health(s0) == 0 or health(s1) == 0
+
+
+@game_test()
+def test_stance_tick_enemy_near_on_creation(s, p):
+	"""
+	A unit that is created next to an enemy starts looking for targets right away.
+	"""
+	(p0, s0), (p1, s1) = setup_combat(s, UNITS.FRIGATE)
+	AddEnemyPair(p0, p1).execute(s)
+
+	s2 = CreateUnit(p1.worldid, UNITS.FRIGATE, 5, 5)(issuer=p1)
+	assert s0 in s2.proximity_zone
+	assert s2._stance_tick_running
+
+	s.run(seconds=60)
+	assert health(s0) < max_health(s0)
+
+
+@game_test(manual_session=True)
+def test_stance_tick_enemy_near_save_load():
+	"""
+	Loading units at war that are near each other restarts their stance ticks.
+	"""
+	session, player = new_session()
+	(p0, s0), (p1, s1) = setup_combat(session, UNITS.FRIGATE, position=(30, 0))
+	AddEnemyPair(p0, p1).execute(session)
+	s0_worldid, s1_worldid = s0.worldid, s1.worldid
+	session.run(seconds=1)
+
+	session = saveload(session)
+	s0 = WorldObject.get_object_by_id(s0_worldid)
+	s1 = WorldObject.get_object_by_id(s1_worldid)
+	assert s1 in s0.proximity_zone and s0 in s1.proximity_zone
+	assert s0._stance_tick_running and s1._stance_tick_running
+
+	session.end()
+
+
 @game_test()
 def test_dying(s, p):
 	"""
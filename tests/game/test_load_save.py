@@ -21,12 +21,16 @@
 
 import os
 import bz2
+import shutil
 import tempfile
+import time
 
-from horizons.command.building import Build
+import mock
+
+from horizons.command.building import Build, Tear
 from horizons.command.production import ToggleActive
 from horizons.command.unit import CreateUnit
-from horizons.constants import BUILDINGS, PRODUCTION, UNITS, RES, GAME
+from horizons.constants import BUILDINGS, PRODUCTION, UNITS, RES, GAME, TIER
 from horizons.util.shapes import Point
 from horizons.util.worldobject import WorldObject
 from horizons.world.production.producer import Producer
@@ -34,6 +38,11 @@ from horizons.component.collectingcomponent import CollectingComponent
 from horizons.component.storagecomponent import StorageComponent
 from horizons.world.units.collectors import Collector
 from horizons.scheduler import Scheduler
+from horizons.extscheduler import ExtScheduler
+from horizons.messaging import AutosaveFinished
+from horizons.savegamemanager import SavegameManager
+from horizons.spsession import SPSession
+from horizons.util.savegameaccessor import SavegameAccessor
 
 from tests.game import game_test, new_session, settle, load_session, TEST_FIXTURES_DIR
 
@@ -220,6 +229,75 @@ def test_settler_save_load():
 	session.end()
 
 
+@game_test(manual_session=True)
+def test_autosave_in_background():
+	"""Autosave writes the state of the moment it was called, even if the game goes on"""
+	session, player = new_session()
+	settlement, island = settle(session)
+	lj = Build(BUILDINGS.LUMBERJACK, 30, 30, island, settlement=settlement)(player)
+	worldid = lj.worldid
+
+	finished = []
+	AutosaveFinished.subscribe(finished.append)
+	autosave_dir = tempfile.mkdtemp()
+	with mock.patch.object(SavegameManager, 'autosave_dir', autosave_dir):
+		session.autosave()
+		# the lumberjack is gone before the file is written
+		Tear(lj)(player)
+		session._autosave_thread.join()
+		time.sleep(SPSession.AUTOSAVE_CHECK_INTERVAL)
+		ExtScheduler().tick()
+
+	assert len(finished) == 1 and finished[0].success
+	filename = finished[0].savegame
+	assert os.path.dirname(filename) == autosave_dir
+	session.end(keep_map=True)
+
+	session = load_session(filename)
+	assert WorldObject.get_object_by_id(worldid).id == BUILDINGS.LUMBERJACK
+	session.end()
+	shutil.rmtree(autosave_dir)
+
+
+@game_test(manual_session=True)
+def test_lazy_savegame_accessor():
+	"""Lazy loading returns the same data as preloading"""
+	session, player = new_session()
+	settlement, island = settle(session)
+	Build(BUILDINGS.LUMBERJACK, 30, 30, island, settlement=settlement)(player)
+	session.run(seconds=10)
+
+	fd, filename = tempfile.mkstemp()
+	os.close(fd)
+	assert session.save(savegamename=filename)
+	session.end(keep_map=True)
+
+	lazy = SavegameAccessor(filename, False)
+	eager = SavegameAccessor(filename, False, lazy=False)
+	for (worldid, ) in lazy("SELECT rowid FROM building"):
+		assert lazy.get_production_lines_by_owner(worldid) == eager.get_production_lines_by_owner(worldid)
+		assert lazy.get_building_row(worldid) == eager.get_building_row(worldid)
+		assert lazy.get_concrete_object_data(worldid) == eager.get_concrete_object_data(worldid)
+		assert lazy.get_storage_rowids_by_ownerid(worldid) == eager.get_storage_rowids_by_ownerid(worldid)
+		location = lazy.get_building_location(worldid)
+		assert lazy.get_settlement_owner(location) == eager.get_settlement_owner(location)
+	for (worldid, ) in lazy("SELECT rowid FROM unit"):
+		assert lazy.get_unit_owner(worldid) == eager.get_unit_owner(worldid)
+		assert lazy.get_building_collectors_data(worldid) == eager.get_building_collectors_data(worldid)
+		assert lazy.get_unit_path(worldid) == eager.get_unit_path(worldid)
+
+	lazy.release()
+	try:
+		lazy.get_building_row(-1)
+	except KeyError:
+		pass
+	else:
+		assert False, "KeyError expected"
+	lazy.close()
+	eager.close()
+	os.unlink(filename)
+
+
 @game_test(manual_session=True)
 def test_savegame_upgrade():
 	"""Loads an old savegame and keeps it running for a while"""
@@ -280,3 +358,88 @@ def test_settler_level_save_load(s, p):
 
 		# should have leveled up
 		assert settler.level == level + 1
+
+
+def _assert_settlement_aggregates(settlement):
+	"""Compare the incrementally maintained aggregates with a recount."""
+	buildings = settlement.buildings
+	assert settlement.inhabitants == sum(b.inhabitants for b in buildings)
+	assert settlement.cumulative_running_costs == sum(b.running_costs for b in buildings)
+	assert settlement.cumulative_taxes == \
+	       sum(b.last_tax_payed for b in buildings if hasattr(b, 'last_tax_payed'))
+	for level in xrange(TIER.CURRENT_MAX + 1):
+		for low, high in ((0, 30), (30, 70), (70, 101)):
+			expected = len([b for b in buildings if hasattr(b, 'happiness') and
+			                b.level == level and low <= b.happiness < high])
+			assert settlement.get_residentials_of_lvl_for_happiness(level, low, high) == expected
+
+
+@game_test(manual_session=True)
+def test_settlement_aggregates_save_load():
+	"""Settlement economy aggregates stay correct through ticks, removal and save/load"""
+	session, player = new_session()
+	settlement, island = settle(session)
+
+	settlers = [Build(BUILDINGS.RESIDENTIAL, x, 22, island, settlement=settlement)(player)
+	            for x in (25, 27)]
+	assert all(settlers)
+	main_square = Build(BUILDINGS.MAIN_SQUARE, 23, 24, island, settlement=settlement)(player)
+	assert main_square
+	main_square.get_component(StorageComponent).inventory.alter(RES.FOOD, 100)
+	assert Build(BUILDINGS.LUMBERJACK, 30, 30, island, settlement=settlement)(player)
+	_assert_settlement_aggregates(settlement)
+
+	session.run(seconds=2 * GAME.INGAME_TICK_INTERVAL)
+	assert settlement.cumulative_taxes
+	_assert_settlement_aggregates(settlement)
+
+	Tear(settlers[0])(player)
+	_assert_settlement_aggregates(settlement)
+
+	session = saveload(session)
+	settlement = session.world.get_tile(Point(27, 22)).settlement
+	_assert_settlement_aggregates(settlement)
+
+	session.run(seconds=GAME.INGAME_TICK_INTERVAL)
+	_assert_settlement_aggregates(settlement)
+	session.end()
+
+
+@game_test(manual_session=True)
+def test_checkup_hash_follows_state_changes():
+	"""The incrementally updated checkup hash matches a recalculation of all objects"""
+	session, player = new_session()
+	settlement, island = settle(session)
+	world = session.world
+	world.get_checkup_hash()
+	digest = world.checkup_digest
+
+	def assert_up_to_date():
+		incremental = digest.get_subsystem_digests()
+		for obj in world.settlements:
+			digest.mark_dirty('settlements', obj)
+		for obj in world.ships:
+			digest.mark_dirty('ships', obj)
+		assert digest.get_subsystem_digests() == incremental
+
+	main_square = Build(BUILDINGS.MAIN_SQUARE, 23, 24, island, settlement=settlement)(player)
+	assert main_square
+	settler = Build(BUILDINGS.RESIDENTIAL, 25, 22, island, settlement=settlement)(player)
+	assert settler
+	assert_up_to_date()
+
+	settlement.get_component(StorageComponent).inventory.alter(RES.FOOD, 10)
+	assert_up_to_date()
+
+	settler.inhabitants += 1
+	settler._update_settlement_stats()
+	assert_up_to_date()
+
+	ship = CreateUnit(player.worldid, UNITS.PLAYER_SHIP, 10, 10)(issuer=player)
+	assert_up_to_date()
+	ship.move(Point(15, 15))
+	session.run(seconds=2 * GAME.INGAME_TICK_INTERVAL)
+	assert_up_to_date()
+
+	assert len(world.get_checkup_hash()) == 3
+	session.end()
@@ -0,0 +1,92 @@
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from horizons.command.building import Build
+from horizons.component.collectingcomponent import CollectingComponent
+from horizons.constants import BUILDINGS
+from horizons.util.shapes import Point
+
+from tests.game import settle, game_test
+
+
+def _walk(s, unit, destination, legs, stop_after=None, redirect=None):
+	"""Moves unit to destination and returns where it is in every tick until it arrived.
+	@param legs: whether the unit may move along legs
+	@param stop_after: number of ticks after which the unit is stopped or redirected
+	@param redirect: Point, new destination after stop_after ticks
+	@return: list of (last position, position, next target), whether a leg was used"""
+	unit.path.moves_in_legs = legs
+	unit.move(destination)
+	trace = []
+	used_leg = False
+	while unit.is_moving():
+		used_leg = used_leg or unit._leg is not None
+		s.run()
+		trace.append((unit.last_position.to_tuple(), unit.position.to_tuple(),
+		              unit._next_target.to_tuple()))
+		if len(trace) == stop_after:
+			if redirect is None:
+				unit.stop()
+			else:
+				unit.move(redirect)
+	return trace, used_leg
+
+
+@game_test()
+def test_move_in_legs(s, p):
+	"""
+	A collector on a straight road moves along it in legs. It must be at the same place in
+	every tick as if it moved step by step.
+	"""
+	settlement, island = settle(s)
+	for y in xrange(23, 33):
+		assert Build(BUILDINGS.TRAIL, 30, y, island, settlement=settlement)(p)
+	collector = settlement.warehouse.get_component(CollectingComponent).get_local_collectors()[0]
+
+	start, end = Point(30, 23), Point(30, 32)
+	_walk(s, collector, start, legs=False)
+
+	steps, used_leg = _walk(s, collector, end, legs=False)
+	assert not used_leg
+	assert steps[-1][1] == end.to_tuple()
+	_walk(s, collector, start, legs=False)
+
+	legs, used_leg = _walk(s, collector, end, legs=True)
+	assert used_leg
+	assert legs == steps
+	_walk(s, collector, start, legs=False)
+
+	# stop in the middle of a leg, the unit has to stop at the next tile
+	stopped_steps, used_leg = _walk(s, collector, end, legs=False, stop_after=50)
+	assert stopped_steps[-1][1] != end.to_tuple()
+	_walk(s, collector, start, legs=False)
+
+	stopped_legs, used_leg = _walk(s, collector, end, legs=True, stop_after=50)
+	assert used_leg
+	assert stopped_legs == stopped_steps
+	_walk(s, collector, start, legs=False)
+
+	# turning around has to start from the next tile as well
+	turned_steps, used_leg = _walk(s, collector, end, legs=False, stop_after=50, redirect=start)
+	assert turned_steps[-1][1] == start.to_tuple()
+	turned_legs, used_leg = _walk(s, collector, end, legs=True, stop_after=50, redirect=start)
+	assert used_leg
+	assert turned_legs == turned_steps
@@ -0,0 +1,75 @@
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from horizons.command.building import Build, Tear
+from horizons.constants import BUILDINGS, RES, GAME
+from horizons.component.storagecomponent import StorageComponent
+from horizons.world.playerstats import PlayerStatsTracker
+
+from tests.game import game_test, settle
+
+
+def _assert_tracker_up_to_date(player):
+	"""The incrementally updated tracker has to match a freshly created one."""
+	tracker = player.get_stats_tracker()
+	fresh = PlayerStatsTracker(player)
+	try:
+		assert tracker.get_buildings() == fresh.get_buildings()
+		assert tracker.get_resources() == fresh.get_resources()
+		assert tracker.get_ships() == fresh.get_ships()
+		assert tracker.get_usable_land() == fresh.get_usable_land()
+		settler_data = tracker.get_settler_data()
+		fresh_settler_data = fresh.get_settler_data()
+		assert settler_data[:2] == fresh_settler_data[:2]
+		assert sorted(settler_data[2].keys()) == sorted(fresh_settler_data[2].keys())
+		for resource_id, amount in settler_data[2].iteritems():
+			assert abs(amount - fresh_settler_data[2][resource_id]) < 1e-9
+	finally:
+		fresh.end()
+
+
+@game_test()
+def test_stats_tracker(s, p):
+	"""The stats tracker follows building, inventory, production and settlement changes"""
+	settlement, island = settle(s)
+	p.get_latest_stats()
+
+	settlers = [Build(BUILDINGS.RESIDENTIAL, x, 22, island, settlement=settlement)(p)
+	            for x in (25, 27)]
+	assert all(settlers)
+	main_square = Build(BUILDINGS.MAIN_SQUARE, 23, 24, island, settlement=settlement)(p)
+	assert main_square
+	main_square.get_component(StorageComponent).inventory.alter(RES.FOOD, 100)
+	assert Build(BUILDINGS.LUMBERJACK, 30, 30, island, settlement=settlement)(p)
+	_assert_tracker_up_to_date(p)
+
+	s.run(seconds=GAME.INGAME_TICK_INTERVAL)
+	_assert_tracker_up_to_date(p)
+
+	# settlement range grows
+	assert Build(BUILDINGS.STORAGE, 38, 38, island, settlement=settlement)(p)
+	Tear(settlers[0])(p)
+	s.run(seconds=GAME.INGAME_TICK_INTERVAL)
+	_assert_tracker_up_to_date(p)
+
+	stats = p.get_latest_stats()
+	assert stats.total_score == (stats.settler_score + stats.building_score + stats.resource_score +
+	                             stats.unit_score + stats.land_score + stats.money_score)
@@ -20,11 +20,15 @@
 # ###################################################
 
 from horizons.command.building import Build
+from horizons.component.collectingcomponent import CollectingComponent
 from horizons.component.storagecomponent import StorageComponent
+from horizons.scheduler import Scheduler
+from horizons.util.worldobject import WorldObject
 from horizons.world.production.producer import Producer
-from horizons.constants import BUILDINGS, RES, PRODUCTIONLINES, PRODUCTION
+from horizons.constants import BUILDINGS, COLLECTORS, RES, PRODUCTIONLINES, PRODUCTION
 
-from tests.game import settle, game_test
+from tests.game import settle, game_test, new_session
+from tests.game.test_load_save import saveload
 
 @game_test()
 def test_basic_wood_production(session, player):
@@ -100,4 +104,57 @@ def test_basic_wood_production(session, player):
 
 	# Empty inventory, wait again
 	storage.inventory.alter(RES.BOARDS, -storage.inventory.get_limit(RES.BOARDS))
-	assert producer._get_current_state() == PRODUCTION.STATES.waiting_for_res
\ No newline at end of file
+	assert producer._get_current_state() == PRODUCTION.STATES.waiting_for_res
+
+@game_test()
+def test_idle_collector_is_woken_up(session, player):
+	"""Idle collectors wait for changes at providers in range instead of polling for jobs"""
+	settlement, island = settle(session)
+
+	lj = Build(BUILDINGS.LUMBERJACK, 30, 30, island, settlement=settlement)(player)
+	collector = lj.get_component(CollectingComponent).get_local_collectors()[0]
+	tree = Build(BUILDINGS.TREE, 33, 30, island, settlement=settlement)(player)
+	tree.get_component(Producer).set_active(active=False) # don't grow on its own
+
+	# nothing to do, the collector searches less and less often
+	session.run(seconds=40)
+	assert collector.state == collector.states.idle
+	search_in = Scheduler().get_classinst_calls(collector, collector.search_job).values()
+	assert search_in and search_in[0] > COLLECTORS.DEFAULT_WAIT_TICKS * 4
+
+	# the tree changing wakes the collector up right away
+	tree.get_component(StorageComponent).inventory.alter(RES.TREES, 1)
+	session.run(ticks=COLLECTORS.DEFAULT_WAIT_TICKS)
+	assert collector.state == collector.states.moving_to_target
+	assert collector.job.object is tree
+
+
+@game_test(manual_session=True)
+def test_idle_collector_is_woken_up_after_load():
+	"""Collectors that wait for changes keep waiting after loading"""
+	session, player = new_session()
+	settlement, island = settle(session)
+
+	lj = Build(BUILDINGS.LUMBERJACK, 30, 30, island, settlement=settlement)(player)
+	collector = lj.get_component(CollectingComponent).get_local_collectors()[0]
+	tree = Build(BUILDINGS.TREE, 33, 30, island, settlement=settlement)(player)
+	tree.get_component(Producer).set_active(active=False) # don't grow on its own
+
+	session.run(seconds=40)
+	assert collector._waiting_at is not None
+	collector_id, tree_id = collector.worldid, tree.worldid
+	failed_job_searches = collector._failed_job_searches
+
+	session = saveload(session)
+	collector = WorldObject.get_object_by_id(collector_id)
+	tree = WorldObject.get_object_by_id(tree_id)
+	assert collector.state == collector.states.idle
+	assert collector._waiting_at is not None
+	assert collector._failed_job_searches == failed_job_searches
+
+	tree.get_component(StorageComponent).inventory.alter(RES.TREES, 1)
+	session.run(ticks=COLLECTORS.DEFAULT_WAIT_TICKS)
+	assert collector.state == collector.states.moving_to_target
+	assert collector.job.object is tree
+
+	session.end()
@@ -0,0 +1,23 @@
+import hashlib, os, time
+from functools import partial
+from horizons.util.random_map import generate_map_from_seed
+from horizons.scheduler import Scheduler
+from tests.game import game_test
+
+def test_determinism():
+	seed = int(os.environ.get('DET_SEED', '5'))
+	secs = int(os.environ.get('DET_SECS', '120'))
+	@game_test(mapgen=partial(generate_map_from_seed, seed), human_player=False, ai_players=2, timeout=1200)
+	def test(session, _):
+		h = hashlib.md5()
+		t0 = time.time()
+		for i in xrange(session.timer.get_ticks(secs)):
+			session.run(ticks=1)
+			if i % 50 == 0:
+				h.update(repr(sorted(session.world.get_checkup_hash().items())))
+				for ship in session.world.ships:
+					h.update(repr((ship.worldid, ship.position.to_tuple())))
+				for u in session.world.ground_units:
+					h.update(repr((u.worldid, u.position.to_tuple())))
+		open(os.environ.get('DET_OUT', '/tmp/harness/out.txt'), 'w').write('%s %.1f\n' % (h.hexdigest(), time.time() - t0))
+	test()
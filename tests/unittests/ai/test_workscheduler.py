@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from unittest import TestCase
+from mock import Mock
+
+from horizons.ai.aiplayer.workscheduler import WorkScheduler
+from horizons.scheduler import Scheduler
+
+
+class TestWorkScheduler(TestCase):
+
+	def setUp(self):
+		Scheduler.create_instance(Mock())
+		Scheduler().before_ticking()
+		self.tick = Scheduler.FIRST_TICK_ID
+		Scheduler().tick(self.tick)
+		self.work_scheduler = WorkScheduler(4)
+		self.steps = []
+
+	def tearDown(self):
+		Scheduler.destroy_instance()
+
+	def next_tick(self):
+		self.tick += 1
+		Scheduler().tick(self.tick)
+
+	def job(self, name, costs):
+		for i, cost in enumerate(costs):
+			self.steps.append((self.tick, name, i))
+			yield cost
+
+	def test_run_within_budget(self):
+		job = self.job('a', [None, None])
+		self.work_scheduler.add_job('owner', job)
+		self.assertEqual(self.steps, [(self.tick, 'a', 0), (self.tick, 'a', 1)])
+		self.assertFalse(self.work_scheduler.has_job(job))
+
+	def test_continue_in_next_ticks(self):
+		first_tick = self.tick
+		self.work_scheduler.add_job('owner', self.job('a', [None] * 6))
+		self.work_scheduler.add_job('owner', self.job('b', [None]))
+		self.assertEqual(len(self.steps), 4)
+		self.next_tick()
+		self.assertEqual(len(self.steps), 7)
+		self.assertEqual(self.steps[4:], [(first_tick + 1, 'a', 4), (first_tick + 1, 'a', 5), (first_tick + 1, 'b', 0)])
+
+	def test_step_costs(self):
+		self.work_scheduler.add_job('owner', self.job('a', [3, 3, 1]))
+		self.assertEqual(len(self.steps), 2)
+		self.next_tick()
+		self.assertEqual(len(self.steps), 3)
+
+	def test_remove_jobs(self):
+		job = self.job('a', [None] * 6)
+		self.work_scheduler.add_job('owner', job)
+		self.work_scheduler.add_job('other', self.job('b', [None] * 2))
+		self.assertTrue(self.work_scheduler.has_job(job))
+		self.work_scheduler.remove_jobs('owner')
+		self.assertFalse(self.work_scheduler.has_job(job))
+		self.next_tick()
+		self.assertEqual([name for (_, name, _) in self.steps], ['a'] * 4 + ['b'] * 2)
+
+	def test_remove_job(self):
+		job = self.job('a', [None] * 6)
+		self.work_scheduler.add_job('owner', job)
+		self.work_scheduler.add_job('owner', self.job('b', [None] * 2))
+		self.work_scheduler.remove_job(job)
+		self.assertFalse(self.work_scheduler.has_job(job))
+		self.next_tick()
+		self.assertEqual([name for (_, name, _) in self.steps], ['a'] * 4 + ['b'] * 2)
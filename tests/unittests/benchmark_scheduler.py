@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+"""
+Microbenchmark for the Scheduler.
+
+Simulates a late game: lots of instances with periodic calls, some of which are
+removed each tick (buildings torn down, units dying) and readded by new instances.
+Run it from the UH root directory:
+
+	python tests/unittests/benchmark_scheduler.py [instances] [ticks]
+"""
+
+import gettext
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from run_tests import setup_horizons
+gettext.install('', unicode=True) # no translations here
+setup_horizons()
+
+import horizons.main # avoid import cycle of horizons.scheduler
+from horizons.ext.dummy import Dummy
+from horizons.scheduler import Scheduler
+
+
+class Instance(object):
+	def tick(self):
+		pass
+
+	def other_tick(self):
+		pass
+
+
+def run(instance_count, tick_count, churn=0.01):
+	Scheduler.create_instance(Dummy)
+	scheduler = Scheduler()
+	scheduler.before_ticking()
+
+	instances = []
+	def add_instance():
+		instance = Instance()
+		scheduler.add_new_object(instance.tick, instance, run_in=1 + len(instances) % 32, loops=-1, loop_interval=32)
+		scheduler.add_new_object(instance.other_tick, instance, run_in=1 + len(instances) % 64, loops=-1, loop_interval=64)
+		instances.append(instance)
+
+	for i in xrange(instance_count):
+		add_instance()
+
+	churn_per_tick = max(1, int(instance_count * churn))
+	add_time = rem_time = tick_time = 0.0
+	for tick in xrange(Scheduler.FIRST_TICK_ID, Scheduler.FIRST_TICK_ID + tick_count):
+		t0 = time.time()
+		for i in xrange(churn_per_tick):
+			instance = instances.pop((tick * 7919 + i) % len(instances))
+			scheduler.rem_call(instance, instance.other_tick)
+			scheduler.rem_all_classinst_calls(instance)
+		t1 = time.time()
+		for i in xrange(churn_per_tick):
+			add_instance()
+		t2 = time.time()
+		scheduler.tick(tick)
+		t3 = time.time()
+		rem_time += t1 - t0
+		add_time += t2 - t1
+		tick_time += t3 - t2
+
+	Scheduler.destroy_instance()
+	removed = churn_per_tick * tick_count
+	print '%6d instances, %4d ticks: %8.2f us/removal, %6.2f us/add, %8.3f ms/tick' % (
+		instance_count, tick_count, 1e6 * rem_time / removed, 1e6 * add_time / removed,
+		1e3 * tick_time / tick_count)
+
+
+if __name__ == '__main__':
+	instance_counts = [int(sys.argv[1])] if len(sys.argv) > 1 else [1000, 5000, 20000]
+	tick_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+	for instance_count in instance_counts:
+		run(instance_count, tick_count)
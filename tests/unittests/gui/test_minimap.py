@@ -0,0 +1,165 @@
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import itertools
+import unittest
+
+from mock import Mock
+
+from horizons.extscheduler import ExtScheduler
+from horizons.gui.widgets.minimap import Minimap
+from horizons.util.shapes import Rect
+
+
+class RecordingPoints(list):
+	"""List of points that remembers the last point that was looked up."""
+	last_point = None
+
+	def __getitem__(self, index):
+		self.last_point = super(RecordingPoints, self).__getitem__(index)
+		return self.last_point
+
+
+class DummyRenderTarget(object):
+	"""Keeps the points that were drawn for every render name in drawing order.
+	fife is a Dummy in the tests, so the coordinates of a point are taken from the last
+	point that the minimap looked up, see TestMinimap.create_minimap."""
+	def __init__(self):
+		self.points = {}
+		self.rotated_points = None
+		self.getTarget = Mock()
+
+	def addPoint(self, name, point, r, g, b):
+		x, y = self.rotated_points.last_point
+		self.points.setdefault(name, []).append((x, y, (r, g, b)))
+
+	def removeAll(self, name=None):
+		if name is None:
+			self.points.clear()
+		else:
+			self.points.pop(name, None)
+
+	def addQuad(self, *args):
+		pass
+
+
+class DummyTile(object):
+	def __init__(self, settlement=None):
+		self.id = 1
+		self.settlement = settlement
+
+
+class DummyWorld(object):
+	"""Square island with a water hole in the middle."""
+	def __init__(self, size):
+		self.inited = True
+		self.min_x, self.min_y = 0, 0
+		self.max_x, self.max_y = size - 1, size - 1
+		self.map_dimensions = Rect.init_from_topleft_and_size(0, 0, size, size)
+		self.full_map = {}
+		for x in xrange(10, size - 10):
+			for y in xrange(15, size - 5):
+				if not (30 <= x < 40 and 30 <= y < 40):
+					self.full_map[(x, y)] = DummyTile()
+
+	def settle(self, color, left, top, right, bottom):
+		"""Assigns the land in the area to a settlement and returns the changed coords."""
+		settlement = Mock()
+		settlement.owner.color.to_tuple.return_value = color
+		coords = []
+		for x in xrange(left, right):
+			for y in xrange(top, bottom):
+				if (x, y) in self.full_map:
+					self.full_map[(x, y)].settlement = settlement
+					coords.append((x, y))
+		return coords
+
+
+class TestMinimap(unittest.TestCase):
+
+	def setUp(self):
+		ExtScheduler.create_instance(Mock())
+		self.minimaps = []
+
+	def tearDown(self):
+		for minimap in self.minimaps:
+			minimap.end()
+		ExtScheduler.destroy_instance()
+
+	def create_minimap(self, world, rotation=None, icon=False):
+		"""@param rotation: None to disable the rotation, else the rotation to use"""
+		if icon:
+			position = Mock(width=60, height=60)
+			position.name = 'minimap'
+		else:
+			position = Rect.init_from_topleft_and_size(0, 0, 60, 60)
+		minimap = Minimap(position, session=None, view=None, world=world,
+		                  targetrenderer=Mock(), imagemanager=Mock(), renderer=Mock(),
+		                  cam_border=False, use_rotation=rotation is not None, preview=True)
+		rendertarget = DummyRenderTarget()
+		minimap.minimap_image.rendertarget = rendertarget
+		get_rotated_points = minimap._get_rotated_points
+		def get_recording_points():
+			rendertarget.rotated_points = RecordingPoints(get_rotated_points())
+			return rendertarget.rotated_points
+		minimap._get_rotated_points = get_recording_points
+		minimap._rotation_setting = True
+		minimap.rotation = rotation or 0
+		self.minimaps.append(minimap)
+		return minimap
+
+	def get_image(self, minimap):
+		"""Returns the color of every point of the base layer as {(x, y): color}."""
+		image = {}
+		for x, y, color in minimap.minimap_image.rendertarget.points.get(minimap._get_render_name("base"), []):
+			image[(x, y)] = color
+		return dict((point, color) for point, color in image.iteritems() if color != Minimap.COLORS["water"])
+
+	def test_dump_and_draw_data(self):
+		world = DummyWorld(120)
+		world.settle((255, 0, 0), 20, 20, 40, 40)
+		minimap = self.create_minimap(world)
+		minimap.draw()
+		data = minimap.dump_data()
+
+		preview = self.create_minimap(None, icon=True)
+		preview.draw_data(data)
+		self.assertEqual(self.get_image(preview), self.get_image(minimap))
+		self.assertEqual(preview._palette, minimap._palette)
+		for index, color in enumerate(preview._palette):
+			self.assertEqual(preview._get_palette_index(color), index)
+		self.assertEqual(preview._get_palette_index((0, 0, 255)), len(minimap._palette))
+
+	def test_update(self):
+		# the minimap is 60 pixels wide, so there are pixels for multiple coords and vice versa
+		for size, rotation in itertools.product((120, 50), (None, 0, 1, 2, 3)):
+			world = DummyWorld(size)
+			minimap = self.create_minimap(world, rotation)
+			minimap.draw()
+
+			for color, area in (((255, 0, 0), (11, 16, 21, 37)), ((0, 0, 255), (23, 21, size - 15, 44))):
+				for coords in world.settle(color, *area):
+					minimap._update(coords)
+
+			expected = self.create_minimap(world, rotation)
+			expected.draw()
+			self.assertEqual(self.get_image(minimap), self.get_image(expected))
+			self.assertEqual(minimap._pixels, expected._pixels)
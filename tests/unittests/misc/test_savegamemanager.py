@@ -0,0 +1,115 @@
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from mock import Mock, patch
+
+from horizons.extscheduler import ExtScheduler
+from horizons.savegamemanager import SavegameManager
+
+
+class TestSavegameIndex(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.filename = os.path.join(self.directory, 'game.sqlite')
+		self.write_savegame(self.filename, savecounter=3, mtime=1000)
+		ExtScheduler.create_instance(Mock())
+		self.patches = [patch.object(SavegameManager, 'savegame_dir', self.directory),
+		                patch.object(SavegameManager, 'savegame_index', None),
+		                patch.object(SavegameManager, 'savegame_index_filename',
+		                             os.path.join(self.directory, 'savegames.cache')),
+		                patch.object(SavegameManager, 'savegame_index_sync_scheduled', False)]
+		for p in self.patches:
+			p.start()
+
+	def tearDown(self):
+		for p in self.patches:
+			p.stop()
+		ExtScheduler.destroy_instance()
+		shutil.rmtree(self.directory)
+
+	def write_savegame(self, filename, savecounter, mtime):
+		if os.path.exists(filename):
+			os.remove(filename)
+		db = sqlite3.connect(filename)
+		db.execute('CREATE TABLE metadata (name TEXT, value TEXT)')
+		db.execute('CREATE TABLE metadata_blob (name TEXT, value BLOB)')
+		db.execute('CREATE TABLE properties (name TEXT, value TEXT)')
+		db.execute('CREATE TABLE player (is_trader INT, is_pirate INT)')
+		db.executemany('INSERT INTO metadata VALUES (?, ?)',
+		               [('timestamp', 1234.5), ('savecounter', savecounter), ('savegamerev', 70)])
+		db.execute('INSERT INTO metadata_blob VALUES (?, ?)', ('screen', sqlite3.Binary('png')))
+		db.execute('INSERT INTO properties VALUES (?, ?)', ('players_recommended', '2-4'))
+		db.executemany('INSERT INTO player VALUES (?, ?)', [(0, 0), (0, 0), (1, 0)])
+		db.commit()
+		db.close()
+		os.utime(filename, (mtime, mtime))
+
+	def reopen(self):
+		"""Simulate a restart with the index on disk."""
+		SavegameManager._sync_savegame_index()
+		SavegameManager.savegame_index = None
+
+	def test_metadata(self):
+		metadata = SavegameManager.get_metadata(self.filename)
+		self.assertEqual(metadata['savecounter'], 3)
+		self.assertEqual(metadata['timestamp'], 1234.5)
+		self.assertEqual(metadata['rng_state'], "")
+		self.assertEqual(metadata['screenshot'], 'png')
+		self.assertEqual(SavegameManager.get_recommended_number_of_players(self.filename), '2-4')
+		self.assertEqual(SavegameManager.get_players_num(self.filename), 2)
+
+	def test_warm_start_opens_no_database(self):
+		SavegameManager.get_metadata(self.filename)
+		self.reopen()
+		with patch('horizons.savegamemanager.DbReader') as db_reader:
+			self.assertEqual(SavegameManager.get_metadata(self.filename)['screenshot'], 'png')
+			self.assertEqual(SavegameManager.get_players_num(self.filename), 2)
+			self.assertFalse(db_reader.called)
+
+	def test_changed_savegame(self):
+		self.assertEqual(SavegameManager.get_metadata(self.filename)['savecounter'], 3)
+		self.write_savegame(self.filename, savecounter=4, mtime=2000)
+		self.assertEqual(SavegameManager.get_metadata(self.filename)['savecounter'], 4)
+
+	def test_listing_prunes_deleted_savegames(self):
+		other = os.path.join(self.directory, 'other.sqlite')
+		self.write_savegame(other, savecounter=1, mtime=1000)
+		SavegameManager.get_metadata(other)
+		os.remove(other)
+		self.assertEqual(SavegameManager.get_regular_saves(include_displaynames=False), ((self.filename, ), ))
+		self.assertFalse(os.path.abspath(other) in SavegameManager.savegame_index)
+
+	def test_other_files_are_not_indexed(self):
+		directory = tempfile.mkdtemp()
+		try:
+			filename = os.path.join(directory, 'tmp.sqlite')
+			shutil.copy(self.filename, filename)
+			self.assertEqual(SavegameManager.get_metadata(filename)['savecounter'], 3)
+		finally:
+			shutil.rmtree(directory)
+		self.assertTrue(SavegameManager.savegame_index is None)
@@ -0,0 +1,89 @@
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+from unittest import TestCase
+from mock import Mock, patch
+
+from horizons.manager import MPPacketmanager, CommandPacket
+
+
+class TestMPPacketmanager(TestCase):
+
+	def setUp(self):
+		mpmanager = Mock()
+		mpmanager.get_player_count.return_value = 2
+		self.manager = MPPacketmanager(mpmanager)
+		self.timePatcher = patch('time.time')
+		self.clock = self.timePatcher.start()
+		self.clock.return_value = 1000.0
+		# packets are logged with their player
+		self.worldObjectPatcher = patch('horizons.manager.WorldObject.get_object_by_id')
+		self.worldObjectPatcher.start()
+
+	def tearDown(self):
+		self.timePatcher.stop()
+		self.worldObjectPatcher.stop()
+
+	def test_tick_ready(self):
+		first = CommandPacket(5, 1, [])
+		second = CommandPacket(5, 2, [])
+		self.manager.add_packet(CommandPacket(6, 1, []))
+		self.manager.add_packet(first)
+		self.assertFalse(self.manager.is_tick_ready(5))
+		self.manager.add_packet(second)
+		self.assertTrue(self.manager.is_tick_ready(5))
+		self.assertFalse(self.manager.is_tick_ready(6))
+
+		self.assertEqual(self.manager.get_packets_for_tick(5, remove_returned_commands=False), [first, second])
+		self.assertEqual(len(self.manager.get_packets_from_player(1)), 2)
+		self.assertEqual(self.manager.get_packets_for_tick(5), [first, second])
+		self.assertEqual(self.manager.get_packets_for_tick(5), [])
+		self.assertFalse(self.manager.is_tick_ready(5))
+		self.assertEqual(len(self.manager.get_packets_from_player(1)), 1)
+
+	def test_late_packets_are_dropped(self):
+		self.manager.get_packets_for_tick(5)
+		self.manager.add_packet(CommandPacket(4, 1, []))
+		self.manager.add_packet(CommandPacket(5, 1, []))
+		self.assertEqual(self.manager.get_packets_from_player(1), [])
+
+	def test_lag_statistics(self):
+		self.manager.add_packet(CommandPacket(5, 1, []))
+		self.assertFalse(self.manager.is_tick_ready(5))
+		self.clock.return_value += 0.3
+		self.manager.add_packet(CommandPacket(5, 2, []))
+		self.assertTrue(self.manager.is_tick_ready(5))
+		self.manager.get_packets_for_tick(5)
+
+		# tick 6 doesn't have to wait
+		self.manager.add_packet(CommandPacket(6, 2, []))
+		self.manager.add_packet(CommandPacket(6, 1, []))
+		self.assertTrue(self.manager.is_tick_ready(6))
+		self.manager.get_packets_for_tick(6)
+
+		stats = self.manager.get_lag_statistics()
+		histogram, stalls = stats[1]
+		self.assertEqual(histogram[0], 2)
+		self.assertEqual(stalls, 0)
+		histogram, stalls = stats[2]
+		self.assertEqual(histogram[0], 1)
+		self.assertEqual(histogram[MPPacketmanager.LAG_HISTOGRAM_BUCKETS.index(0.5)], 1)
+		self.assertEqual(stalls, 1)
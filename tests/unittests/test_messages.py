@@ -21,7 +21,8 @@
 
 import unittest
 
-from horizons.messaging import Message
+from horizons.messaging import Message, MessageBus
+from horizons.scheduler import Scheduler
 
 import mock
 
@@ -32,12 +33,22 @@ class ExampleMessage(Message):
 class FooMessage(Message):
 	arguments = ('a', 'b', )
 
+class CountMessage(Message):
+	arguments = ('count', )
+	coalesce = True
+
+	def merge(self, older):
+		return CountMessage(self.sender, older.count + self.count)
+
 
 class TestMessageBus(unittest.TestCase):
 
 	def setUp(self):
 		self.cb = mock.Mock()
 
+	def tearDown(self):
+		MessageBus().reset()
+
 	def assert_called_once_with(self, cb, message_type, **arguments):
 		assert cb.call_count == 1
 		msg = cb.call_args[0][0]
@@ -97,6 +108,62 @@ class TestMessageBus(unittest.TestCase):
 		self.assertFalse(self.cb.called)
 
 
+	def test_no_memory_for_unknown_senders(self):
+		ExampleMessage.subscribe(self.cb, sender=self)
+		for sender in xrange(10):
+			ExampleMessage.broadcast(sender)
+		ExampleMessage.unsubscribe(self.cb, sender=self)
+		self.assertEqual({}, MessageBus().local_receivers)
+
+	def test_unsubscribe_during_broadcast(self):
+		other = mock.Mock()
+		def unsubscribe_other(message):
+			ExampleMessage.discard(other)
+		ExampleMessage.subscribe(unsubscribe_other)
+		ExampleMessage.subscribe(other)
+		# the receivers of a broadcast are fixed when it starts
+		ExampleMessage.broadcast(self)
+		self.assertEqual(1, other.call_count)
+		ExampleMessage.broadcast(self)
+		self.assertEqual(1, other.call_count)
+
+
+class TestMessageCoalescing(unittest.TestCase):
+
+	def setUp(self):
+		self.cb = mock.Mock()
+		Scheduler.create_instance(mock.Mock())
+		Scheduler().before_ticking()
+		CountMessage.subscribe(self.cb)
+
+	def tearDown(self):
+		MessageBus().reset()
+		Scheduler.destroy_instance()
+
+	def test_delivered_once_per_tick(self):
+		CountMessage.broadcast('a', 1)
+		CountMessage.broadcast('b', 10)
+		CountMessage.broadcast('a', 2)
+		self.assertFalse(self.cb.called)
+
+		Scheduler().tick(Scheduler.FIRST_TICK_ID)
+		# in order of the first broadcast, changes are combined
+		self.assertEqual([('a', 3), ('b', 10)],
+		                 [(args[0].sender, args[0].count) for args, kwargs in self.cb.call_args_list])
+
+		self.cb.reset_mock()
+		Scheduler().tick(Scheduler.FIRST_TICK_ID + 1)
+		self.assertFalse(self.cb.called)
+		CountMessage.broadcast('a', 5)
+		Scheduler().tick(Scheduler.FIRST_TICK_ID + 2)
+		self.assertEqual(1, self.cb.call_count)
+
+	def test_immediate_without_game(self):
+		Scheduler.destroy_instance()
+		CountMessage.broadcast('a', 1)
+		self.assertEqual(1, self.cb.call_count)
+
+
 class TestMessage(unittest.TestCase):
 
 	def test_sender_argument(self):
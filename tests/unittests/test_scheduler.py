@@ -218,3 +218,57 @@ class TestScheduler(TestCase):
 		self.assertEqual(2, self.scheduler.get_remaining_ticks(instance, self.callback))
 		self.scheduler.tick(Scheduler.FIRST_TICK_ID+2)
 		self.assertEqual(1, self.scheduler.get_remaining_ticks(instance, self.callback))
+
+	def test_remove_call_keeps_order_of_other_callbacks(self):
+		self.scheduler.before_ticking()
+		calls = []
+		instances = [Mock() for i in xrange(40)]
+		for i, instance in enumerate(instances):
+			self.scheduler.add_new_object(lambda i=i: calls.append(i), instance, run_in=1)
+		# remove enough calls to trigger a compaction of the tick
+		for instance in instances[::3] + instances[1::3]:
+			self.scheduler.rem_all_classinst_calls(instance)
+		self.scheduler.tick(Scheduler.FIRST_TICK_ID)
+		self.assertEqual(range(2, 40, 3), calls)
+		self.assertFalse(self.scheduler.calls_by_instance)
+
+	def test_remove_object_of_periodic_callback(self):
+		self.scheduler.before_ticking()
+		instance = Mock()
+		self.scheduler.add_new_object(self.callback, instance, run_in=1, loops=-1)
+		self.scheduler.tick(Scheduler.FIRST_TICK_ID)
+		self.callback.reset_mock()
+
+		callbacks = self.scheduler.get_classinst_calls(instance)
+		for callback in callbacks:
+			self.assertEqual(1, self.scheduler.rem_object(callback))
+		self.scheduler.tick(Scheduler.FIRST_TICK_ID+1)
+		self.assertFalse(self.callback.called)
+		self.assertFalse(self.scheduler.calls_by_instance)
+
+	def test_remove_all_classinstance_callbacks_within_periodic_callback(self):
+		self.scheduler.before_ticking()
+		instance = Mock()
+		self.callback.side_effect = lambda: self.scheduler.rem_all_classinst_calls(instance)
+		finish_callback = Mock()
+		self.scheduler.add_new_object(self.callback, instance, run_in=1, loops=-1, finish_callback=finish_callback)
+
+		self.scheduler.tick(Scheduler.FIRST_TICK_ID)
+		self.callback.assert_called_once_with()
+		self.callback.reset_mock()
+
+		self.scheduler.tick(Scheduler.FIRST_TICK_ID+1)
+		self.assertFalse(self.callback.called)
+		self.assertFalse(finish_callback.called)
+		self.assertFalse(self.scheduler.schedule)
+
+	def test_finish_callback_called_after_last_loop(self):
+		self.scheduler.before_ticking()
+		instance = Mock()
+		finish_callback = Mock()
+		self.scheduler.add_new_object(self.callback, instance, run_in=1, loops=2, finish_callback=finish_callback)
+		self.scheduler.tick(Scheduler.FIRST_TICK_ID)
+		self.assertFalse(finish_callback.called)
+		self.scheduler.tick(Scheduler.FIRST_TICK_ID+1)
+		finish_callback.assert_called_once_with()
+		self.assertFalse(self.scheduler.calls_by_instance)
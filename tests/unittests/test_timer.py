@@ -171,3 +171,26 @@ class TestTimer(TestCase):
 		self.timer.add_test(self.test)
 		self.timer.check_tick()
 		self.assertFalse(self.callback.called)
+
+	def test_run_ticks_ignores_clock(self):
+		self.assertEqual(3, self.timer.run_ticks(3))
+		expected = [((self.TICK_START,),), ((self.TICK_START + 1,),), ((self.TICK_START + 2,),)]
+		self.assertEquals(expected, self.callback.call_args_list)
+		self.callback.reset_mock()
+		self.timer.check_tick()
+		self.callback.assert_called_once_with(TestTimer.TICK_START + 3)
+
+	def test_run_ticks_while_paused(self):
+		self.timer.ticks_per_second = 0
+		self.assertEqual(2, self.timer.run_ticks(2))
+		self.assertEqual(2, self.callback.call_count)
+
+	def test_run_ticks_test_func_skip(self):
+		self.test.side_effect = lambda tick: Timer.TEST_SKIP if tick == self.TICK_START + 1 else Timer.TEST_PASS
+		self.timer.add_test(self.test)
+		self.assertEqual(1, self.timer.run_ticks(5))
+		self.callback.assert_called_once_with(TestTimer.TICK_START)
+
+	def test_run_ticks_max_ticks(self):
+		with patch('horizons.constants.GAME.MAX_TICKS', self.TICK_START + 3):
+			self.assertEqual(4, self.timer.run_ticks(10))
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import random
+import unittest
+
+from horizons.util.pathfinding.clustergraph import ClusterGraph
+from horizons.util.pathfinding.pathfinding import FindPath
+from horizons.util.pathfinding.pathgrid import PathGrid
+from horizons.util.shapes import Point, Rect
+from horizons.world import World
+
+
+class TestClusterGraph(unittest.TestCase):
+
+	def setUp(self):
+		rng = random.Random(42)
+		self.rect = Rect.init_from_borders(0, 0, 259, 259)
+		land = set()
+		for i in xrange(40):
+			x, y = rng.randint(10, 230), rng.randint(10, 230)
+			land.update(Rect.init_from_topleft_and_size(x, y, rng.randint(5, 25), rng.randint(5, 25)).tuple_iter())
+		# a lake that isn't connected to the sea
+		land.update(Rect.init_from_topleft_and_size(200, 0, 10, 10).tuple_iter())
+		land.difference_update(Rect.init_from_topleft_and_size(202, 0, 6, 6).tuple_iter())
+
+		self.water = dict((coords, 1.0) for coords in self.rect.tuple_iter() if coords not in land)
+		self.bodies = dict.fromkeys(self.water)
+		World._recognize_water_bodies(self.bodies)
+		self.grid = PathGrid(self.water, self.rect)
+		self.clusters = ClusterGraph(self.grid, self.bodies)
+
+	def assert_valid_path(self, path, source, destination, blocked):
+		self.assertEqual(source, path[0])
+		self.assertTrue(destination.contains(Point(*path[-1])))
+		for prev, coords in zip(path, path[1:]):
+			self.assertEqual(1, max(abs(prev[0] - coords[0]), abs(prev[1] - coords[1])))
+			self.assertTrue(coords in self.water)
+			self.assertFalse(coords in blocked)
+
+	def test_long_path(self):
+		source = (3, 3)
+		destination = Rect.init_from_topleft_and_size(250, 250, 3, 3)
+		path = self.clusters.find_path(Point(*source), destination)
+		self.assert_valid_path(path, source, destination, {})
+		self.assertTrue(self.clusters.expansions < 300)
+
+		shortest = FindPath()(Point(*source), destination, self.grid, diagonal=True, make_target_walkable=False)
+		self.assertTrue(len(path) <= 1.2 * len(shortest))
+
+	def test_long_path_around_ships(self):
+		source = (255, 3)
+		destination = Point(3, 255)
+		path = self.clusters.find_path(Point(*source), destination)
+		# put ships on every second tile of the path
+		blocked = dict((coords, None) for coords in path[2:-2:2])
+		path = self.clusters.find_path(Point(*source), destination, blocked)
+		self.assert_valid_path(path, source, destination, blocked)
+
+	def test_short_path_same_as_find_path(self):
+		source = Point(3, 3)
+		destination = Point(30, 20)
+		expected = FindPath()(source, destination, self.grid, diagonal=True, make_target_walkable=False)
+		self.assertEqual(expected, self.clusters.find_path(source, destination))
+
+	def test_other_body_of_water(self):
+		self.assertEqual(None, self.clusters.find_path(Point(3, 3), Point(204, 2)))
+		self.assertEqual(None, self.clusters.find_path(Point(204, 2), Point(3, 250)))
+
+	def test_blocked_target(self):
+		destination = Point(250, 250)
+		self.assertEqual(None, self.clusters.find_path(Point(3, 3), destination, {(250, 250): None}))
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import unittest
+
+from horizons.util.pathfinding.pathcache import PathCache
+from horizons.util.pathfinding.pather import StaticPather
+from horizons.util.pathfinding.pathnodes import IslandPathNodes
+from horizons.util.shapes import Point, Rect
+
+
+class DummyIsland(object):
+	"""Island without any walkable land, roads are registered by hand"""
+	def __init__(self, position):
+		self.position = position
+
+	def __iter__(self):
+		return self.position.tuple_iter()
+
+	def get_tile_tuple(self, coords):
+		return None
+
+
+class DummyRoad(object):
+	def __init__(self, x, y):
+		self.position = Rect.init_from_topleft_and_size(x, y, 1, 1)
+
+
+class TestPathCache(unittest.TestCase):
+
+	def test_least_recently_used_is_dropped(self):
+		cache = PathCache(max_size=2)
+		cache.add('a', [(0, 0)])
+		cache.add('b', [(1, 1)])
+		cache.get('a')
+		cache.add('c', [(2, 2)])
+		self.assertEqual(2, len(cache))
+		self.assertEqual([(0, 0)], cache.get('a'))
+		self.assertRaises(KeyError, cache.get, 'b')
+		self.assertEqual((2, 1), (cache.hits, cache.misses))
+
+	def test_returns_copies(self):
+		cache = PathCache()
+		cache.add('a', [(0, 0), (0, 1)])
+		path = cache.get('a')
+		del path[1:]
+		self.assertEqual([(0, 0), (0, 1)], cache.get('a'))
+
+	def test_keys(self):
+		rect = Rect.init_from_topleft_and_size(1, 2, 3, 3)
+		self.assertEqual(PathCache.get_key(Point(1, 2), rect, 0), PathCache.get_key(Point(1, 2), rect, 0))
+		self.assertNotEqual(PathCache.get_key(Point(1, 2), rect, 0), PathCache.get_key(Point(1, 2), rect, 1))
+		self.assertNotEqual(PathCache.get_key(Point(1, 2), rect, 0), PathCache.get_key(rect, Point(1, 2), 0))
+		self.assertNotEqual(PathCache.get_key(Point(1, 2), Point(1, 2)),
+		                    PathCache.get_key(Point(1, 2), Rect.init_from_topleft_and_size(1, 2, 1, 1)))
+
+
+class TestRoadPathCache(unittest.TestCase):
+
+	def setUp(self):
+		self.island = DummyIsland(Rect.init_from_borders(0, 0, 9, 9))
+		self.island.path_nodes = IslandPathNodes(self.island)
+		self.path_nodes = self.island.path_nodes
+		for x in xrange(10):
+			self.path_nodes.register_road(DummyRoad(x, 0))
+
+	def get_path(self):
+		return StaticPather.get_path_on_roads(self.island, Point(0, 0), Point(9, 0))
+
+	def test_hits(self):
+		path = self.get_path()
+		self.assertEqual(10, len(path))
+		self.assertEqual(path, self.get_path())
+		self.assertEqual(path, self.get_path())
+		self.assertEqual((2, 1), (self.path_nodes.road_path_cache.hits, self.path_nodes.road_path_cache.misses))
+
+	def test_invalidated_by_roads(self):
+		self.assertNotEqual(None, self.get_path())
+		self.path_nodes.unregister_road(DummyRoad(5, 0))
+		self.assertEqual(None, self.get_path())
+		self.assertEqual(None, self.get_path())
+		self.path_nodes.register_road(DummyRoad(5, 0))
+		self.assertNotEqual(None, self.get_path())
+		self.assertEqual(1, self.path_nodes.road_path_cache.hits)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import random
+import unittest
+
+from horizons.util.pathfinding.pathfinding import FindPath
+from horizons.util.pathfinding.pathgrid import PathGrid
+from horizons.util.shapes import Point, Rect
+
+
+class TestPathGrid(unittest.TestCase):
+
+	def setUp(self):
+		self.rng = random.Random(42)
+		self.rect = Rect.init_from_borders(-5, 3, 44, 52)
+		self.nodes = {}
+		for coords in self.rect.tuple_iter():
+			if self.rng.random() < 0.7:
+				self.nodes[coords] = 1.0
+		self.grid = PathGrid(self.nodes, self.rect)
+
+	def random_coords(self):
+		return (self.rng.randint(self.rect.left, self.rect.right),
+		        self.rng.randint(self.rect.top, self.rect.bottom))
+
+	def assert_same_paths(self, count, diagonal, make_target_walkable, blocked=None):
+		found = 0
+		for i in xrange(count):
+			source = Point(*self.random_coords())
+			x, y = self.random_coords()
+			destination = Rect.init_from_topleft_and_size(x, y, 2, 2)
+			expected = FindPath()(source, destination, self.nodes, blocked, diagonal, make_target_walkable)
+			path = FindPath()(source, destination, self.grid, blocked, diagonal, make_target_walkable)
+			self.assertEqual(expected, path)
+			found += path is not None
+		self.assertTrue(found > 0)
+
+	def test_index(self):
+		for coords in [(-5, 3), (44, 52), (0, 0 + 10)]:
+			self.assertEqual(coords, self.grid.coords(self.grid.index(coords)))
+		self.assertEqual(None, self.grid.index((-6, 3)))
+		self.assertEqual(None, self.grid.index((44, 53)))
+		# index order is the order of the coordinate tuples
+		coords = list(self.rect.tuple_iter())
+		self.assertEqual(sorted(coords), sorted(coords, key=self.grid.index))
+
+	def test_same_paths_as_dict(self):
+		self.assert_same_paths(50, diagonal=False, make_target_walkable=True)
+
+	def test_same_paths_as_dict_diagonal(self):
+		self.assert_same_paths(50, diagonal=True, make_target_walkable=False)
+
+	def test_same_paths_as_dict_blocked(self):
+		blocked = dict((self.random_coords(), None) for i in xrange(100))
+		self.assert_same_paths(50, diagonal=True, make_target_walkable=True, blocked=blocked)
+
+	def test_add_and_remove_nodes(self):
+		source = Point(-5, 3)
+		destination = Point(44, 52)
+		for coords in self.rect.tuple_iter():
+			self.nodes[coords] = 1.0
+			self.grid.add_node(coords, 1.0)
+		path = FindPath()(source, destination, self.grid, diagonal=True)
+		self.assertEqual(50, len(path))
+
+		# wall off the source
+		for coords in [(-4, 3), (-4, 4), (-5, 4)]:
+			del self.nodes[coords]
+			self.grid.remove_node(coords)
+		self.assertEqual(None, FindPath()(source, destination, self.grid, diagonal=True))
+
+	def test_outside_of_grid_falls_back_to_dict(self):
+		self.nodes[(45, 52)] = 1.0
+		source = Point(44, 52)
+		self.grid.add_node((44, 52), 1.0)
+		self.assertEqual([(44, 52), (45, 52)], FindPath()(source, Point(45, 52), self.grid))
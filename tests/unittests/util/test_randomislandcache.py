@@ -0,0 +1,88 @@
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import patch
+
+from horizons.util.dbreader import DbReader
+from horizons.util.random_map import create_random_islands, generate_map_from_seed
+from horizons.util.randomislandcache import RandomIslandCache
+
+
+class TestRandomIslandCache(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.patch = patch.object(RandomIslandCache, 'directory', os.path.join(self.directory, 'cache'))
+		self.patch.start()
+		self.id_strings = generate_map_from_seed('2013')[:3]
+
+	def tearDown(self):
+		self.patch.stop()
+		shutil.rmtree(self.directory)
+
+	def create_map(self):
+		"""Returns all ground rows of a map with the islands."""
+		db = DbReader(':memory:')
+		with open('content/map-template.sql') as map_template:
+			db.execute_script(map_template.read())
+		create_random_islands(db, self.id_strings)
+		return db("SELECT rowid, * FROM ground")
+
+	def test_cached_islands(self):
+		ground = self.create_map()
+		self.assertEqual(set(row[1] for row in ground), set([0, 1, 2]))
+		for id_string in self.id_strings:
+			self.assertTrue(RandomIslandCache.get(id_string))
+
+		with patch('horizons.util.random_map._generate_random_islands') as generate:
+			self.assertEqual(self.create_map(), ground)
+			self.assertFalse(generate.called)
+
+	def test_parallel_generation(self):
+		ground = self.create_map()
+		shutil.rmtree(RandomIslandCache.directory)
+		with patch('multiprocessing.cpu_count', return_value=3):
+			self.assertEqual(self.create_map(), ground)
+
+	def test_invalid_entries(self):
+		RandomIslandCache.set(self.id_strings[0], [(1, 2, 3, 'straight', 45)])
+		with patch.object(RandomIslandCache, 'VERSION', RandomIslandCache.VERSION + 1):
+			self.assertEqual(RandomIslandCache.get(self.id_strings[0]), None)
+		with open(RandomIslandCache._get_filename(self.id_strings[1]), 'wb') as f:
+			f.write('garbage')
+		self.assertEqual(RandomIslandCache.get(self.id_strings[1]), None)
+
+	def test_prune(self):
+		with patch.object(RandomIslandCache, 'MAX_ISLANDS', 2):
+			for i, id_string in enumerate(self.id_strings):
+				RandomIslandCache.set(id_string, [])
+				filename = RandomIslandCache._get_filename(id_string)
+				os.utime(filename, (1000 + i, 1000 + i))
+			RandomIslandCache.get(self.id_strings[0])
+			RandomIslandCache.prune()
+		self.assertEqual(RandomIslandCache.get(self.id_strings[0]), [])
+		self.assertEqual(RandomIslandCache.get(self.id_strings[1]), None)
+		self.assertEqual(RandomIslandCache.get(self.id_strings[2]), [])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import os
+import tempfile
+import unittest
+
+from horizons.util.dbreader import DbReader
+from horizons.util.savegamewriter import SavegameWriter
+
+
+class TestSavegameWriter(unittest.TestCase):
+
+	def setUp(self):
+		fd, self.filename = tempfile.mkstemp()
+		os.close(fd)
+		os.unlink(self.filename)
+		self.target = DbReader(self.filename)
+		self.writer = SavegameWriter()
+
+	def tearDown(self):
+		self.target.close()
+		os.unlink(self.filename)
+
+	def test_row_order(self):
+		db = self.writer
+		for i in xrange(3):
+			db("INSERT INTO selected(`group`, id) VALUES(NULL, ?)", i)
+			db("INSERT INTO metadata(name, value) VALUES(?, ?)", str(i), str(i))
+			db("INSERT INTO selected(`group`, id) VALUES(?, ?)", 1, 10 + i)
+		db.execute_many("INSERT INTO unit_path(`unit`, `index`, `x`, `y`) VALUES(?, ?, ?, ?)",
+		                [(5, step, step, 0) for step in xrange(3)])
+		db.write(self.target)
+
+		self.assertEqual([(None, 0), (1, 10), (None, 1), (1, 11), (None, 2), (1, 12)],
+		                 self.target("SELECT `group`, id FROM selected"))
+		self.assertEqual([(u'0', u'0'), (u'1', u'1'), (u'2', u'2')], self.target("SELECT name, value FROM metadata"))
+		self.assertEqual([(0, 0), (1, 1), (2, 2)], self.target("SELECT `index`, x FROM unit_path WHERE unit = 5"))
+
+	def test_updates_see_previous_rows(self):
+		db = self.writer
+		db("INSERT INTO metadata(name, value) VALUES(?, ?)", "a", "1")
+		db("UPDATE metadata SET value = ? WHERE name = ?", "2", "a")
+		db("INSERT INTO metadata(name, value) VALUES(?, ?)", "b", "1")
+		self.assertRaises(ValueError, db, "SELECT value FROM metadata")
+		db.write(self.target)
+		self.assertEqual([(u'a', u'2'), (u'b', u'1')], self.target("SELECT name, value FROM metadata"))
+
+	def test_rowids(self):
+		self.writer("INSERT INTO settlement(rowid, island, owner) VALUES(?, ?, ?)", 1005, 1, 2)
+		self.writer("INSERT INTO settlement(rowid, island, owner) VALUES(?, ?, ?)", 1003, 1, 3)
+		self.writer.write(self.target)
+		self.assertEqual([(1003, 3), (1005, 2)], self.target("SELECT rowid, owner FROM settlement ORDER BY rowid"))
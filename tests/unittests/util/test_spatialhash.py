@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import random
+import unittest
+
+from horizons.util.shapes import Circle, Point
+from horizons.util.spatialhash import ProximityZone, SpatialHash
+
+
+class DummyUnit(object):
+	def __init__(self, x, y):
+		self.position = Point(x, y)
+
+
+class TestSpatialHash(unittest.TestCase):
+
+	def query(self, index, center, radius):
+		circle = Circle(center, radius)
+		return [obj for obj in index.get_objects_in_circle(center.to_tuple(), radius)
+		        if circle.contains(obj.position)]
+
+	def test_matches_linear_scan(self):
+		rng = random.Random(42)
+		index = SpatialHash(cell_size=8)
+		units = []
+		for i in xrange(200):
+			unit = DummyUnit(rng.randint(0, 100), rng.randint(0, 100))
+			units.append(unit)
+			index.add(unit, unit.position.to_tuple())
+
+		for i in xrange(500):
+			action = rng.random()
+			if action < 0.1 and units:
+				unit = units.pop(rng.randrange(len(units)))
+				index.remove(unit)
+			elif action < 0.2:
+				unit = DummyUnit(rng.randint(0, 100), rng.randint(0, 100))
+				units.append(unit)
+				index.add(unit, unit.position.to_tuple())
+			elif units:
+				unit = rng.choice(units)
+				unit.position = Point(rng.randint(0, 100), rng.randint(0, 100))
+				index.move(unit, unit.position.to_tuple())
+
+			center = Point(rng.randint(-10, 110), rng.randint(-10, 110))
+			radius = rng.choice([0, 1, 5, 20, 200])
+			circle = Circle(center, radius)
+			expected = [unit for unit in units if circle.contains(unit.position)]
+			self.assertEqual(expected, self.query(index, center, radius))
+
+	def test_move_keeps_order(self):
+		index = SpatialHash(cell_size=4)
+		a, b = DummyUnit(10, 10), DummyUnit(0, 0)
+		index.add(a, (10, 10))
+		index.add(b, (0, 0))
+		b.position = Point(11, 11)
+		index.move(b, (11, 11))
+		a.position = Point(1, 1)
+		index.move(a, (1, 1))
+		self.assertEqual([a, b], self.query(index, Point(5, 5), 20))
+		self.assertEqual(2, len(index))
+
+	def test_remove(self):
+		index = SpatialHash()
+		unit = DummyUnit(3, 3)
+		index.add(unit, (3, 3))
+		index.remove(unit)
+		self.assertFalse(unit in index)
+		self.assertEqual([], index.get_objects_in_rect(0, 0, 100, 100))
+		self.assertRaises(KeyError, index.remove, unit)
+
+	def test_zone_matches_linear_scan(self):
+		rng = random.Random(23)
+		index = SpatialHash(cell_size=8)
+		entered, left = [], []
+		zone = ProximityZone((50, 50), 10, filter=lambda unit: unit.friendly is False,
+		                     enter_callback=entered.append, leave_callback=left.append)
+		index.add_zone(zone)
+		units = []
+		for i in xrange(300):
+			action = rng.random()
+			if action < 0.1 and units:
+				unit = units.pop(rng.randrange(len(units)))
+				index.remove(unit)
+			elif action < 0.3:
+				unit = DummyUnit(rng.randint(0, 100), rng.randint(0, 100))
+				unit.friendly = rng.random() < 0.3
+				units.append(unit)
+				index.add(unit, unit.position.to_tuple())
+			elif action < 0.4:
+				zone.center = (rng.randint(0, 100), rng.randint(0, 100))
+				zone.radius = rng.choice([0, 5, 10, 30])
+				index.update_zone(zone)
+			elif units:
+				unit = rng.choice(units)
+				unit.position = Point(rng.randint(0, 100), rng.randint(0, 100))
+				index.move(unit, unit.position.to_tuple())
+
+			# the zone must know all units in its radius, and must not know any far away ones
+			circle = Circle(Point(*zone.center), zone.radius)
+			# the watched cells reach up to two cell sizes further in each direction
+			far = Circle(Point(*zone.center), 1.5 * (zone.radius + 2 * index.cell_size))
+			for unit in units:
+				if unit.friendly:
+					self.assertFalse(unit in zone)
+				elif circle.contains(unit.position):
+					self.assertTrue(unit in zone)
+				elif not far.contains(unit.position):
+					self.assertFalse(unit in zone)
+			self.assertEqual(len(zone), len([u for u in units if u in zone]))
+			self.assertEqual(len(zone), len(entered) - len(left))
+
+	def test_zone_callbacks(self):
+		index = SpatialHash(cell_size=4)
+		entered, left = [], []
+		a, b = DummyUnit(0, 0), DummyUnit(1, 1)
+		index.add(a, (0, 0))
+		index.add(b, (1, 1))
+		zone = ProximityZone((2, 2), 3, enter_callback=entered.append, leave_callback=left.append)
+		index.add_zone(zone)
+		self.assertEqual([a, b], entered)
+
+		index.move(a, (40, 40))
+		self.assertEqual([a], left)
+		index.move(a, (2, 3))
+		self.assertEqual([a, b, a], entered)
+
+		# moving the zone away makes the units leave in the order they were added
+		zone.center = (60, 60)
+		index.update_zone(zone)
+		self.assertEqual([a, a, b], left)
+		self.assertEqual(0, len(zone))
+
+		# removed zones are not notified any more
+		index.remove_zone(zone)
+		index.move(b, (60, 60))
+		self.assertEqual([a, b, a], entered)
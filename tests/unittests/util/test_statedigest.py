@@ -0,0 +1,94 @@
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import unittest
+
+from horizons.util.statedigest import StateDigest
+
+
+class DummyObject(object):
+	def __init__(self, worldid, value):
+		self.worldid = worldid
+		self.value = value
+
+
+class TestStateDigest(unittest.TestCase):
+
+	def create_digest(self, objects):
+		digest = StateDigest()
+		digest.add_subsystem('objects', lambda obj: obj.value)
+		for obj in objects:
+			digest.add('objects', obj)
+		return digest
+
+	def test_order_independent(self):
+		objects = [DummyObject(i, i * 3) for i in xrange(10)]
+		digest1 = self.create_digest(objects)
+		digest2 = self.create_digest(reversed(objects))
+		self.assertEqual(digest1.get_subsystem_digests(), digest2.get_subsystem_digests())
+
+	def test_incremental_update(self):
+		objects = [DummyObject(i, i * 3) for i in xrange(10)]
+		digest = self.create_digest(objects)
+		before = digest.get_subsystem_digests()
+
+		objects[4].value = 'changed'
+		# not marked as dirty yet
+		self.assertEqual(digest.get_subsystem_digests(), before)
+		digest.mark_dirty('objects', objects[4])
+		changed = digest.get_subsystem_digests()
+		self.assertNotEqual(changed, before)
+		self.assertEqual(changed, self.create_digest(objects).get_subsystem_digests())
+
+		new_object = DummyObject(100, 1)
+		digest.add('objects', new_object)
+		self.assertNotEqual(digest.get_subsystem_digests(), changed)
+		digest.remove('objects', new_object)
+		self.assertEqual(digest.get_subsystem_digests(), changed)
+
+		objects[4].value = 12
+		digest.mark_dirty('objects', objects[4])
+		self.assertEqual(digest.get_subsystem_digests(), before)
+
+	def test_details(self):
+		objects = [DummyObject(i, i) for i in xrange(3)]
+		details1 = self.create_digest(objects).get_details()['objects']
+		objects[1].value = 5
+		details2 = self.create_digest(objects).get_details()['objects']
+		self.assertEqual([worldid for worldid in details1 if details1[worldid] != details2[worldid]], [1])
+
+	def test_update_and_unknown_objects(self):
+		digest = self.create_digest([])
+		digest.add_subsystem('rng', None)
+		world = DummyObject(0, None)
+		digest.update('rng', world, 'a')
+		first = digest.get_subsystem_digests()['rng']
+		digest.update('rng', world, 'b')
+		self.assertNotEqual(digest.get_subsystem_digests()['rng'], first)
+		# marking an object that isn't tracked is harmless
+		digest.mark_dirty('objects', DummyObject(1, 1))
+		self.assertEqual(digest.get_subsystem_digests()['objects'], 0)
+
+	def test_float_state(self):
+		digest = self.create_digest([DummyObject(0, (1, 'a', [2, 0.5]))])
+		self.assertRaises(TypeError, digest.get_subsystem_digests)
+		digest.add_subsystem('rng', None)
+		self.assertRaises(TypeError, digest.update, 'rng', DummyObject(1, None), 0.5)
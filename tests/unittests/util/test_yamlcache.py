@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import Mock, patch
+
+from horizons.extscheduler import ExtScheduler
+from horizons.util.yamlcache import YamlCache
+from horizons.util.yamlcachestorage import YamlCacheStorage
+
+
+class TestYamlCache(unittest.TestCase):
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.cache_directory = tempfile.mkdtemp()
+		self.cache_filename = os.path.join(self.cache_directory, 'yamldata.cache')
+		self.filename = os.path.join(self.directory, 'data.yaml')
+		self.write('id: 1\n', 1000)
+		ExtScheduler.create_instance(Mock())
+		self.patches = [patch.object(YamlCache, 'cache', None),
+		                patch.object(YamlCache, 'cache_filename', self.cache_filename),
+		                patch.object(YamlCache, 'sync_scheduled', False)]
+		for p in self.patches:
+			p.start()
+
+	def tearDown(self):
+		for p in self.patches:
+			p.stop()
+		ExtScheduler.destroy_instance()
+		shutil.rmtree(self.directory)
+		shutil.rmtree(self.cache_directory)
+
+	def write(self, content, mtime, filename=None):
+		filename = filename or self.filename
+		with open(filename, 'w') as f:
+			f.write(content)
+		os.utime(filename, (mtime, mtime))
+
+	def reopen(self):
+		"""Simulate a restart with the cache on disk."""
+		YamlCache._do_sync()
+		YamlCache.cache = None
+
+	def test_warm_start_only_stats(self):
+		self.assertEqual(YamlCache.get_file(self.filename), {'id': 1})
+		self.reopen()
+		with patch('horizons.util.yamlcache.open', create=True) as mock_open:
+			self.assertEqual(YamlCache.get_file(self.filename), {'id': 1})
+			self.assertFalse(mock_open.called)
+
+	def test_changed_file(self):
+		YamlCache.get_file(self.filename)
+		self.reopen()
+		self.write('id: 2\n', 1001)
+		self.assertEqual(YamlCache.get_file(self.filename), {'id': 2})
+
+	def test_touched_file_is_not_parsed(self):
+		YamlCache.get_file(self.filename)
+		self.reopen()
+		self.write('id: 1\n', 2000)
+		with patch.object(YamlCache, 'load_yaml_data') as load_yaml_data:
+			self.assertEqual(YamlCache.get_file(self.filename), {'id': 1})
+			self.assertFalse(load_yaml_data.called)
+		self.assertEqual(YamlCache.cache.get_manifest_entry(self.filename)[1], 2000)
+
+	def test_find_files(self):
+		subdirectory = os.path.join(self.directory, 'sub')
+		os.mkdir(subdirectory)
+		self.write('id: 3\n', 1000, os.path.join(subdirectory, 'other.yaml'))
+		expected = [(self.directory, 'data.yaml'), (subdirectory, 'other.yaml')]
+		self.assertEqual(sorted(YamlCache.find_files(self.directory)), expected)
+		self.reopen()
+		with patch('os.walk') as walk:
+			self.assertEqual(sorted(YamlCache.find_files(self.directory)), expected)
+			self.assertFalse(walk.called)
+
+		os.remove(os.path.join(subdirectory, 'other.yaml'))
+		os.utime(subdirectory, (3000, 3000))
+		self.assertEqual(YamlCache.find_files(self.directory), [(self.directory, 'data.yaml')])
+
+
+class TestYamlCacheStorage(unittest.TestCase):
+
+	def setUp(self):
+		fd, self.filename = tempfile.mkstemp()
+		os.close(fd)
+		os.unlink(self.filename)
+
+	def tearDown(self):
+		if os.path.exists(self.filename):
+			os.unlink(self.filename)
+
+	def test_lazy_entries(self):
+		storage = YamlCacheStorage.open(self.filename)
+		storage.set('a', (1, 2, 'hash'), {'x': 1})
+		storage.set('b', (3, 4, 'hash'), [1, 2])
+		storage.sync()
+
+		storage = YamlCacheStorage.open(self.filename)
+		self.assertEqual(storage.get_manifest_entry('b'), (3, 4, 'hash'))
+		self.assertTrue('a' in storage)
+		self.assertFalse(storage._data)
+		self.assertEqual(storage['a'], {'x': 1})
+		self.assertEqual(storage._data.keys(), ['a'])
+
+	def test_old_version(self):
+		import cPickle
+		with open(self.filename, 'wb') as f:
+			cPickle.dump((1, {'a': (1, 2)}), f)
+		storage = YamlCacheStorage.open(self.filename)
+		self.assertFalse('a' in storage)
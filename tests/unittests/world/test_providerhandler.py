@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+# ###################################################
+# Copyright (C) 2013 The Unknown Horizons Team
+# team@unknown-horizons.org
+# This file is part of Unknown Horizons.
+#
+# Unknown Horizons is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the
+# Free Software Foundation, Inc.,
+# 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+# ###################################################
+
+import random
+from unittest import TestCase
+
+from horizons.util.shapes import RadiusRect, Rect
+from horizons.world.providerhandler import ProviderHandler
+
+
+class DummyProvider(object):
+	def __init__(self, x, y, size, provided_resources, owner):
+		self.position = Rect.init_from_topleft_and_size(x, y, size, size)
+		self.provided_resources = provided_resources
+		self.owner = owner
+
+
+class TestProviderHandler(TestCase):
+
+	def get_expected(self, providers, radiusrect, reslist, player):
+		r2 = radiusrect.center
+		return [p for p in providers
+		        if (not reslist or set(reslist) & set(p.provided_resources)) and
+		           (player is None or p.owner == player) and
+		           p.position.distance(r2) <= radiusrect.radius]
+
+	def test_matches_linear_scan(self):
+		rng = random.Random(7)
+		handler = ProviderHandler()
+		providers = []
+		for i in xrange(400):
+			if providers and rng.random() < 0.2:
+				provider = providers.pop(rng.randrange(len(providers)))
+				handler.remove(provider)
+			provider = DummyProvider(rng.randint(0, 150), rng.randint(0, 150), rng.choice([1, 2, 3, 6]),
+			                         rng.sample(range(5), rng.randint(1, 3)), rng.choice([None, 1, 2]))
+			providers.append(provider)
+			handler.append(provider)
+
+			center = Rect.init_from_topleft_and_size(rng.randint(0, 150), rng.randint(0, 150), 3, 3)
+			radiusrect = RadiusRect(center, rng.choice([0, 4, 12, 40]))
+			reslist = rng.choice([None, [0], [1, 3], range(5)])
+			player = rng.choice([None, 1])
+			self.assertEqual(self.get_expected(providers, radiusrect, reslist, player),
+			                 handler.get_providers_in_range(radiusrect, reslist=reslist, player=player))
+
+		self.assertEqual(providers, list(handler))
+		self.assertEqual([p for p in providers if 2 in p.provided_resources],
+		                 list(handler.provider_by_resources[2]))
+
+	def test_res(self):
+		handler = ProviderHandler()
+		a = DummyProvider(10, 10, 1, [1], None)
+		b = DummyProvider(12, 10, 1, [2], None)
+		handler.append(a)
+		handler.append(b)
+		radiusrect = RadiusRect(Rect.init_from_topleft_and_size(11, 11, 1, 1), 3)
+		self.assertEqual([b], handler.get_providers_in_range(radiusrect, res=2))
+		self.assertEqual([a, b], handler.get_providers_in_range(radiusrect))
+		handler.remove(a)
+		self.assertEqual([b], handler.get_providers_in_range(radiusrect))
+		self.assertEqual(1, len(handler))